@@ -6,14 +6,44 @@ Responsibility: Classify the incoming client message into a precise
 
 Uses OpenAI function-calling under the hood via `with_structured_output`,
 which eliminates free-text parsing and prevents hallucination of invalid values.
+
+A local probabilistic classifier (weighted keyword cues + softmax) backs two
+modes:
+
+  - Cascade (ANALYST_CASCADE_ENABLED): the local classifier answers first and
+    the stronger ANALYST_CASCADE_MODEL is only called when the top-label margin
+    is below ANALYST_CASCADE_MARGIN or the message is long or mixed.
+  - Heavy load (degradation level >= 3): the LLM is skipped entirely.
+
+Per-tier share and latency are reported by GET /api/v1/analytics.
+
+With ANALYST_BATCH_ENABLED, LLM classifications arriving within
+ANALYST_BATCH_MAX_WAIT_MS are packed (up to ANALYST_BATCH_MAX_SIZE) into one
+structured call that returns a list indexed by item, so the system prompt is
+sent once per batch. Items missing from a batch response — or a whole failed
+batch — fall back to single calls. Batching is bypassed while a cassette is
+being recorded or replayed: a batch prompt depends on which messages happened
+to arrive together, so it would never match on replay.
 """
 
+import json
+import math
+import time
+
 from pydantic import BaseModel
-from typing import Literal
+from typing import Dict, List, Literal, Optional
 from langchain_google_genai import ChatGoogleGenerativeAI
 
 from app.agents.state import AgentState
+from app.core.analytics import analytics
+from app.core import cassette
+from app.core.batcher import MicroBatcher
 from app.core.config import settings
+from app.core.llm import invoke as invoke_llm
+from app.core.log import get_logger
+from app.core.overload import RULE_BASED_ANALYST, controller
+
+logger = get_logger("analyst")
 
 
 # ---------------------------------------------------------------------------
@@ -25,6 +55,14 @@ class _AnalystOutput(BaseModel):
     intent: Literal["refund_request", "support_request", "general_inquiry"]
 
 
+class _AnalystBatchItem(_AnalystOutput):
+    index: int
+
+
+class _AnalystBatchOutput(BaseModel):
+    items: List[_AnalystBatchItem]
+
+
 # ---------------------------------------------------------------------------
 # System prompt — strict, closed-domain, no room for fabrication
 # ---------------------------------------------------------------------------
@@ -59,6 +97,14 @@ to escalate unnecessarily than to miss a dissatisfied client.
 4. Respond exclusively with the required structured output.\
 """
 
+_BATCH_INSTRUCTIONS = """
+
+BATCH MODE: the user turn contains several independent client messages, one \
+per line, each prefixed by its index as "[i]" and JSON-quoted. Classify each \
+message on its own, applying all rules above, and return exactly one item per \
+message carrying the same index.\
+"""
+
 
 # ---------------------------------------------------------------------------
 # LLM singleton — instantiated once at module load, reused across requests
@@ -70,6 +116,145 @@ _llm = ChatGoogleGenerativeAI(
     google_api_key=settings.GEMINI_API_KEY,
 )
 _structured_llm = _llm.with_structured_output(_AnalystOutput)
+_batch_llm = _llm.with_structured_output(_AnalystBatchOutput)
+
+# Tier 2 of the cascade: a stronger model, only built when the cascade is on
+_cascade_llm = None
+if settings.ANALYST_CASCADE_ENABLED:
+    _cascade_model = ChatGoogleGenerativeAI(
+        model=settings.ANALYST_CASCADE_MODEL,
+        temperature=0,
+        google_api_key=settings.GEMINI_API_KEY,
+    )
+    _cascade_llm = _cascade_model.with_structured_output(_AnalystOutput)
+    _batch_llm = _cascade_model.with_structured_output(_AnalystBatchOutput)
+
+
+# ---------------------------------------------------------------------------
+# Tier 1 — local probabilistic classifier (no LLM)
+# ---------------------------------------------------------------------------
+# Each label scores a prior plus a weight per matching cue; a softmax turns the
+# scores into probabilities. Label order breaks ties: "negative" first, as in
+# the LLM prompt's rule 3.
+
+_SENTIMENT_CUES = {
+    "negative": (
+        "angry", "terrible", "unacceptable", "worst", "furious", "disappointed", "frustrat",
+        "complain", "cancel", "urgent", "damaged", "broken", "never arrived", "still waiting",
+        "lawyer", "chargeback", "ridiculous", "awful",
+        "inaceptable", "pésimo", "pesimo", "urgente", "dañado", "roto", "queja", "cancelar",
+        "decepcionad", "nunca llegó", "nunca llego", "harto", "molest",
+    ),
+    "positive": (
+        "thank", "great", "excellent", "love", "awesome", "appreciate", "perfect", "happy",
+        "gracias", "excelente", "genial", "perfecto", "encant", "feliz",
+    ),
+    "neutral": (),
+}
+_INTENT_CUES = {
+    "refund_request": (
+        "refund", "money back", "reimburse", "chargeback", "return my",
+        "reembolso", "devolución", "devolucion", "devuelvan", "mi dinero",
+    ),
+    "support_request": (
+        "not working", "doesn't work", "error", "broken", "issue", "problem", "help", "fail",
+        "crash", "bug", "can't", "cannot", "damaged",
+        "no funciona", "problema", "ayuda", "falla", "dañado", "roto",
+    ),
+    "general_inquiry": (),
+}
+_SENTIMENT_PRIORS = {"negative": 0.0, "positive": 0.0, "neutral": 0.5}
+_INTENT_PRIORS    = {"refund_request": 0.0, "support_request": 0.0, "general_inquiry": 0.5}
+_CUE_WEIGHT       = 2.0
+
+# Contrast markers: mixed messages go to the LLM regardless of margin
+_COMPLEXITY_CUES = (" but ", "however", "although", " pero ", "aunque", "sin embargo")
+
+
+def _label_probabilities(text: str, cues: dict, priors: dict) -> Dict[str, float]:
+    scores = {
+        label: priors[label] + _CUE_WEIGHT * sum(cue in text for cue in label_cues)
+        for label, label_cues in cues.items()
+    }
+    top = max(scores.values())
+    exps = {label: math.exp(score - top) for label, score in scores.items()}
+    total = sum(exps.values())
+    return {label: value / total for label, value in exps.items()}
+
+
+def _margin(probabilities: Dict[str, float]) -> float:
+    first, second = sorted(probabilities.values(), reverse=True)[:2]
+    return first - second
+
+
+def _classify_locally(message: str) -> tuple[_AnalystOutput, float]:
+    """Returns the most likely labels and the smaller of the two top-label margins."""
+    text = message.lower()
+    sentiment = _label_probabilities(text, _SENTIMENT_CUES, _SENTIMENT_PRIORS)
+    intent    = _label_probabilities(text, _INTENT_CUES, _INTENT_PRIORS)
+    result = _AnalystOutput(
+        sentiment=max(sentiment, key=sentiment.get),
+        intent=max(intent, key=intent.get),
+    )
+    return result, min(_margin(sentiment), _margin(intent))
+
+
+def _is_complex(message: str) -> bool:
+    text = f" {message.lower()} "
+    return len(message) > settings.ANALYST_CASCADE_MAX_CHARS or any(cue in text for cue in _COMPLEXITY_CUES)
+
+
+# ---------------------------------------------------------------------------
+# LLM classification — single call or micro-batched
+# ---------------------------------------------------------------------------
+
+def _classify_with_llm(message: str) -> _AnalystOutput:
+    llm = _cascade_llm if _cascade_llm is not None else _structured_llm
+    return invoke_llm("analyst", llm, [
+        {"role": "system", "content": _SYSTEM_PROMPT},
+        {"role": "user",   "content": message},
+    ], schema=_AnalystOutput, hedge=True)     # temperature 0: a duplicate request is safe
+
+
+def _classify_batch(messages: List[str]) -> List[Optional[_AnalystOutput]]:
+    """One structured call for the whole batch; None for anything it misses."""
+    parsed: Dict[int, _AnalystOutput] = {}
+    if len(messages) > 1:
+        numbered = "\n".join(f"[{i}] {json.dumps(m, ensure_ascii=False)}" for i, m in enumerate(messages))
+        try:
+            response: _AnalystBatchOutput = invoke_llm("analyst_batch", _batch_llm, [
+                {"role": "system", "content": _SYSTEM_PROMPT + _BATCH_INSTRUCTIONS},
+                {"role": "user",   "content": numbered},
+            ], schema=_AnalystBatchOutput)
+            parsed = {
+                item.index: _AnalystOutput(sentiment=item.sentiment, intent=item.intent)
+                for item in response.items
+                if 0 <= item.index < len(messages)
+            }
+        except Exception as exc:
+            logger.warning("batch_failed", size=len(messages), error=str(exc))
+
+        if len(parsed) < len(messages):
+            logger.warning("batch_incomplete", size=len(messages), parsed=len(parsed))
+        else:
+            logger.info("batch_classified", size=len(messages))
+
+    # Missed messages get a single call, made by their own run (see MicroBatcher)
+    return [parsed.get(i) for i in range(len(messages))]
+
+
+_batcher = (
+    MicroBatcher(
+        _classify_batch,
+        max_size=settings.ANALYST_BATCH_MAX_SIZE,
+        max_wait=settings.ANALYST_BATCH_MAX_WAIT_MS / 1000,
+        workers=settings.GRAPH_MAX_CONCURRENCY,
+        name="analyst-batch",
+        fallback=_classify_with_llm,
+    )
+    if settings.ANALYST_BATCH_ENABLED
+    else None
+)
 
 
 # ---------------------------------------------------------------------------
@@ -81,23 +266,52 @@ def run_analyst(state: AgentState) -> dict:
     Analyst Agent node for LangGraph.
 
     Calls the LLM with a strict classification prompt and returns a partial
-    state update. Falls back to safe defaults if the LLM call fails.
+    state update. Falls back to safe defaults if the LLM call fails, and to
+    the local classifier when the system is degraded. With the cascade
+    enabled, the LLM is only called for low-margin or complex messages, and
+    if that call fails the local classification is kept.
     """
     message: str = state["messages"][-1]["content"]
+    started = time.perf_counter()
+    margin = None
+
+    if controller.at_least(RULE_BASED_ANALYST):
+        result, _ = _classify_locally(message)
+        source = "rules"
+
+    else:
+        if _cascade_llm is not None:
+            result, margin = _classify_locally(message)
+            source = "local"
+
+        if margin is None or margin < settings.ANALYST_CASCADE_MARGIN or _is_complex(message):
+            try:
+                batched = _batcher is not None and cassette.recorder is None and cassette.player is None
+                result = _batcher.submit(message) if batched else _classify_with_llm(message)
+                source = "llm"
+
+            except Exception as exc:
+                logger.warning("llm_fallback", client_id=state["client_id"], error=str(exc))
+                if margin is not None:
+                    # Cascade: keep the local classification already computed
+                    source = "local_fallback"
+                else:
+                    # Fallback: safe defaults that avoid silent failures blocking the pipeline
+                    result = _AnalystOutput(sentiment="neutral", intent="general_inquiry")
+                    source = "fallback"
+
+    sentiment = result.sentiment
+    intent    = result.intent
+    elapsed   = time.perf_counter() - started
 
-    try:
-        result: _AnalystOutput = _structured_llm.invoke([
-            {"role": "system", "content": _SYSTEM_PROMPT},
-            {"role": "user",   "content": message},
-        ])
-        sentiment = result.sentiment
-        intent    = result.intent
-
-    except Exception as exc:
-        # Fallback: safe defaults that avoid silent failures blocking the pipeline
-        print(f"[ANALYST] LLM error — falling back to defaults. Error: {exc}")
-        sentiment = "neutral"
-        intent    = "general_inquiry"
-
-    print(f"[ANALYST] client={state['client_id']} | sentiment={sentiment}, intent={intent}")
-    return {"sentiment": sentiment, "intent": intent}
+    analytics.record_analysis(sentiment, intent, source, elapsed)
+    logger.info(
+        "classified",
+        client_id=state["client_id"],
+        sentiment=sentiment,
+        intent=intent,
+        source=source,
+        margin=None if margin is None else round(margin, 3),
+        duration_ms=round(elapsed * 1000, 2),
+    )
+    return {"sentiment": sentiment, "intent": intent, "analysis_source": source}
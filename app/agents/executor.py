@@ -9,12 +9,34 @@ stylistic constraints so that every response is:
   - Empathetic but concise (2–4 sentences).
   - Free of internal jargon, agent identifiers, or process details.
   - Actionable — every response closes with a clear next step.
+
+Under load (degradation level >= 2) the static fallback responses are used
+instead of the LLM.
+
+With SLA_PREDRAFT_ENABLED, a draft for SLA-breached runs is prepared by
+`predraft_response` while the Analyst is still running; once the supervisor
+approves, that draft is sent without another LLM call.
+
+When the semantic cache is enabled, a previously sent draft for a paraphrase
+of the same message (same action, same language) is reused instead of calling
+the LLM. Only LLM-generated drafts that were actually executed — automatically
+or after supervisor approval — are stored; static fallbacks never are.
 """
 
+import time
+from typing import AsyncIterator
+
 from langchain_google_genai import ChatGoogleGenerativeAI
 
 from app.agents.state import AgentState
 from app.core.config import settings
+from app.core.llm import astream as astream_llm, invoke as invoke_llm
+from app.core.log import get_logger
+from app.core.overload import STATIC_RESPONSES, controller
+from app.core.semantic_cache import executor_cache
+
+
+logger = get_logger("executor")
 
 
 # ---------------------------------------------------------------------------
@@ -89,6 +111,55 @@ _FALLBACK_RESPONSES: dict[str, str] = {
 }
 
 
+# ---------------------------------------------------------------------------
+# Helpers
+# ---------------------------------------------------------------------------
+
+def _build_messages(action: str, client_message: str) -> list[dict]:
+    action_context = _ACTION_CONTEXT.get(action, _FALLBACK_ACTION_CONTEXT)
+    return [
+        {"role": "system", "content": _SYSTEM_PROMPT.format(action_context=action_context)},
+        {"role": "user",   "content": f"Client message: {client_message}"},
+    ]
+
+
+def _fallback_response(action: str) -> str:
+    return _FALLBACK_RESPONSES.get(action, _FALLBACK_RESPONSES["send_standard_response"])
+
+
+# ---------------------------------------------------------------------------
+# Pre-drafting — injected into the SLA branch of the graph by the orchestrator
+# ---------------------------------------------------------------------------
+
+def predraft_response(state: AgentState, action: str) -> str | None:
+    """
+    Drafts the response for `action` ahead of the supervisor decision.
+
+    Returns None when there is nothing to gain (cached draft available,
+    system degraded) or the LLM fails; the Executor then drafts as usual.
+    Nothing is cached here: only drafts that are actually sent are.
+    """
+    client_message = state["messages"][-1]["content"]
+    if executor_cache is not None and executor_cache.contains(state["client_id"], action, client_message):
+        return None
+    if controller.at_least(STATIC_RESPONSES):
+        return None
+    try:
+        response = invoke_llm("executor", _llm, _build_messages(action, client_message))
+        return response.content.strip()
+    except Exception as exc:
+        logger.warning("predraft_failed", client_id=state["client_id"], action=action, error=str(exc))
+        return None
+
+
+def _take_draft(state: AgentState, action: str, client_message: str) -> str | None:
+    """Returns the pre-drafted response, caching it as an executed draft."""
+    draft = state.get("draft_response")
+    if draft and executor_cache is not None:
+        executor_cache.put(state["client_id"], action, client_message, draft)
+    return draft
+
+
 # ---------------------------------------------------------------------------
 # Node function
 # ---------------------------------------------------------------------------
@@ -102,21 +173,113 @@ def run_executor(state: AgentState) -> dict:
     Falls back to a static professional message if the LLM call fails.
     """
     action         = state.get("proposed_action", "send_standard_response")
-    action_context = _ACTION_CONTEXT.get(action, _FALLBACK_ACTION_CONTEXT)
     client_message = state["messages"][-1]["content"]
+    started        = time.perf_counter()
+
+    if executor_cache is not None:
+        cached = executor_cache.get(state["client_id"], action, client_message)
+        if cached is not None:
+            logger.info(
+                "drafted",
+                client_id=state["client_id"],
+                action=action,
+                source="cache",
+                duration_ms=round((time.perf_counter() - started) * 1000, 2),
+            )
+            return {"execution_result": cached}
+
+    draft = _take_draft(state, action, client_message)
+    if draft:
+        logger.info("drafted", client_id=state["client_id"], action=action, source="pre_drafted")
+        return {"execution_result": draft}
 
-    system_prompt = _SYSTEM_PROMPT.format(action_context=action_context)
+    if controller.at_least(STATIC_RESPONSES):
+        logger.warning("degraded_static_response", client_id=state["client_id"], action=action)
+        return {"execution_result": _fallback_response(action)}
 
     try:
-        response = _llm.invoke([
-            {"role": "system", "content": system_prompt},
-            {"role": "user",   "content": f"Client message: {client_message}"},
-        ])
+        response = invoke_llm("executor", _llm, _build_messages(action, client_message))
         execution_result = response.content.strip()
+        if executor_cache is not None:
+            executor_cache.put(state["client_id"], action, client_message, execution_result)
 
     except Exception as exc:
-        print(f"[EXECUTOR] LLM error — using static fallback. Error: {exc}")
-        execution_result = _FALLBACK_RESPONSES.get(action, _FALLBACK_RESPONSES["send_standard_response"])
+        logger.warning("llm_fallback", client_id=state["client_id"], action=action, error=str(exc))
+        execution_result = _fallback_response(action)
 
-    print(f"[EXECUTOR] client={state['client_id']} | response drafted for action={action}")
+    logger.info(
+        "drafted",
+        client_id=state["client_id"],
+        action=action,
+        duration_ms=round((time.perf_counter() - started) * 1000, 2),
+    )
     return {"execution_result": execution_result}
+
+
+# ---------------------------------------------------------------------------
+# Streaming variant — used by the /stream endpoints
+# ---------------------------------------------------------------------------
+
+class StreamReset(str):
+    """
+    Yielded by `astream_executor` when the LLM fails mid-stream: the chunks
+    streamed so far must be discarded and this text used as the whole response.
+    """
+
+
+async def astream_executor(state: AgentState) -> AsyncIterator[str]:
+    """
+    Streams the client response chunk by chunk as the LLM generates it.
+
+    Same cache, pre-draft and fallback behaviour as `run_executor`: a cached
+    or pre-drafted response, or the static fallback, is yielded as a single chunk. If the LLM fails after
+    some text was already streamed, the static fallback is yielded as a
+    `StreamReset`, so a truncated draft is never sent as the response.
+    """
+    action         = state.get("proposed_action", "send_standard_response")
+    client_message = state["messages"][-1]["content"]
+    started        = time.perf_counter()
+
+    if executor_cache is not None:
+        cached = executor_cache.get(state["client_id"], action, client_message)
+        if cached is not None:
+            logger.info("streamed", client_id=state["client_id"], action=action, source="cache")
+            yield cached
+            return
+
+    draft = _take_draft(state, action, client_message)
+    if draft:
+        logger.info("streamed", client_id=state["client_id"], action=action, source="pre_drafted")
+        yield draft
+        return
+
+    if controller.at_least(STATIC_RESPONSES):
+        logger.warning("degraded_static_response", client_id=state["client_id"], action=action)
+        yield _fallback_response(action)
+        return
+
+    chunks: list[str] = []
+    try:
+        async for chunk in astream_llm("executor", _llm, _build_messages(action, client_message)):
+            chunks.append(chunk)
+            yield chunk
+        if executor_cache is not None:
+            executor_cache.put(state["client_id"], action, client_message, "".join(chunks).strip())
+
+    except Exception as exc:
+        logger.warning(
+            "llm_stream_fallback" if not chunks else "llm_stream_truncated",
+            client_id=state["client_id"],
+            action=action,
+            chunks=len(chunks),
+            error=str(exc),
+        )
+        yield StreamReset(_fallback_response(action)) if chunks else _fallback_response(action)
+
+    logger.info(
+        "streamed",
+        client_id=state["client_id"],
+        action=action,
+        chunks=len(chunks),
+        duration_ms=round((time.perf_counter() - started) * 1000, 2),
+    )
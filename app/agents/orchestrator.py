@@ -3,21 +3,37 @@ LangGraph Orchestrator
 
 Defines and compiles the CRM automation state machine:
 
-    ┌─────────┐     ┌────────┐     ┌──────────────────────┐
-    │ analyst │────▶│ triage │────▶│ executor  (auto OK)  │──▶ END
-    └─────────┘     └────────┘  │  └──────────────────────┘
-                                │
-                                └▶ END  (escalate_to_human → supervisor pause)
+    ┌───────────┐
+    │  analyst  │──┐
+    └───────────┘  │   ┌────────┐     ┌──────────────────────┐
+                   ├──▶│ triage │────▶│ executor  (auto OK)  │──▶ END
+    ┌───────────┐  │   └────────┘  │  └──────────────────────┘
+    │ sla_check │──┘               │
+    └───────────┘                  └▶ END  (escalate_to_human → supervisor pause)
+
+`analyst` and `sla_check` run in the same step; `triage` waits for both.
+On an SLA breach `sla_check` already prepares the supervisor note, so the
+slowest branch of an urgent message is a single LLM call deep. With
+SLA_PREDRAFT_ENABLED the Executor's `predraft_response` is injected into
+`sla_check` as well, drafting the client response next to the note (one
+extra LLM call per breach, wasted if the supervisor rejects).
 
 The graph is compiled once at import time and reused across requests.
+Each node is wrapped with `traced()` so it appears in the run's trace timeline.
+A second variant without the executor node (`crm_triage_graph`) backs the
+streaming endpoints, which stream the executor draft themselves.
 """
 
-from langgraph.graph import StateGraph, END
+from functools import partial
+
+from langgraph.graph import StateGraph, START, END
 
 from app.agents.state import AgentState
 from app.agents.analyst import run_analyst
-from app.agents.triage import run_triage
-from app.agents.executor import run_executor
+from app.agents.triage import run_sla_check, run_triage
+from app.agents.executor import predraft_response, run_executor
+from app.core.config import settings
+from app.core.tracing import traced
 
 
 # ---------------------------------------------------------------------------
@@ -40,22 +56,35 @@ def _route_after_triage(state: AgentState) -> str:
 # Graph construction
 # ---------------------------------------------------------------------------
 
-def build_graph() -> StateGraph:
-    """Build and compile the LangGraph state machine."""
+def build_graph(auto_execute: bool = True, predraft: bool = settings.SLA_PREDRAFT_ENABLED) -> StateGraph:
+    """
+    Build and compile the LangGraph state machine.
+
+    With auto_execute=False the graph always ends after triage, leaving the
+    executor to the caller. With predraft=True SLA-breached runs get their
+    Executor draft in the `sla_check` node.
+    """
 
     workflow = StateGraph(AgentState)
+    sla_check = partial(run_sla_check, predraft=predraft_response) if predraft else run_sla_check
 
     # -- Nodes ---------------------------------------------------------------
-    workflow.add_node("analyst", run_analyst)
-    workflow.add_node("triage", run_triage)
-    workflow.add_node("executor", run_executor)
+    workflow.add_node("analyst", traced("analyst", run_analyst))
+    workflow.add_node("sla_check", traced("sla_check", sla_check))
+    workflow.add_node("triage", traced("triage", run_triage))
 
-    # -- Entry point ---------------------------------------------------------
-    workflow.set_entry_point("analyst")
+    # -- Entry points (run in parallel) -------------------------------------
+    workflow.add_edge(START, "analyst")
+    workflow.add_edge(START, "sla_check")
 
     # -- Edges ---------------------------------------------------------------
-    workflow.add_edge("analyst", "triage")
+    workflow.add_edge(["analyst", "sla_check"], "triage")
+
+    if not auto_execute:
+        workflow.add_edge("triage", END)
+        return workflow.compile()
 
+    workflow.add_node("executor", traced("executor", run_executor))
     workflow.add_conditional_edges(
         "triage",
         _route_after_triage,
@@ -72,3 +101,4 @@ def build_graph() -> StateGraph:
 
 # Singleton — compiled once, shared across all FastAPI requests.
 crm_graph = build_graph()
+crm_triage_graph = build_graph(auto_execute=False)
@@ -0,0 +1,185 @@
+"""
+Graph execution modes.
+
+`run_graph()` is how the webhook runs `crm_graph` / `crm_triage_graph`:
+
+    GRAPH_EXECUTION_MODE=thread   (default) in the API process's threadpool
+    GRAPH_EXECUTION_MODE=process  in a pool of GRAPH_PROCESS_WORKERS worker
+                                  processes (0: one per CPU core)
+
+In process mode each worker imports the compiled graphs (and so builds the
+LLM clients) once, when the pool starts, so the first requests do not pay for
+it. A run travels as a flat tuple of the fields a new run needs and comes
+back as a tuple of the fields the graph fills in:
+
+    task:   (run_id, client_id, message, timestamp, client_risk, graph, degradation level)
+    result: (sentiment, intent, analysis_source, sla_breached, proposed_action,
+             supervisor_note, draft_response, execution_result), spans, analytics
+
+Everything that must stay in one place stays in the API process: the
+pending store, the supervisor endpoints, the fair scheduler. The worker runs
+at the degradation level the API process computed at dispatch, and its spans,
+analytics and LLM latencies are merged back into the API process so traces,
+/analytics and overload control see every run. Workers never write to
+TRACE_EXPORT_PATH themselves: their spans are exported with the API
+process's trace. Executor semantic caches are per worker.
+
+If a worker dies (OOM kill, segfault in a native extension) the pool is
+broken for good; it is then discarded, and the run retried once on a fresh
+pool before the error reaches the caller.
+
+Cassette recording and replay need the API process's recorder / player, so
+runs always use the threadpool while either is active.
+"""
+
+import asyncio
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional
+
+from starlette.concurrency import run_in_threadpool
+
+from app.agents.orchestrator import crm_graph, crm_triage_graph
+from app.agents.state import AgentState, initial_state
+from app.core import cassette
+from app.core.analytics import analytics
+from app.core.config import settings
+from app.core.llm import observe
+from app.core.log import bind_run, get_logger
+from app.core.overload import controller
+from app.core.tracing import adopt, tracer
+
+logger = get_logger("runner")
+
+# Fields the graph fills in, in result-tuple order
+_OUT_FIELDS = (
+    "sentiment", "intent", "analysis_source", "sla_breached", "proposed_action",
+    "supervisor_note", "draft_response", "execution_result",
+)
+
+
+# ---------------------------------------------------------------------------
+# Worker process side
+# ---------------------------------------------------------------------------
+
+def _init_worker() -> None:
+    """Runs once in each new worker, after importing this module compiled the graphs and LLM clients."""
+    tracer.export_path = None       # the API process exports the adopted spans
+    logger.info("worker_ready", pid=os.getpid())
+
+
+def _ping() -> int:
+    return os.getpid()
+
+
+def _execute(task: tuple) -> tuple:
+    """Runs one graph invocation inside a worker process."""
+    run_id, client_id, message, timestamp, client_risk, graph_name, level = task
+    graph = crm_graph if graph_name == "crm_graph" else crm_triage_graph
+
+    bind_run(run_id, client_id)
+    try:
+        with analytics.capture() as events, controller.pinned(level):
+            with tracer.trace(run_id, client_id, name="worker"):
+                state = graph.invoke(initial_state(client_id, message, timestamp, client_risk))
+    finally:
+        trace = tracer.pop(run_id)
+
+    spans = [
+        (s.span_id, s.parent_id, s.name, s.start_ns, s.end_ns, s.attributes)
+        for s in (trace.spans if trace is not None else [])
+    ]
+    return tuple(state.get(name) for name in _OUT_FIELDS), spans, events
+
+
+# ---------------------------------------------------------------------------
+# API process side
+# ---------------------------------------------------------------------------
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    """Starts the worker pool on first use and waits until every worker has imported the graphs."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                workers = settings.GRAPH_PROCESS_WORKERS or os.cpu_count() or 1
+                pool = ProcessPoolExecutor(
+                    max_workers=workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                )
+                pids = {f.result() for f in [pool.submit(_ping) for _ in range(workers)]}
+                logger.info("process_pool_started", workers=workers, warm=len(pids))
+                _pool = pool
+    return _pool
+
+
+def _discard_pool(pool: ProcessPoolExecutor) -> None:
+    """Drops a broken pool so the next run starts a fresh one."""
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def start() -> None:
+    """Pre-warms the worker pool (no-op in thread mode)."""
+    if settings.GRAPH_EXECUTION_MODE == "process":
+        _get_pool()
+
+
+def shutdown() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(cancel_futures=True)
+            _pool = None
+
+
+def _merge(state: AgentState, result: tuple) -> AgentState:
+    """Folds a worker's result into the API process: analytics, spans, LLM latency, state."""
+    fields, spans, events = result
+    analytics.replay(events)
+    adopt(spans)
+    for _, _, name, start_ns, end_ns, attributes in spans:
+        if name == "llm" and end_ns is not None and not attributes.get("replayed"):
+            observe(attributes["agent"], (end_ns - start_ns) / 1e9)
+    return {**state, **dict(zip(_OUT_FIELDS, fields))}
+
+
+async def run_graph(run_id: str, state: AgentState, auto_execute: bool = True) -> AgentState:
+    """
+    Runs a new message's state through `crm_graph` (or `crm_triage_graph`
+    when `auto_execute` is False) and returns the final state.
+    """
+    if settings.GRAPH_EXECUTION_MODE != "process" or cassette.recorder is not None or cassette.player is not None:
+        return await run_in_threadpool((crm_graph if auto_execute else crm_triage_graph).invoke, state)
+
+    task = (
+        run_id,
+        state["client_id"],
+        state["messages"][-1]["content"],
+        state["timestamp"],
+        state.get("client_risk"),
+        "crm_graph" if auto_execute else "crm_triage_graph",
+        controller.level(),
+    )
+    for attempt in range(2):
+        pool = await run_in_threadpool(_get_pool)
+        try:
+            result = await asyncio.wrap_future(pool.submit(_execute, task))
+        except BrokenProcessPool:
+            _discard_pool(pool)
+            logger.error("process_pool_broken", client_id=state["client_id"], retried=attempt == 0)
+            if attempt:
+                raise
+            continue
+        return _merge(state, result)
@@ -14,11 +14,18 @@ class AgentState(TypedDict):
                       Values: "positive" | "neutral" | "negative"
     intent          : High-level intent detected by the Analyst agent.
                       Values: "refund_request" | "support_request" | "general_inquiry"
+    analysis_source : Where the Analyst's classification came from.
+                      Values: "llm" | "local" | "local_fallback" | "rules" | "fallback"
     sla_breached    : True when the message age exceeds the configured SLA threshold.
     proposed_action : Action recommended by the Triage agent.
                       Values: "send_standard_response" | "process_refund" | "escalate_to_human"
     supervisor_note : Context note generated by Triage for the human supervisor.
                       Only populated when proposed_action == "escalate_to_human".
+    draft_response  : Client response drafted ahead of time for an SLA-breached run,
+                      while the Analyst was still running. Used by the Executor
+                      once the supervisor approves.
+    client_risk     : Snapshot of the client's risk profile taken when the message
+                      arrived (see app/core/risk.py); None for a client without history.
     human_approved  : None = not yet decided | True = approved | False = rejected.
     execution_result: Final response drafted and sent by the Executor agent.
     """
@@ -28,8 +35,32 @@ class AgentState(TypedDict):
     timestamp: str
     sentiment: str
     intent: str
+    analysis_source: Optional[str]
     sla_breached: bool
     proposed_action: str
     supervisor_note: Optional[str]
+    draft_response: Optional[str]
+    client_risk: Optional[dict]
     human_approved: Optional[bool]
     execution_result: Optional[str]
+
+
+def initial_state(client_id: str, message: str, timestamp: str,
+                  client_risk: Optional[dict] = None) -> AgentState:
+    """Builds the state that enters the graph for a new client message."""
+    return {
+        "client_id": client_id,
+        "messages": [{"role": "user", "content": message}],
+        "timestamp": timestamp,
+        # Defaults — will be overwritten by agent nodes
+        "sentiment": "neutral",
+        "intent": "general_inquiry",
+        "analysis_source": None,
+        "sla_breached": False,
+        "proposed_action": "",
+        "supervisor_note": None,
+        "draft_response": None,
+        "client_risk": client_risk,
+        "human_approved": None,
+        "execution_result": None,
+    }
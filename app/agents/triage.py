@@ -3,7 +3,15 @@ Triage Agent — Critical Routing Agent
 
 Responsibilities:
   1. Evaluate SLA compliance via deterministic datetime comparison (no LLM needed).
-  2. Apply a rule-based routing matrix to decide the next action.
+     This runs as its own graph node (`run_sla_check`), in parallel with the
+     Analyst: a breach means escalation whatever the sentiment, so the
+     supervisor note is started right away, overlapping the Analyst call.
+     When the orchestrator passes a `predraft` callable (SLA_PREDRAFT_ENABLED),
+     the Executor draft is prepared next to the note.
+  2. Apply a rule-based routing matrix to decide the next action. Besides the
+     current message it consults the client's risk profile (`client_risk`, a
+     snapshot taken by the API process; see app/core/risk.py), so a client's
+     third complaint this week is not routed like their first.
   3. When escalation is required, generate a concise, factual briefing note
      for the human supervisor using the LLM.
 
@@ -12,15 +20,27 @@ Design rationale:
     enum values, not natural language reasoning. Using an LLM here would add
     latency and introduce variability with no benefit.
   - The LLM is used ONLY to produce the human-readable supervisor_note,
-    where natural language synthesis genuinely adds value.
+    where natural language synthesis genuinely adds value. Under load
+    (degradation level >= 1) even that call is skipped and a structured
+    reason is sent instead.
 """
 
+import contextvars
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
+from typing import Callable, Optional
 
 from langchain_google_genai import ChatGoogleGenerativeAI
 
 from app.agents.state import AgentState
+from app.core.analytics import analytics
 from app.core.config import settings
+from app.core.llm import invoke as invoke_llm
+from app.core.log import get_logger
+from app.core.overload import NO_SUPERVISOR_NOTE, controller
+
+logger = get_logger("triage")
 
 
 # ---------------------------------------------------------------------------
@@ -33,7 +53,7 @@ You are a CRM triage specialist drafting a briefing note for a human supervisor.
 You will receive structured data about a client case. Write a note that:
 - Is exactly 2 sentences long.
 - Sentence 1: state the reason this case requires human intervention \
-(reference sentiment, SLA breach, or both — only what is true).
+(reference sentiment, SLA breach, client history — only what is true).
 - Sentence 2: recommend a specific, actionable next step the supervisor \
 should take.
 
@@ -56,6 +76,10 @@ _llm = ChatGoogleGenerativeAI(
 )
 
 
+# Runs the supervisor note next to the Executor pre-draft in the SLA branch
+_branch_pool = ThreadPoolExecutor(max_workers=settings.GRAPH_MAX_CONCURRENCY, thread_name_prefix="sla-branch")
+
+
 # ---------------------------------------------------------------------------
 # Helpers
 # ---------------------------------------------------------------------------
@@ -72,67 +96,160 @@ def _check_sla(timestamp_iso: str) -> bool:
         return False  # malformed timestamp: do not penalise with a false SLA breach
 
 
-def _generate_supervisor_note(state: AgentState, sla_breached: bool) -> str | None:
-    """
-    Calls the LLM to produce a 2-sentence escalation briefing for the supervisor.
-    Returns None on failure so the pipeline is never blocked.
-    """
+def _risk_elevated(state: AgentState) -> bool:
+    risk = state.get("client_risk")
+    return bool(risk and risk["elevated"])
+
+
+def _escalation_reasons(state: AgentState, sla_breached: bool, analysed: bool) -> list[str]:
     reasons = []
-    if state.get("sentiment") == "negative":
+    if analysed and state.get("sentiment") == "negative":
         reasons.append("negative client sentiment")
     if sla_breached:
         reasons.append(f"SLA breach (threshold: {settings.SLA_THRESHOLD_HOURS}h)")
+    if _risk_elevated(state):
+        reasons.append(f"client history ({', '.join(state['client_risk']['reasons'])})")
+    return reasons
+
+
+def _history_line(state: AgentState) -> str:
+    risk = state.get("client_risk")
+    if not risk:
+        return "Recent client history: none"
+    return (
+        f"Recent client history (decayed counts): {risk['negative']:.1f} negative messages, "
+        f"{risk['refunds']:.1f} refund requests, {risk['escalations']:.1f} escalations, "
+        f"{risk['rejections']:.1f} supervisor rejections"
+    )
+
+
+def _analysis_line(state: AgentState) -> str:
+    return (
+        f"Detected sentiment: {state.get('sentiment', 'unknown')}; "
+        f"detected intent: {state.get('intent', 'unknown')}."
+    )
+
+
+def _structured_note(state: AgentState, sla_breached: bool, analysed: bool) -> str:
+    """LLM-free briefing used when the system is degraded."""
+    reasons = _escalation_reasons(state, sla_breached, analysed)
+    note = f"Escalation reasons: {', '.join(reasons) if reasons else 'policy rule'}."
+    return f"{note} {_analysis_line(state)}" if analysed else note
+
+
+def _generate_supervisor_note(state: AgentState, sla_breached: bool, analysed: bool = True) -> str | None:
+    """
+    Calls the LLM to produce a 2-sentence escalation briefing for the supervisor.
+    Returns None on failure so the pipeline is never blocked, and a structured
+    reason without calling the LLM when the system is degraded.
 
+    `analysed` is False in the SLA branch, where sentiment and intent still
+    hold their initial placeholders and are left out of the note.
+    """
+    if controller.at_least(NO_SUPERVISOR_NOTE):
+        return _structured_note(state, sla_breached, analysed)
+
+    reasons = _escalation_reasons(state, sla_breached, analysed)
+    analysis = (
+        f"Detected sentiment: {state.get('sentiment', 'unknown')}\n"
+        f"Detected intent: {state.get('intent', 'unknown')}\n"
+    ) if analysed else ""
     user_context = (
         f"Client ID: {state['client_id']}\n"
         f"Client message: \"{state['messages'][-1]['content']}\"\n"
-        f"Detected sentiment: {state.get('sentiment', 'unknown')}\n"
-        f"Detected intent: {state.get('intent', 'unknown')}\n"
+        f"{analysis}"
         f"Escalation reasons: {', '.join(reasons) if reasons else 'policy rule'}\n"
-        f"SLA breached: {sla_breached}"
+        f"SLA breached: {sla_breached}\n"
+        f"{_history_line(state)}"
     )
 
     try:
-        response = _llm.invoke([
+        response = invoke_llm("triage", _llm, [
             {"role": "system", "content": _SUPERVISOR_NOTE_PROMPT},
             {"role": "user",   "content": user_context},
         ])
         return response.content.strip()
     except Exception as exc:
-        print(f"[TRIAGE] Supervisor note generation failed: {exc}")
+        logger.warning("supervisor_note_failed", client_id=state["client_id"], error=str(exc))
         return None
 
 
 # ---------------------------------------------------------------------------
-# Node function
+# Node functions
 # ---------------------------------------------------------------------------
 
+def run_sla_check(
+    state: AgentState,
+    predraft: Optional[Callable[[AgentState, str], Optional[str]]] = None,
+) -> dict:
+    """
+    SLA node for LangGraph, run in parallel with the Analyst.
+
+    On a breach the outcome is already `escalate_to_human`, so the supervisor
+    note is generated here. Sentiment and intent are not known yet at this
+    point, so the note covers the SLA breach and client history only;
+    `run_triage` appends the Analyst's findings.
+
+    `predraft` (injected by the orchestrator, see `build_graph`) drafts the
+    client response concurrently with the note. It costs an Executor LLM call
+    that is wasted if the supervisor rejects, so it is opt-in.
+    """
+    started      = time.perf_counter()
+    sla_breached = _check_sla(state["timestamp"])
+    if not sla_breached:
+        return {"sla_breached": False}
+
+    if predraft is None:
+        note, draft = _generate_supervisor_note(state, True, False), None
+    else:
+        pending = _branch_pool.submit(contextvars.copy_context().run, _generate_supervisor_note, state, True, False)
+        draft = predraft(state, "escalate_to_human")
+        note = pending.result()
+
+    logger.info(
+        "sla_breach_prepared",
+        client_id=state["client_id"],
+        pre_drafted=draft is not None,
+        duration_ms=round((time.perf_counter() - started) * 1000, 2),
+    )
+    return {"sla_breached": True, "supervisor_note": note, "draft_response": draft}
+
+
 def run_triage(state: AgentState) -> dict:
     """
     Triage Agent node for LangGraph.
 
-    Applies the routing matrix and, when escalating, generates a supervisor note.
-    Returns a partial state update.
+    Joins the Analyst and SLA branches, applies the routing matrix and, when
+    escalating without a note from the SLA branch, generates a supervisor note.
+    A note from the SLA branch was written before the Analyst finished, so the
+    detected sentiment and intent are appended to it. Returns a partial state
+    update.
 
     Routing matrix
     --------------
-    | Condition                              | proposed_action           |
-    |----------------------------------------|---------------------------|
-    | sentiment == "negative" OR sla_breached| escalate_to_human         |
-    | intent == "refund_request"             | process_refund            |
-    | all other cases                        | send_standard_response    |
+    | Condition                                          | proposed_action        |
+    |----------------------------------------------------|------------------------|
+    | sentiment == "negative" OR sla_breached            | escalate_to_human      |
+    | client_risk elevated AND intent != general_inquiry | escalate_to_human      |
+    | intent == "refund_request"                         | process_refund         |
+    | all other cases                                    | send_standard_response |
     """
-    sla_breached    = _check_sla(state["timestamp"])
+    started         = time.perf_counter()
+    sla_breached    = state["sla_breached"]
     sentiment       = state.get("sentiment", "neutral")
     intent          = state.get("intent", "general_inquiry")
-    supervisor_note = None
+    supervisor_note = state.get("supervisor_note")
+    risk_elevated   = _risk_elevated(state)
 
     # ------------------------------------------------------------------ #
     # Routing decision — deterministic rule-based matrix                  #
     # ------------------------------------------------------------------ #
-    if sla_breached or sentiment == "negative":
+    if sla_breached or sentiment == "negative" or (risk_elevated and intent != "general_inquiry"):
         proposed_action = "escalate_to_human"
-        supervisor_note = _generate_supervisor_note(state, sla_breached)
+        if supervisor_note is None:
+            supervisor_note = _generate_supervisor_note(state, sla_breached)
+        elif sla_breached:
+            supervisor_note = f"{supervisor_note} {_analysis_line(state)}"
 
     elif intent == "refund_request":
         proposed_action = "process_refund"
@@ -140,13 +257,17 @@ def run_triage(state: AgentState) -> dict:
     else:
         proposed_action = "send_standard_response"
 
-    print(
-        f"[TRIAGE]  client={state['client_id']} | "
-        f"sla_breached={sla_breached}, proposed_action={proposed_action}"
+    analytics.record_triage(proposed_action == "escalate_to_human", sla_breached)
+    logger.info(
+        "routed",
+        client_id=state["client_id"],
+        sla_breached=sla_breached,
+        client_risk_elevated=risk_elevated,
+        proposed_action=proposed_action,
+        duration_ms=round((time.perf_counter() - started) * 1000, 2),
     )
 
     return {
-        "sla_breached":    sla_breached,
         "proposed_action": proposed_action,
         "supervisor_note": supervisor_note,
     }
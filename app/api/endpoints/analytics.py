@@ -0,0 +1,89 @@
+"""
+Analytics Endpoint — Operational Dashboards
+
+GET /api/v1/analytics          → sentiment mix, intent mix, escalation rate,
+                                  SLA breach rate and pipeline latency per window
+GET /api/v1/analytics/queues   → per-client fair-queue depth and wait times
+GET /api/v1/analytics/hedging  → hedged LLM calls and served vs. unhedged tail latency
+
+Counters are maintained incrementally by the agent nodes and the supervisor
+endpoint (see `app.core.analytics`), so each query costs O(buckets).
+"""
+
+from datetime import datetime, timezone
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Query
+
+from app.core.analytics import WINDOWS, analytics
+from app.core.config import settings
+from app.core.fair_queue import scheduler
+from app.core.llm import hedger
+from app.models.schemas import (
+    AnalyticsResponse,
+    AnalyticsWindow,
+    ClientQueueStats,
+    HedgingAgentStats,
+    HedgingResponse,
+    QueueStatsResponse,
+)
+
+router = APIRouter()
+
+
+@router.get(
+    "",
+    response_model=AnalyticsResponse,
+    summary="Rolling operational analytics",
+    description=(
+        "Returns live metrics for the 1m, 5m, 1h and 24h windows, "
+        "or only the requested window."
+    ),
+)
+async def get_analytics(
+    window: Optional[Literal["1m", "5m", "1h", "24h"]] = Query(
+        None, description="Restrict the response to a single window."
+    ),
+) -> AnalyticsResponse:
+    names = [window] if window else list(WINDOWS)
+    return AnalyticsResponse(
+        generated_at=datetime.now(timezone.utc),
+        windows=[AnalyticsWindow(**analytics.snapshot(name)) for name in names],
+    )
+
+
+@router.get(
+    "/queues",
+    response_model=QueueStatsResponse,
+    summary="Per-client queue depth and wait times",
+    description=(
+        "Live state of the weighted fair queue that admits runs to the agent pipeline "
+        "(clients with runs queued or in flight)."
+    ),
+)
+async def get_queue_stats() -> QueueStatsResponse:
+    return QueueStatsResponse(
+        max_concurrency=scheduler.max_concurrency,
+        per_client_limit=scheduler.per_client_limit,
+        in_flight=scheduler.in_flight,
+        queued=scheduler.queued,
+        clients=[ClientQueueStats(**entry) for entry in scheduler.stats()],
+    )
+
+
+@router.get(
+    "/hedging",
+    response_model=HedgingResponse,
+    summary="Hedged LLM request statistics",
+    description=(
+        "Per agent: hedge-eligible calls, duplicates sent, duplicates that won, and the "
+        "recent p95/p99 latency seen by callers next to that of first attempts alone."
+    ),
+)
+async def get_hedging_stats() -> HedgingResponse:
+    return HedgingResponse(
+        enabled=hedger is not None,
+        percentile=settings.LLM_HEDGE_PERCENTILE,
+        budget=settings.LLM_HEDGE_BUDGET,
+        agents=[HedgingAgentStats(**row) for row in hedger.snapshot()] if hedger is not None else [],
+    )
@@ -0,0 +1,80 @@
+"""
+Debug Endpoint — On-demand Profiling
+
+GET  /debug/profile            → sample every thread's stack for N seconds
+                                 (collapsed stacks, flamegraph-ready)
+POST /debug/profile/requests   → profile the next K POST /webhook/messages requests
+GET  /debug/profile/requests   → phase breakdown of the profiled requests
+
+Mounted only when DEBUG_PROFILING_TOKEN is set; every call must send it in
+the X-Debug-Token header. See `app.core.profiling`.
+"""
+
+import hmac
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.core.profiling import request_profiles, sample_stacks
+from app.models.schemas import RequestProfile, RequestProfiles
+
+
+def _require_token(x_debug_token: str = Header("", description="Value of DEBUG_PROFILING_TOKEN.")) -> None:
+    if not hmac.compare_digest(x_debug_token.encode(), (settings.DEBUG_PROFILING_TOKEN or "").encode()):
+        raise HTTPException(status_code=401, detail="Missing or invalid X-Debug-Token.")
+
+
+router = APIRouter(dependencies=[Depends(_require_token)])
+
+
+@router.get(
+    "/profile",
+    response_class=PlainTextResponse,
+    summary="Sample the live process",
+    description=(
+        "Samples the stack of every thread for `seconds` and returns one "
+        "`thread;frame;…;frame count` line per distinct stack, hottest first "
+        "(input for flamegraph.pl, speedscope or inferno)."
+    ),
+)
+async def profile_process(
+    seconds: float = Query(10.0, gt=0, le=120, description="Sampling duration."),
+    interval_ms: float = Query(5.0, ge=1, le=1000, description="Time between samples."),
+) -> PlainTextResponse:
+    stacks = await run_in_threadpool(sample_stacks, seconds, interval_ms / 1000)
+    return PlainTextResponse(stacks)
+
+
+@router.post(
+    "/profile/requests",
+    response_model=RequestProfiles,
+    summary="Profile the next K webhook requests",
+    description="Arms per-request profiling for the next `count` POST /api/v1/webhook/messages requests.",
+)
+async def arm_request_profiling(
+    count: int = Query(10, ge=0, le=1000, description="Requests to profile (0 disarms)."),
+) -> RequestProfiles:
+    request_profiles.arm(count)
+    return _profiles()
+
+
+@router.get(
+    "/profile/requests",
+    response_model=RequestProfiles,
+    summary="Per-request phase breakdown",
+    description=(
+        "Wall time of each profiled request split into request validation, queue wait, "
+        "event-loop wait, graph orchestration, LLM I/O, bookkeeping and response serialization."
+    ),
+)
+async def get_request_profiles() -> RequestProfiles:
+    return _profiles()
+
+
+def _profiles() -> RequestProfiles:
+    return RequestProfiles(
+        armed=request_profiles.armed,
+        profiles=[RequestProfile(**p) for p in request_profiles.profiles],
+    )
@@ -0,0 +1,61 @@
+"""
+Outbox Endpoint — CRM Delivery Status
+
+GET  /api/v1/outbox                    → pending / dead-lettered / delivered counts
+GET  /api/v1/outbox/dead               → deliveries that exhausted their retries
+POST /api/v1/outbox/dead/{id}/retry    → put a dead-lettered delivery back in the queue
+
+Executed responses are delivered asynchronously to CRM_CALLBACK_URL by the
+workers in `app.core.outbox`; these endpoints return 404 while delivery is
+disabled.
+"""
+
+from typing import List
+
+from fastapi import APIRouter, HTTPException, Query
+
+from app.core.outbox import Outbox, outbox
+from app.models.schemas import DeadLetter, OutboxStats
+
+router = APIRouter()
+
+
+def _require_outbox() -> Outbox:
+    if outbox is None:
+        raise HTTPException(status_code=404, detail="CRM delivery is disabled (CRM_CALLBACK_URL is not set).")
+    return outbox
+
+
+@router.get(
+    "",
+    response_model=OutboxStats,
+    summary="Delivery queue status",
+    description="Counts of deliveries waiting, dead-lettered and delivered since startup.",
+)
+async def get_outbox_stats() -> OutboxStats:
+    return OutboxStats(**_require_outbox().stats())
+
+
+@router.get(
+    "/dead",
+    response_model=List[DeadLetter],
+    summary="Dead-lettered deliveries",
+    description="Deliveries that failed OUTBOX_MAX_ATTEMPTS times, oldest first.",
+)
+async def get_dead_letters(
+    limit: int = Query(100, ge=1, le=1000, description="Maximum number of entries."),
+) -> List[DeadLetter]:
+    return [DeadLetter(**entry) for entry in _require_outbox().dead_letters(limit)]
+
+
+@router.post(
+    "/dead/{delivery_id}/retry",
+    response_model=OutboxStats,
+    summary="Retry a dead-lettered delivery",
+    description="Requeues the delivery with a fresh attempt budget.",
+)
+async def retry_dead_letter(delivery_id: int) -> OutboxStats:
+    box = _require_outbox()
+    if not box.retry_dead(delivery_id):
+        raise HTTPException(status_code=404, detail=f"Dead-lettered delivery {delivery_id} not found.")
+    return OutboxStats(**box.stats())
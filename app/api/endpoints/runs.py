@@ -0,0 +1,64 @@
+"""
+Runs Endpoint — Per-run Trace Timeline
+
+GET /api/v1/runs/{run_id}/trace   → span timeline of a run (graph, nodes, LLM calls)
+
+Traces live in a bounded in-memory ring (see `app.core.tracing`), so only
+recent runs are available. `?format=otlp` returns the same trace as an
+OTLP/JSON document that can be loaded into any OpenTelemetry-compatible viewer.
+"""
+
+from datetime import datetime, timezone
+from typing import Literal, Union
+
+from fastapi import APIRouter, HTTPException, Query
+
+from app.core.tracing import to_otlp, tracer
+from app.models.schemas import RunTrace, TraceSpan
+
+router = APIRouter()
+
+
+@router.get(
+    "/{run_id}/trace",
+    response_model=Union[RunTrace, dict],
+    summary="Trace timeline of a run",
+    description=(
+        "Returns every recorded span of the run — graph, each node and each LLM "
+        "call with model and token counts — for latency attribution."
+    ),
+)
+async def get_run_trace(
+    run_id: str,
+    format: Literal["timeline", "otlp"] = Query("timeline", description="Response format."),
+) -> Union[RunTrace, dict]:
+    trace = tracer.get(run_id)
+    if trace is None:
+        raise HTTPException(
+            status_code=404,
+            detail=f"No trace for run_id '{run_id}'. It may be unknown or already evicted.",
+        )
+
+    if format == "otlp":
+        return to_otlp(trace)
+
+    spans = list(trace.spans)
+    origin = min(s.start_ns for s in spans)
+    finish = max(s.end_ns or s.start_ns for s in spans)
+    return RunTrace(
+        run_id=trace.run_id,
+        client_id=trace.client_id,
+        duration_ms=(finish - origin) / 1e6,
+        spans=[
+            TraceSpan(
+                span_id=s.span_id,
+                parent_id=s.parent_id,
+                name=s.name,
+                start=datetime.fromtimestamp(s.start_ns / 1e9, tz=timezone.utc),
+                offset_ms=(s.start_ns - origin) / 1e6,
+                duration_ms=s.duration_ms,
+                attributes=s.attributes,
+            )
+            for s in spans
+        ],
+    )
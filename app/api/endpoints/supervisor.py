@@ -1,22 +1,66 @@
 """
 Supervisor Endpoint — Human-in-the-Loop
 
-GET  /api/v1/supervisor/pending   → list all messages waiting for a decision
-POST /api/v1/supervisor/decide    → approve or reject a pending action
+GET  /api/v1/supervisor/pending        → list all messages waiting for a decision
+POST /api/v1/supervisor/decide         → approve or reject a pending action
+POST /api/v1/supervisor/decide/stream  → same, with the Executor draft streamed as NDJSON
+GET  /api/v1/supervisor/archive/{run_id}          → look up an expired/evicted pending item
+POST /api/v1/supervisor/archive/{run_id}/restore  → move it back into the pending queue
+GET  /api/v1/supervisor/history                   → decided runs, newest first (paginated)
 
 When approved, the Executor agent is called directly with the stored state
 so that the automated response is finally sent to the client.
+
+Pending items that outlive PENDING_TTL_SECONDS, or overflow PENDING_MAX_ITEMS,
+are moved to the on-disk archive and must be restored before a decision.
+
+Every decision is appended to the decision history (`app.core.history`) with
+the final state, the reason and the time from escalation to decision, and
+approved responses are queued for asynchronous delivery to the CRM.
 """
 
-from typing import List
+from typing import AsyncIterator, List, Optional, Tuple
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
 
-from app.agents.executor import run_executor
-from app.core.store import pending_approvals
-from app.models.schemas import PendingApprovalItem, ProcessingResponse, SupervisorDecision
+from app.agents.executor import StreamReset, astream_executor, run_executor
+from app.agents.state import AgentState
+from app.api.streaming import NDJSON_MEDIA_TYPE, detached, ndjson_event
+from app.core.analytics import analytics
+from app.core.fair_queue import scheduler
+from app.core.history import decision_record, history
+from app.core.log import bind_run, get_logger
+from app.core.outbox import deliver
+from app.core.overload import controller
+from app.core.risk import risk_profiles
+from app.core.store import PendingApproval, pending_approvals
+from app.core.tracing import span, tracer
+from app.models.schemas import (
+    ArchivedApprovalItem,
+    DecisionHistoryPage,
+    DecisionRecord,
+    PendingApprovalItem,
+    ProcessingResponse,
+    SupervisorDecision,
+)
 
 router = APIRouter()
+logger = get_logger("supervisor")
+
+
+def _pending_item(run_id: str, item: PendingApproval) -> PendingApprovalItem:
+    return PendingApprovalItem(
+        run_id=run_id,
+        client_id=item.client_id,
+        message=item.message,
+        sentiment=item.sentiment,
+        sla_breached=item.sla_breached,
+        proposed_action=item.proposed_action,
+        supervisor_note=item.supervisor_note,
+        timestamp=item.timestamp_iso,
+    )
 
 
 # ---------------------------------------------------------------------------
@@ -30,76 +74,102 @@ router = APIRouter()
     description="Returns all messages that were escalated and are waiting for a supervisor decision.",
 )
 async def get_pending_approvals() -> List[PendingApprovalItem]:
-    result: List[PendingApprovalItem] = []
-    for run_id, state in pending_approvals.items():
-        result.append(
-            PendingApprovalItem(
-                run_id=run_id,
-                client_id=state["client_id"],
-                message=state["messages"][-1]["content"],
-                sentiment=state["sentiment"],
-                sla_breached=state["sla_breached"],
-                proposed_action=state["proposed_action"],
-                supervisor_note=state.get("supervisor_note"),
-                timestamp=state["timestamp"],
-            )
-        )
-    return result
+    return [_pending_item(run_id, item) for run_id, item in pending_approvals.items()]
 
 
 # ---------------------------------------------------------------------------
-# POST /decide
+# GET /archive/{run_id} and POST /archive/{run_id}/restore
 # ---------------------------------------------------------------------------
 
+def _archive_not_found(run_id: str) -> HTTPException:
+    return HTTPException(status_code=404, detail=f"run_id '{run_id}' not found in the pending archive.")
+
+
+@router.get(
+    "/archive/{run_id}",
+    response_model=ArchivedApprovalItem,
+    summary="Look up an archived pending item",
+    description="Returns a pending item that expired or was evicted from the pending queue.",
+)
+async def get_archived_approval(run_id: str) -> ArchivedApprovalItem:
+    found = pending_approvals.archive.get(run_id) if pending_approvals.archive is not None else None
+    if found is None:
+        raise _archive_not_found(run_id)
+    item, meta = found
+    return ArchivedApprovalItem(
+        **_pending_item(run_id, item).model_dump(),
+        archive_reason=meta["reason"],
+        archived_at=meta["archived_at"],
+    )
+
+
 @router.post(
-    "/decide",
-    response_model=ProcessingResponse,
-    summary="Approve or reject a pending action",
-    description=(
-        "Submit a supervisor decision for a message that was escalated. "
-        "If approved, the Executor agent will be called immediately."
-    ),
+    "/archive/{run_id}/restore",
+    response_model=PendingApprovalItem,
+    summary="Restore an archived pending item",
+    description="Moves an archived item back into the pending queue (with a fresh TTL) so it can be decided.",
 )
-async def decide_action(decision: SupervisorDecision) -> ProcessingResponse:
-    state = pending_approvals.get(decision.run_id)
-    if state is None:
+async def restore_archived_approval(run_id: str) -> PendingApprovalItem:
+    item = pending_approvals.restore(run_id)
+    if item is None:
+        raise _archive_not_found(run_id)
+    return _pending_item(run_id, item)
+
+
+# ---------------------------------------------------------------------------
+# Helpers shared by /decide and /decide/stream
+# ---------------------------------------------------------------------------
+
+def _take_pending(decision: SupervisorDecision) -> Tuple[PendingApproval, AgentState]:
+    """
+    Removes the run from the pending queue (regardless of the decision) and
+    returns its record and full state (404 if absent).
+    """
+    item = pending_approvals.pop(decision.run_id)
+    if item is None:
         raise HTTPException(
             status_code=404,
             detail=(
                 f"run_id '{decision.run_id}' not found in pending approvals. "
-                "It may have already been decided or never existed."
+                "It may have already been decided, been archived (see GET /archive/{run_id}), "
+                "or never existed."
             ),
         )
 
-    # Remove from the pending queue regardless of the decision
-    del pending_approvals[decision.run_id]
+    bind_run(decision.run_id, item.client_id)
+    state = item.to_state()
+    state["human_approved"] = decision.approved
+    analytics.record_decision(decision.approved)
+    risk_profiles.record_decision(item.client_id, decision.approved)
+    return item, state
 
-    # ------------------------------------------------------------------ #
-    # Approved → run executor and return result                            #
-    # ------------------------------------------------------------------ #
-    if decision.approved:
-        state["human_approved"] = True
-        executor_update = run_executor(state)
-        state.update(executor_update)
 
-        return ProcessingResponse(
-            run_id=decision.run_id,
-            status="approved_and_executed",
-            sentiment=state["sentiment"],
-            sla_breached=state["sla_breached"],
-            proposed_action=state["proposed_action"],
-            supervisor_note=state.get("supervisor_note"),
-            execution_result=state.get("execution_result"),
-            message=(
-                f"Action approved and executed for client '{state['client_id']}'. "
-                + (f"Supervisor note: {decision.reason}" if decision.reason else "")
-            ),
-        )
+async def _record_history(decision: SupervisorDecision, state: AgentState, escalated_at: float) -> None:
+    # The append writes and flushes a segment file: keep it off the event loop
+    if history is not None:
+        await run_in_threadpool(history.append, decision_record(
+            decision.run_id, state, decision.approved, decision.reason, escalated_at
+        ))
 
-    # ------------------------------------------------------------------ #
-    # Rejected → log and return without executing                          #
-    # ------------------------------------------------------------------ #
-    state["human_approved"] = False
+
+def _approved_response(decision: SupervisorDecision, state: AgentState) -> ProcessingResponse:
+    return ProcessingResponse(
+        run_id=decision.run_id,
+        status="approved_and_executed",
+        sentiment=state["sentiment"],
+        sla_breached=state["sla_breached"],
+        proposed_action=state["proposed_action"],
+        supervisor_note=state.get("supervisor_note"),
+        execution_result=state.get("execution_result"),
+        message=(
+            f"Action approved and executed for client '{state['client_id']}'. "
+            + (f"Supervisor note: {decision.reason}" if decision.reason else "")
+        ),
+        degradation_level=controller.level(),
+    )
+
+
+def _rejected_response(decision: SupervisorDecision, state: AgentState) -> ProcessingResponse:
     return ProcessingResponse(
         run_id=decision.run_id,
         status="rejected",
@@ -112,4 +182,138 @@ async def decide_action(decision: SupervisorDecision) -> ProcessingResponse:
             f"Action rejected by supervisor for client '{state['client_id']}'. "
             + (f"Reason: {decision.reason}" if decision.reason else "No reason provided.")
         ),
+        degradation_level=controller.level(),
+    )
+
+
+# ---------------------------------------------------------------------------
+# POST /decide
+# ---------------------------------------------------------------------------
+
+@router.post(
+    "/decide",
+    response_model=ProcessingResponse,
+    summary="Approve or reject a pending action",
+    description=(
+        "Submit a supervisor decision for a message that was escalated. "
+        "If approved, the Executor agent will be called immediately."
+    ),
+)
+async def decide_action(decision: SupervisorDecision) -> ProcessingResponse:
+    item, state = _take_pending(decision)
+    escalated_at = item.escalated_at
+
+    # ------------------------------------------------------------------ #
+    # Approved → run executor and return result                            #
+    # ------------------------------------------------------------------ #
+    if decision.approved:
+        with tracer.trace(decision.run_id, state["client_id"], name="decide"):
+            async with scheduler.slot(state["client_id"]):
+                with span("executor"):
+                    executor_update = await run_in_threadpool(run_executor, state)
+        state.update(executor_update)
+        await run_in_threadpool(deliver, decision.run_id, "approved_and_executed", state)
+        await _record_history(decision, state, escalated_at)
+        return _approved_response(decision, state)
+
+    # ------------------------------------------------------------------ #
+    # Rejected → log and return without executing                          #
+    # ------------------------------------------------------------------ #
+    await _record_history(decision, state, escalated_at)
+    return _rejected_response(decision, state)
+
+
+# ---------------------------------------------------------------------------
+# POST /decide/stream
+# ---------------------------------------------------------------------------
+
+@router.post(
+    "/decide/stream",
+    summary="Approve or reject a pending action (streamed)",
+    description=(
+        "Same as POST /decide, streamed as NDJSON: a 'decision' event immediately, "
+        "'token' events while the Executor drafts the approved response, and the "
+        "final ProcessingResponse as the 'result' event. The decision is applied "
+        "even if the client disconnects before the end of the stream."
+    ),
+    response_class=StreamingResponse,
+)
+async def decide_action_stream(decision: SupervisorDecision) -> StreamingResponse:
+    item, state = _take_pending(decision)     # 404 is raised before the stream starts
+    escalated_at = item.escalated_at
+
+    async def events() -> AsyncIterator[str]:
+        yield ndjson_event("decision", {
+            "run_id": decision.run_id,
+            "approved": decision.approved,
+            "proposed_action": state["proposed_action"],
+        })
+
+        if not decision.approved:
+            await _record_history(decision, state, escalated_at)
+            yield ndjson_event("result", _rejected_response(decision, state))
+            return
+
+        chunks: list[str] = []
+        try:
+            with tracer.trace(decision.run_id, state["client_id"], name="decide"):
+                async with scheduler.slot(state["client_id"]):
+                    with span("executor", streamed=True):
+                        async for chunk in astream_executor(state):
+                            if isinstance(chunk, StreamReset):
+                                chunks = [chunk]
+                                yield ndjson_event("reset", chunk)
+                                continue
+                            chunks.append(chunk)
+                            yield ndjson_event("token", chunk)
+        except Exception:
+            # Nothing was executed: put the run back so the decision can be retried
+            pending_approvals[decision.run_id] = item
+            logger.warning("decision_requeued", client_id=state["client_id"])
+            raise
+
+        state["execution_result"] = "".join(chunks).strip()
+        await run_in_threadpool(deliver, decision.run_id, "approved_and_executed", state)
+        await _record_history(decision, state, escalated_at)
+        yield ndjson_event("result", _approved_response(decision, state))
+
+    return StreamingResponse(detached(events()), media_type=NDJSON_MEDIA_TYPE)
+
+
+# ---------------------------------------------------------------------------
+# GET /history
+# ---------------------------------------------------------------------------
+
+@router.get(
+    "/history",
+    response_model=DecisionHistoryPage,
+    summary="Decision history",
+    description=(
+        "Decided runs, newest first: final state, decision, reason and time from "
+        "escalation to decision. Filter by client_id or look up a single run_id; "
+        "page with the returned next_cursor."
+    ),
+)
+async def get_decision_history(
+    client_id: Optional[str] = Query(None, description="Only decisions for this client."),
+    run_id: Optional[str] = Query(None, description="Only the decision for this run."),
+    limit: int = Query(50, ge=1, le=500, description="Page size."),
+    cursor: Optional[int] = Query(None, ge=0, description="next_cursor from the previous page."),
+) -> DecisionHistoryPage:
+    if history is None:
+        raise HTTPException(status_code=404, detail="Decision history is disabled (DECISION_HISTORY_DIR).")
+
+    if run_id is not None:
+        record = await run_in_threadpool(history.get, run_id)
+        if record is None:
+            return DecisionHistoryPage(items=[], total=0, next_cursor=None)
+        return DecisionHistoryPage(items=[DecisionRecord(**record)], total=1, next_cursor=None)
+
+    records, next_cursor, total = await run_in_threadpool(
+        history.page, client_id, before=cursor, limit=limit
+    )
+    return DecisionHistoryPage(
+        items=[DecisionRecord(**record) for record in records],
+        total=total,
+        next_cursor=next_cursor,
     )
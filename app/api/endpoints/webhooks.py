@@ -1,81 +1,118 @@
 """
 Webhook Endpoint — Message Ingestion
 
-POST /api/v1/webhook/messages
+POST /api/v1/webhook/messages          → full pipeline, single JSON response
+POST /api/v1/webhook/messages/stream   → same pipeline, streamed as NDJSON
 
 Receives a simulated CRM message, runs it through the LangGraph pipeline
 (Analyst → Triage → Executor or pause), and returns the outcome.
 
-If the Triage agent decides to escalate (negative sentiment or SLA breach),
-the state is stored in the in-memory `pending_approvals` store and the caller
-receives a `pending_approval` status with the `run_id` needed to decide later.
+If the Triage agent decides to escalate (negative sentiment, SLA breach, or a
+refund/support request from a client with an elevated risk profile), a compact
+record of the state is stored in the in-memory `pending_approvals` store and
+the caller receives a `pending_approval` status with the `run_id` needed to
+decide later. Every finished run whose message was classified by the LLM or
+a confident local classifier updates the client's risk profile.
+
+Under extreme load (degradation level 4) new messages are rejected with
+429 and a Retry-After header before any work is done.
+
+Automatically executed responses are queued for asynchronous delivery to the
+CRM (see `app.core.outbox`); delivery never adds to the request latency.
+
+The streaming variant sends the routing decision as soon as Triage finishes,
+then the Executor draft token by token, and the final `ProcessingResponse`
+as the last event. If the draft fails mid-stream, a `reset` event replaces the
+partial text with the static fallback, which is also what gets delivered.
 """
 
+import time
 import uuid
+from typing import AsyncIterator
 
-from fastapi import APIRouter
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
 
-from app.agents.orchestrator import crm_graph
-from app.agents.state import AgentState
-from app.core.store import pending_approvals
+from app.agents.executor import StreamReset, astream_executor
+from app.agents.runner import run_graph
+from app.agents.state import AgentState, initial_state
+from app.api.streaming import NDJSON_MEDIA_TYPE, detached, ndjson_event
+from app.core import cassette
+from app.core.analytics import analytics
+from app.core.config import settings
+from app.core.fair_queue import scheduler
+from app.core.log import bind_run
+from app.core.outbox import deliver
+from app.core.overload import REJECT, controller
+from app.core.risk import risk_profiles
+from app.core.store import PendingApproval, pending_approvals
+from app.core.tracing import span, tracer
 from app.models.schemas import ProcessingResponse, WebhookPayload
 
 router = APIRouter()
 
 
-@router.post(
-    "/messages",
-    response_model=ProcessingResponse,
-    summary="Receive an incoming CRM message",
-    description=(
-        "Triggers the full multi-agent pipeline. "
-        "Returns immediately with either 'processed' or 'pending_approval'."
-    ),
-)
-async def receive_message(payload: WebhookPayload) -> ProcessingResponse:
-    run_id = str(uuid.uuid4())
+# ---------------------------------------------------------------------------
+# Helpers
+# ---------------------------------------------------------------------------
 
-    # Build the initial state that enters the graph
-    initial_state: AgentState = {
-        "client_id": payload.client_id,
-        "messages": [{"role": "user", "content": payload.message}],
-        "timestamp": payload.timestamp.isoformat(),
-        # Defaults — will be overwritten by agent nodes
-        "sentiment": "neutral",
-        "intent": "general_inquiry",
-        "sla_breached": False,
-        "proposed_action": "",
-        "supervisor_note": None,
-        "human_approved": None,
-        "execution_result": None,
-    }
-
-    # Run the graph (synchronous invoke — safe inside async FastAPI via threadpool)
-    final_state: AgentState = crm_graph.invoke(initial_state)
-
-    # ------------------------------------------------------------------ #
-    # Branch: graph paused — supervisor must approve before proceeding     #
-    # ------------------------------------------------------------------ #
-    if final_state.get("proposed_action") == "escalate_to_human":
-        pending_approvals[run_id] = final_state
-        return ProcessingResponse(
-            run_id=run_id,
-            status="pending_approval",
-            sentiment=final_state["sentiment"],
-            sla_breached=final_state["sla_breached"],
-            proposed_action=final_state["proposed_action"],
-            supervisor_note=final_state.get("supervisor_note"),
-            execution_result=None,
-            message=(
-                f"Message from client '{payload.client_id}' requires human approval "
-                f"before any action is taken. Use run_id to decide via "
-                f"POST /api/v1/supervisor/decide."
-            ),
+def _start_run(payload: WebhookPayload) -> tuple[str, AgentState]:
+    """
+    Admits the message (429 when overloaded), records the payload if recording,
+    allocates and binds a run_id and builds the initial state (with the
+    client's risk profile snapshot).
+    """
+    if controller.at_least(REJECT):
+        raise HTTPException(
+            status_code=429,
+            detail="The system is overloaded. Retry the message later.",
+            headers={"Retry-After": str(settings.OVERLOAD_RETRY_AFTER_SECONDS)},
         )
 
-    # ------------------------------------------------------------------ #
-    # Branch: graph completed automatically                                #
-    # ------------------------------------------------------------------ #
+    if cassette.recorder is not None:
+        cassette.recorder.record_webhook(payload.model_dump(mode="json"))
+
+    run_id = str(uuid.uuid4())
+    bind_run(run_id, payload.client_id)
+    state = initial_state(
+        payload.client_id, payload.message, payload.timestamp.isoformat(),
+        risk_profiles.snapshot(payload.client_id),
+    )
+    return run_id, state
+
+
+# Analyst sources whose sentiment / intent are worth counting in a risk profile
+_MEASURED_SOURCES = ("llm", "local")
+
+
+def _record_run(final_state: AgentState, escalated: bool) -> None:
+    """Counts a finished run in the client's risk profile, unless its classification is a placeholder."""
+    if final_state.get("analysis_source") in _MEASURED_SOURCES:
+        risk_profiles.record_run(final_state["client_id"], final_state["sentiment"], final_state["intent"], escalated)
+
+
+def _pending_response(run_id: str, final_state: AgentState) -> ProcessingResponse:
+    """Stores an escalated run for the supervisor and builds its response."""
+    pending_approvals[run_id] = PendingApproval.from_state(final_state)
+    return ProcessingResponse(
+        run_id=run_id,
+        status="pending_approval",
+        sentiment=final_state["sentiment"],
+        sla_breached=final_state["sla_breached"],
+        proposed_action=final_state["proposed_action"],
+        supervisor_note=final_state.get("supervisor_note"),
+        execution_result=None,
+        message=(
+            f"Message from client '{final_state['client_id']}' requires human approval "
+            f"before any action is taken. Use run_id to decide via "
+            f"POST /api/v1/supervisor/decide."
+        ),
+        degradation_level=controller.level(),
+    )
+
+
+def _processed_response(run_id: str, final_state: AgentState) -> ProcessingResponse:
     return ProcessingResponse(
         run_id=run_id,
         status="processed",
@@ -85,7 +122,112 @@ async def receive_message(payload: WebhookPayload) -> ProcessingResponse:
         supervisor_note=None,
         execution_result=final_state.get("execution_result"),
         message=(
-            f"Message from client '{payload.client_id}' processed automatically. "
+            f"Message from client '{final_state['client_id']}' processed automatically. "
             f"Action executed: {final_state['proposed_action']}."
         ),
+        degradation_level=controller.level(),
     )
+
+
+# ---------------------------------------------------------------------------
+# POST /messages
+# ---------------------------------------------------------------------------
+
+@router.post(
+    "/messages",
+    response_model=ProcessingResponse,
+    summary="Receive an incoming CRM message",
+    description=(
+        "Triggers the full multi-agent pipeline. "
+        "Returns immediately with either 'processed' or 'pending_approval'."
+    ),
+)
+async def receive_message(payload: WebhookPayload) -> ProcessingResponse:
+    run_id, state = _start_run(payload)
+
+    # Run the graph (threadpool or worker process) once this client's fair share of capacity is free
+    started = time.perf_counter()
+    with tracer.trace(run_id, payload.client_id):
+        async with scheduler.slot(payload.client_id):
+            final_state: AgentState = await run_graph(run_id, state)
+        analytics.record_latency(time.perf_counter() - started)
+
+        # ------------------------------------------------------------------ #
+        # Branch: graph paused — supervisor must approve before proceeding     #
+        # ------------------------------------------------------------------ #
+        if final_state.get("proposed_action") == "escalate_to_human":
+            with span("bookkeeping"):
+                _record_run(final_state, escalated=True)
+                return _pending_response(run_id, final_state)
+
+        # ------------------------------------------------------------------ #
+        # Branch: graph completed automatically                                #
+        # ------------------------------------------------------------------ #
+        with span("bookkeeping"):
+            _record_run(final_state, escalated=False)
+            await run_in_threadpool(deliver, run_id, "processed", final_state)
+            return _processed_response(run_id, final_state)
+
+
+# ---------------------------------------------------------------------------
+# POST /messages/stream
+# ---------------------------------------------------------------------------
+
+@router.post(
+    "/messages/stream",
+    summary="Receive an incoming CRM message (streamed)",
+    description=(
+        "Same pipeline as POST /messages, streamed as NDJSON: a 'decision' event "
+        "as soon as Triage finishes, 'token' events while the Executor drafts the "
+        "response, and the final ProcessingResponse as the 'result' event."
+    ),
+    response_class=StreamingResponse,
+)
+async def receive_message_stream(payload: WebhookPayload) -> StreamingResponse:
+    run_id, state = _start_run(payload)
+
+    async def events() -> AsyncIterator[str]:
+        started = time.perf_counter()
+        with tracer.trace(run_id, payload.client_id):
+            # One fair-queue slot for triage and drafting; events go to the
+            # detached buffer, so a slow reader never holds the slot
+            async with scheduler.slot(payload.client_id):
+                triaged: AgentState = await run_graph(run_id, state, auto_execute=False)
+
+                yield ndjson_event("decision", {
+                    "run_id": run_id,
+                    "sentiment": triaged["sentiment"],
+                    "intent": triaged["intent"],
+                    "sla_breached": triaged["sla_breached"],
+                    "proposed_action": triaged["proposed_action"],
+                    "supervisor_note": triaged.get("supervisor_note"),
+                })
+
+                escalated = triaged.get("proposed_action") == "escalate_to_human"
+                chunks: list[str] = []
+                if not escalated:
+                    with span("executor", streamed=True):
+                        async for chunk in astream_executor(triaged):
+                            if isinstance(chunk, StreamReset):
+                                chunks = [chunk]
+                                yield ndjson_event("reset", chunk)
+                                continue
+                            chunks.append(chunk)
+                            yield ndjson_event("token", chunk)
+
+            analytics.record_latency(time.perf_counter() - started)
+            if escalated:
+                with span("bookkeeping"):
+                    _record_run(triaged, escalated=True)
+                    response = _pending_response(run_id, triaged)
+                yield ndjson_event("result", response)
+                return
+
+            final_state: AgentState = {**triaged, "execution_result": "".join(chunks).strip()}
+            with span("bookkeeping"):
+                _record_run(final_state, escalated=False)
+                await run_in_threadpool(deliver, run_id, "processed", final_state)
+                response = _processed_response(run_id, final_state)
+            yield ndjson_event("result", response)
+
+    return StreamingResponse(detached(events()), media_type=NDJSON_MEDIA_TYPE)
@@ -0,0 +1,70 @@
+"""
+Helpers for the streaming (NDJSON) endpoint variants.
+
+Each event is one JSON object per line:
+
+    {"event": "decision", "data": {...routing decision...}}
+    {"event": "token",    "data": "partial executor text"}
+    {"event": "reset",    "data": "replacement executor text"}
+    {"event": "result",   "data": {...ProcessingResponse...}}
+    {"event": "error",    "data": {"detail": "..."}}
+
+`reset` is sent when the Executor draft failed mid-stream: the tokens received
+so far must be discarded and replaced by its text (the static fallback
+response). `result` is the last event of a successful stream; a stream that
+fails after the 200 status was sent ends with `error` instead.
+
+Streams are produced by `detached()`: the run behind a stream always finishes
+(history, CRM delivery, pending store) even if the client disconnects, and a
+slow reader never holds the capacity the run was given.
+"""
+
+import asyncio
+import json
+from typing import Any, AsyncIterator, Set
+
+from pydantic import BaseModel
+
+from app.core.log import get_logger
+
+logger = get_logger("streaming")
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+# Producers still running after their client went away
+_background: Set[asyncio.Task] = set()
+
+
+def ndjson_event(event: str, data: Any) -> str:
+    if isinstance(data, BaseModel):
+        data = data.model_dump(mode="json")
+    return json.dumps({"event": event, "data": data}, ensure_ascii=False) + "\n"
+
+
+def detached(events: AsyncIterator[str]) -> AsyncIterator[str]:
+    """
+    Runs the `events` generator to completion in its own task and relays its
+    lines. The task buffers whatever the client has not read yet and is not
+    cancelled when the client disconnects. An exception in `events` becomes a
+    final `error` event.
+    """
+    queue: "asyncio.Queue[str | None]" = asyncio.Queue()
+
+    async def produce() -> None:
+        try:
+            async for line in events:
+                queue.put_nowait(line)
+        except Exception as exc:
+            logger.error("stream_failed", error=f"{type(exc).__name__}: {exc}")
+            queue.put_nowait(ndjson_event("error", {"detail": "Internal error while processing the request."}))
+        finally:
+            queue.put_nowait(None)
+
+    async def relay() -> AsyncIterator[str]:
+        task = asyncio.create_task(produce())
+        _background.add(task)
+        task.add_done_callback(_background.discard)
+        while (line := await queue.get()) is not None:
+            yield line
+
+    return relay()
@@ -0,0 +1,248 @@
+"""
+Bulk backlog processor for historical message dumps.
+
+Streams a JSONL or CSV file (fields: client_id, message, timestamp) through
+`crm_graph` on a thread pool and appends one JSON result per input record to
+the output file, in input order. Memory stays constant: records are read
+lazily and at most `--concurrency × 2` runs are in flight or waiting to be
+written.
+
+Progress is checkpointed next to the output file (`<output>.checkpoint`) as the
+input byte offset, record count and output byte offset of the last written
+result. Re-running the same command after a crash truncates the output to the
+checkpoint and resumes from that input offset, so no record is lost or
+written twice.
+
+Usage:
+    python -m app.batch dump.jsonl results.jsonl
+    python -m app.batch dump.csv results.jsonl --concurrency 32
+    python -m app.batch dump.jsonl results.jsonl --no-execute   # classify + triage only
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+import uuid
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import BinaryIO, Deque, Iterator, Optional, Tuple
+
+_FIELDS = ("client_id", "message", "timestamp")
+
+
+# ---------------------------------------------------------------------------
+# Input — (index, end byte offset, raw record), starting at a byte offset
+#
+# Records are only split here; decoding happens in `_process`, so a malformed
+# record becomes an error result instead of stopping (and re-stopping on every
+# resume) the whole batch.
+# ---------------------------------------------------------------------------
+
+def _jsonl_records(fh: BinaryIO) -> Iterator[Tuple[int, bytes]]:
+    while line := fh.readline():
+        if line.strip():
+            yield fh.tell(), line
+
+
+def _csv_records(fh: BinaryIO) -> Iterator[Tuple[int, bytes]]:
+    while line := fh.readline():
+        # A quoted field may span several physical lines
+        while line.count(b'"') % 2 and (more := fh.readline()):
+            line += more
+        if line.strip():
+            yield fh.tell(), line
+
+
+def _csv_header(path: str) -> list:
+    with open(path, "rb") as fh:
+        header = next(csv.reader([fh.readline().decode("utf-8-sig")]))
+    missing = set(_FIELDS) - set(header)
+    if missing:
+        raise SystemExit(f"{path}: missing CSV columns {sorted(missing)}")
+    return header
+
+
+def _read(path: str, fmt: str, offset: int, index: int) -> Iterator[Tuple[int, int, bytes]]:
+    with open(path, "rb") as fh:
+        if fmt == "csv":
+            fh.readline()       # header, parsed by _csv_header
+        if offset:
+            fh.seek(offset)
+        records = _csv_records(fh) if fmt == "csv" else _jsonl_records(fh)
+        for end, raw in records:
+            yield index, end, raw
+            index += 1
+
+
+def _decode(raw: bytes, header: Optional[list]) -> dict:
+    """Parses one raw record; raises ValueError if it is malformed or lacks a field."""
+    if header is None:
+        payload = json.loads(raw)
+        if not isinstance(payload, dict):
+            raise ValueError("record is not a JSON object")
+    else:
+        row = next(csv.reader([raw.decode("utf-8")]))
+        if len(row) != len(header):
+            raise ValueError(f"expected {len(header)} CSV fields, got {len(row)}")
+        payload = dict(zip(header, row))
+    missing = [name for name in _FIELDS if not payload.get(name)]
+    if missing:
+        raise ValueError(f"missing fields {missing}")
+    return payload
+
+
+# ---------------------------------------------------------------------------
+# Checkpoint
+# ---------------------------------------------------------------------------
+
+def _load_checkpoint(path: str, source: str) -> dict:
+    if not os.path.exists(path):
+        return {"input_offset": 0, "records": 0, "output_offset": 0}
+    with open(path, encoding="utf-8") as fh:
+        checkpoint = json.load(fh)
+    if checkpoint.get("input") != os.path.abspath(source):
+        raise SystemExit(f"{path} belongs to {checkpoint.get('input')}; delete it to start over")
+    return checkpoint
+
+
+def _save_checkpoint(path: str, source: str, out: BinaryIO, input_offset: int, records: int) -> None:
+    """
+    Makes the results written so far durable, then points the checkpoint at
+    them; the checkpoint never refers to output that is not on disk.
+    """
+    out.flush()
+    os.fsync(out.fileno())
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as fh:
+        json.dump({
+            "input": os.path.abspath(source),
+            "input_offset": input_offset,
+            "records": records,
+            "output_offset": out.tell(),
+        }, fh)
+        fh.flush()
+        os.fsync(fh.fileno())
+    os.replace(tmp, path)
+
+
+# ---------------------------------------------------------------------------
+# Processing
+# ---------------------------------------------------------------------------
+
+def _process(graph, index: int, raw: bytes, header: Optional[list]) -> dict:
+    """Decodes and runs one record; errors are reported in the result instead of stopping the batch."""
+    from app.agents.state import initial_state
+    from app.core.log import bind_run
+
+    run_id = str(uuid.uuid4())
+    result = {"index": index, "run_id": run_id, "client_id": None}
+    try:
+        payload = _decode(raw, header)
+        result["client_id"] = payload["client_id"]
+        bind_run(run_id, payload["client_id"])
+        state = graph.invoke(initial_state(payload["client_id"], payload["message"], payload["timestamp"]))
+    except Exception as exc:
+        result["error"] = f"{type(exc).__name__}: {exc}"
+        return result
+
+    escalated = state.get("proposed_action") == "escalate_to_human"
+    result.update({
+        "status": "pending_approval" if escalated else "processed",
+        "sentiment": state["sentiment"],
+        "intent": state["intent"],
+        "sla_breached": state["sla_breached"],
+        "proposed_action": state["proposed_action"],
+        "supervisor_note": state.get("supervisor_note"),
+        "execution_result": state.get("execution_result"),
+    })
+    return result
+
+
+def _report(done: int, started: float, offset: int, resumed_from: int, size: int, final: bool = False) -> None:
+    """Prints throughput and an ETA extrapolated from the input bytes consumed so far."""
+    elapsed = max(time.perf_counter() - started, 1e-9)
+    byte_rate = (offset - resumed_from) / elapsed
+    eta = f"{(size - offset) / byte_rate:.0f}s" if byte_rate else "unknown"
+    print(
+        f"{'done' if final else 'progress'}: {done} records in {elapsed:.0f}s "
+        f"({done / elapsed:.1f}/s), {offset / max(size, 1):.1%} of input, ETA {eta}",
+        file=sys.stderr,
+        flush=True,
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m app.batch",
+        description="Process a JSONL/CSV dump of CRM messages through crm_graph, resumably.",
+    )
+    parser.add_argument("input", help="JSONL or CSV file with client_id, message, timestamp.")
+    parser.add_argument("output", help="JSONL file results are appended to.")
+    parser.add_argument("--format", choices=["jsonl", "csv"], default=None,
+                        help="Input format (default: from the file extension).")
+    parser.add_argument("--concurrency", type=int, default=8, help="Number of runs in flight.")
+    parser.add_argument("--no-execute", action="store_true",
+                        help="Stop after triage: classify and route without drafting responses.")
+    parser.add_argument("--checkpoint-every", type=int, default=100,
+                        help="Write the checkpoint every N records.")
+    parser.add_argument("--progress-every", type=float, default=10.0,
+                        help="Print throughput and ETA every N seconds.")
+    args = parser.parse_args()
+
+    fmt = args.format or ("csv" if args.input.lower().endswith(".csv") else "jsonl")
+    checkpoint_path = args.output + ".checkpoint"
+    checkpoint = _load_checkpoint(checkpoint_path, args.input)
+    size = os.path.getsize(args.input)
+    header = _csv_header(args.input) if fmt == "csv" else None
+
+    # Imported here: compiling the graph builds the LLM clients.
+    from app.agents.orchestrator import build_graph, crm_graph
+    # Nobody approves a --no-execute run, so a pre-draft would never be sent
+    graph = build_graph(auto_execute=False, predraft=False) if args.no_execute else crm_graph
+
+    # Drop results written after the last checkpoint; their records run again
+    with open(args.output, "ab") as out:
+        out.truncate(checkpoint["output_offset"])
+    if checkpoint["records"]:
+        print(f"resuming after record {checkpoint['records']} "
+              f"(input offset {checkpoint['input_offset']})", file=sys.stderr)
+
+    window = max(args.concurrency, 1) * 2
+    pending: Deque[Tuple[int, Future]] = deque()
+    written = checkpoint["records"]
+    input_offset = checkpoint["input_offset"]
+    done = 0
+    started = last_report = time.perf_counter()
+
+    with open(args.output, "ab") as out, ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+
+        def write_head() -> None:
+            nonlocal written, input_offset, done, last_report
+            end, future = pending.popleft()
+            out.write(json.dumps(future.result(), ensure_ascii=False).encode("utf-8") + b"\n")
+            written += 1
+            done += 1
+            input_offset = end
+            if written % args.checkpoint_every == 0:
+                _save_checkpoint(checkpoint_path, args.input, out, input_offset, written)
+            if time.perf_counter() - last_report >= args.progress_every:
+                last_report = time.perf_counter()
+                _report(done, started, input_offset, checkpoint["input_offset"], size)
+
+        for index, end, raw in _read(args.input, fmt, checkpoint["input_offset"], checkpoint["records"]):
+            pending.append((end, pool.submit(_process, graph, index, raw, header)))
+            if len(pending) >= window:
+                write_head()
+        while pending:
+            write_head()
+
+        _save_checkpoint(checkpoint_path, args.input, out, input_offset, written)
+
+    _report(done, started, input_offset, checkpoint["input_offset"], size, final=True)
+
+
+if __name__ == "__main__":
+    main()
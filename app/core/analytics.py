@@ -0,0 +1,221 @@
+"""
+Rolling operational analytics backed by fixed-size ring buffers.
+
+Every observation (an Analyst classification and the tier that produced it, a Triage routing decision, a
+supervisor decision, a pipeline latency sample) increments counters in the
+current time bucket. Two rings are kept:
+
+    fine   : 300 buckets × 1 s   → serves the 1m and 5m windows
+    coarse : 1440 buckets × 60 s → serves the 1h and 24h windows
+
+A bucket is lazily reset the first time it is written after its slot wraps
+around, so memory is constant and a query is O(buckets), never O(messages).
+
+Inside `capture()` observations are collected instead of counted, so a graph
+worker process can ship them back to the API process, which `replay()`s them.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+
+
+# ---------------------------------------------------------------------------
+# Counter layout — one column per field in every bucket
+# ---------------------------------------------------------------------------
+
+SENTIMENTS = ("positive", "neutral", "negative")
+INTENTS    = ("refund_request", "support_request", "general_inquiry")
+# Where an Analyst classification came from: cascade tier 1 (local), the LLM,
+# the degraded-mode rules, tier 1 kept after a failed tier-2 call, or the safe
+# defaults after an LLM failure
+ANALYST_SOURCES = ("local", "llm", "rules", "local_fallback", "fallback")
+
+_FIELDS = (
+    [f"sentiment:{s}" for s in SENTIMENTS]
+    + [f"intent:{i}" for i in INTENTS]
+    + [f"analyst:{s}" for s in ANALYST_SOURCES]
+    + [f"analyst_ms:{s}" for s in ANALYST_SOURCES]
+    + ["triaged", "escalated", "sla_breached", "approved", "rejected", "runs", "latency_sum"]
+)
+_COL = {name: idx for idx, name in enumerate(_FIELDS)}
+
+# Pipeline latency histogram (upper bounds in seconds; last bin is open-ended)
+_LATENCY_BOUNDS = np.array([0.1, 0.25, 0.5, 1, 2, 4, 8, 16, 32, np.inf])
+
+# Window name → (ring name, number of buckets)
+WINDOWS: Dict[str, tuple] = {
+    "1m":  ("fine", 60),
+    "5m":  ("fine", 300),
+    "1h":  ("coarse", 60),
+    "24h": ("coarse", 1440),
+}
+
+
+# ---------------------------------------------------------------------------
+# Ring buffer
+# ---------------------------------------------------------------------------
+
+class _Ring:
+    def __init__(self, size: int, resolution: int) -> None:
+        self.size = size
+        self.resolution = resolution
+        self.epochs = np.full(size, -1, dtype=np.int64)   # absolute bucket index held by each slot
+        self.counters = np.zeros((size, len(_FIELDS)), dtype=np.float64)
+        self.latency_hist = np.zeros((size, len(_LATENCY_BOUNDS)), dtype=np.int64)
+        self.latency_max = np.zeros(size, dtype=np.float64)
+
+    def _slot(self, now: float) -> int:
+        bucket = int(now) // self.resolution
+        slot = bucket % self.size
+        if self.epochs[slot] != bucket:
+            self.epochs[slot] = bucket
+            self.counters[slot] = 0
+            self.latency_hist[slot] = 0
+            self.latency_max[slot] = 0
+        return slot
+
+    def add(self, now: float, columns: List[int], amounts: Optional[Dict[int, float]] = None) -> None:
+        slot = self._slot(now)
+        for col in columns:
+            self.counters[slot, col] += 1
+        for col, amount in (amounts or {}).items():
+            self.counters[slot, col] += amount
+
+    def add_latency(self, now: float, seconds: float) -> None:
+        slot = self._slot(now)
+        self.counters[slot, _COL["runs"]] += 1
+        self.counters[slot, _COL["latency_sum"]] += seconds
+        self.latency_hist[slot, np.searchsorted(_LATENCY_BOUNDS, seconds)] += 1
+        self.latency_max[slot] = max(self.latency_max[slot], seconds)
+
+    def window(self, now: float, buckets: int):
+        current = int(now) // self.resolution
+        mask = (self.epochs > current - buckets) & (self.epochs <= current)
+        return (
+            self.counters[mask].sum(axis=0),
+            self.latency_hist[mask].sum(axis=0),
+            float(self.latency_max[mask].max()) if mask.any() else 0.0,
+        )
+
+
+# ---------------------------------------------------------------------------
+# Public recorder
+# ---------------------------------------------------------------------------
+
+# Observations collected by an active `capture()` in the current context
+_captured: ContextVar[Optional[list]] = ContextVar("captured_analytics", default=None)
+
+
+class Analytics:
+    """Thread-safe incremental counters shared by the agent nodes and endpoints."""
+
+    def __init__(self) -> None:
+        self._rings = {"fine": _Ring(300, 1), "coarse": _Ring(1440, 60)}
+        self._lock = threading.Lock()
+
+    def _add(self, columns: List[int], amounts: Optional[Dict[int, float]] = None) -> None:
+        captured = _captured.get()
+        if captured is not None:
+            captured.append((columns, amounts))
+            return
+        now = time.time()
+        with self._lock:
+            for ring in self._rings.values():
+                ring.add(now, columns, amounts)
+
+    @contextmanager
+    def capture(self) -> Iterator[list]:
+        """Collects this context's observations into the yielded list instead of counting them."""
+        events: list = []
+        token = _captured.set(events)
+        try:
+            yield events
+        finally:
+            _captured.reset(token)
+
+    def replay(self, events: list) -> None:
+        """Counts observations collected by `capture()` (possibly in another process)."""
+        for columns, amounts in events:
+            self._add(columns, amounts)
+
+    def record_analysis(self, sentiment: str, intent: str,
+                        source: Optional[str] = None, seconds: float = 0.0) -> None:
+        cols = [c for c in (_COL.get(f"sentiment:{sentiment}"), _COL.get(f"intent:{intent}")) if c is not None]
+        amounts = None
+        if source in ANALYST_SOURCES:
+            cols.append(_COL[f"analyst:{source}"])
+            amounts = {_COL[f"analyst_ms:{source}"]: seconds * 1000}
+        self._add(cols, amounts)
+
+    def record_triage(self, escalated: bool, sla_breached: bool) -> None:
+        cols = [_COL["triaged"]]
+        if escalated:
+            cols.append(_COL["escalated"])
+        if sla_breached:
+            cols.append(_COL["sla_breached"])
+        self._add(cols)
+
+    def record_decision(self, approved: bool) -> None:
+        self._add([_COL["approved"] if approved else _COL["rejected"]])
+
+    def record_latency(self, seconds: float) -> None:
+        now = time.time()
+        with self._lock:
+            for ring in self._rings.values():
+                ring.add_latency(now, seconds)
+
+    def snapshot(self, window: str) -> dict:
+        ring_name, buckets = WINDOWS[window]
+        with self._lock:
+            totals, hist, latency_max = self._rings[ring_name].window(time.time(), buckets)
+
+        triaged = totals[_COL["triaged"]]
+        runs = totals[_COL["runs"]]
+        classified = sum(totals[_COL[f"analyst:{s}"]] for s in ANALYST_SOURCES)
+        return {
+            "window": window,
+            "messages": int(sum(totals[_COL[f"sentiment:{s}"]] for s in SENTIMENTS)),
+            "sentiment": {s: int(totals[_COL[f"sentiment:{s}"]]) for s in SENTIMENTS},
+            "intent": {i: int(totals[_COL[f"intent:{i}"]]) for i in INTENTS},
+            "escalation_rate": float(totals[_COL["escalated"]] / triaged) if triaged else 0.0,
+            "sla_breach_rate": float(totals[_COL["sla_breached"]] / triaged) if triaged else 0.0,
+            "analyst_tiers": {
+                s: {
+                    "messages": int(totals[_COL[f"analyst:{s}"]]),
+                    "share": float(totals[_COL[f"analyst:{s}"]] / classified) if classified else 0.0,
+                    "avg_ms": (
+                        float(totals[_COL[f"analyst_ms:{s}"]] / totals[_COL[f"analyst:{s}"]])
+                        if totals[_COL[f"analyst:{s}"]] else 0.0
+                    ),
+                }
+                for s in ANALYST_SOURCES
+            },
+            "decisions": {
+                "approved": int(totals[_COL["approved"]]),
+                "rejected": int(totals[_COL["rejected"]]),
+            },
+            "latency": {
+                "runs": int(runs),
+                "avg_ms": float(totals[_COL["latency_sum"]] / runs * 1000) if runs else 0.0,
+                "p95_ms": min(_histogram_quantile(hist, 0.95), latency_max) * 1000,
+                "max_ms": latency_max * 1000,
+            },
+        }
+
+
+def _histogram_quantile(hist: np.ndarray, q: float) -> float:
+    """Upper bound of the histogram bin containing quantile q (seconds)."""
+    total = hist.sum()
+    if total == 0:
+        return 0.0
+    idx = int(np.searchsorted(np.cumsum(hist), q * total))
+    return float(_LATENCY_BOUNDS[idx])
+
+
+# Singleton — shared across all requests in this process.
+analytics = Analytics()
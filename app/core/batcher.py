@@ -0,0 +1,104 @@
+"""
+Micro-batching for blocking calls made from graph worker threads.
+
+`MicroBatcher.submit(item)` blocks the calling thread until its result is
+ready. A collector thread takes the first waiting item, keeps collecting for
+up to `max_wait` seconds or until `max_size` items are queued, and hands the
+batch to `handler(items) -> results` on a small worker pool, so the next
+batch is collected while the previous one is in flight.
+
+`handler` must return one result per item, in order; an exception instance
+in place of a result is raised in that item's caller only, and None (when a
+`fallback` is given) makes that caller run `fallback(item)` itself. If
+`handler` itself raises, every run in the batch receives that exception.
+
+Each submitter's context travels with its item:
+
+  - the handler runs in a copy of the first submitter's context (its
+    analytics capture and pinned degradation level), with the log run_id
+    unbound, since the call serves several runs;
+  - the handler's spans are recorded under one `<name>` span that is copied
+    into every submitting run's trace;
+  - `fallback` runs in the submitter's own thread, so its spans, logs and
+    analytics belong to that run alone.
+"""
+
+import contextvars
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, List, Optional
+
+from app.core.log import bind_run
+from app.core.tracing import adopt, detached
+
+
+class MicroBatcher:
+    """Packs concurrent `submit()` calls into batches for `handler`."""
+
+    def __init__(self, handler: Callable[[List[Any]], List[Any]], max_size: int,
+                 max_wait: float, workers: int, name: str = "batcher",
+                 fallback: Optional[Callable[[Any], Any]] = None) -> None:
+        self.handler = handler
+        self.fallback = fallback
+        self.max_size = max_size
+        self.max_wait = max_wait
+        self.name = name
+        self.batches = 0
+        self.items = 0
+        self._queue: "queue.SimpleQueue[tuple]" = queue.SimpleQueue()
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=name)
+        self._collector: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+
+    def submit(self, item: Any) -> Any:
+        """Queues `item` for the next batch and waits for its result."""
+        if self._collector is None:
+            with self._start_lock:
+                if self._collector is None:
+                    self._collector = threading.Thread(target=self._collect, name=f"{self.name}-collector", daemon=True)
+                    self._collector.start()
+        future: Future = Future()
+        self._queue.put((item, future, contextvars.copy_context()))
+        result, spans = future.result()
+        adopt(spans)
+        if isinstance(result, BaseException):
+            raise result
+        if result is None and self.fallback is not None:
+            return self.fallback(item)
+        return result
+
+    def _collect(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self.batches += 1
+            self.items += len(batch)
+            self._pool.submit(self._run, batch)
+
+    def _run(self, batch: List[tuple]) -> None:
+        _, _, context = batch[0]
+        results, spans = context.copy().run(self._handle, [item for item, _, _ in batch])
+        for (_, future, _), result in zip(batch, results):
+            future.set_result((result, spans))
+
+    def _handle(self, items: List[Any]) -> tuple:
+        """Runs `handler` under a detached span; returns (one result per item, spans)."""
+        bind_run(None, None)
+        with detached(self.name, size=len(items)) as spans:
+            try:
+                results = self.handler(items)
+                if len(results) != len(items):
+                    raise ValueError(f"{self.name}: {len(results)} results for {len(items)} items")
+            except Exception as exc:
+                results = [exc] * len(items)
+        return results, spans
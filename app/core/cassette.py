@@ -0,0 +1,147 @@
+"""
+Record-and-replay cassettes for production traffic.
+
+A cassette is a JSONL file with two kinds of lines:
+
+    {"type": "webhook", "recorded_at": <epoch>, "payload": {...WebhookPayload...}}
+    {"type": "llm", "agent": "analyst", "key": "<prompt hash>",
+     "latency_ms": 412.3, "response": ... | "error": "..."}
+
+Recording is enabled by setting CASSETTE_RECORD_PATH. Replay is driven by
+`python -m app.replay`, which installs a `CassettePlayer` so that every LLM
+call made through `app.core.llm.invoke` is served from the cassette — at the
+recorded latency or instantly — instead of hitting Gemini.
+
+LLM calls are matched by a hash of their prompt, so only prompts that depend
+on a single message can be replayed: Analyst micro-batching
+(ANALYST_BATCH_ENABLED) is bypassed while recording or replaying, and runs
+use the threadpool rather than worker processes (see `app.agents.runner`).
+"""
+
+import asyncio
+import hashlib
+import json
+import threading
+import time
+from collections import defaultdict, deque
+from typing import Any, Deque, Dict, List, Optional
+
+from app.core.config import settings
+
+
+def prompt_key(agent: str, messages: List[dict]) -> str:
+    """Stable hash of an LLM request, used to match recordings on replay."""
+    blob = json.dumps([agent, messages], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(blob.encode()).hexdigest()[:16]
+
+
+# ---------------------------------------------------------------------------
+# Recorder
+# ---------------------------------------------------------------------------
+
+class CassetteRecorder:
+    """Appends webhook payloads and LLM request/response pairs to a cassette."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._file = open(path, "a", encoding="utf-8")
+        self._lock = threading.Lock()
+
+    def _write(self, entry: dict) -> None:
+        line = json.dumps(entry, ensure_ascii=False, separators=(",", ":"))
+        with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+
+    def record_webhook(self, payload: dict) -> None:
+        self._write({"type": "webhook", "recorded_at": time.time(), "payload": payload})
+
+    def record_llm(self, agent: str, key: str, latency: float,
+                   response: Any = None, error: Optional[str] = None) -> None:
+        entry = {"type": "llm", "agent": agent, "key": key, "latency_ms": round(latency * 1000, 3)}
+        if error is not None:
+            entry["error"] = error
+        else:
+            entry["response"] = response
+        self._write(entry)
+
+    def close(self) -> None:
+        with self._lock:
+            self._file.close()
+
+
+# ---------------------------------------------------------------------------
+# Player
+# ---------------------------------------------------------------------------
+
+class CassetteMiss(LookupError):
+    """Raised when an LLM request has no recording in the cassette."""
+
+
+class CassettePlayer:
+    """
+    Serves recorded LLM responses keyed by (agent, prompt hash).
+
+    Identical prompts recorded several times (e.g. the Executor at
+    temperature > 0) are served in recording order; once exhausted, the last
+    recording is repeated.
+    """
+
+    def __init__(self, path: str, realtime: bool = True) -> None:
+        self.realtime = realtime
+        self.webhooks: List[dict] = []
+        self._llm: Dict[str, Deque[dict]] = defaultdict(deque)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+        with open(path, encoding="utf-8") as fh:
+            for line in fh:
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                if entry["type"] == "webhook":
+                    self.webhooks.append(entry)
+                elif entry["type"] == "llm":
+                    self._llm[entry["key"]].append(entry)
+
+    def _take(self, key: str) -> dict:
+        with self._lock:
+            recordings = self._llm.get(key)
+            if not recordings:
+                self.misses += 1
+                raise CassetteMiss(f"no recording for prompt key {key}")
+            entry = recordings.popleft() if len(recordings) > 1 else recordings[0]
+            self.hits += 1
+        return entry
+
+    def replay(self, key: str) -> dict:
+        entry = self._take(key)
+        if self.realtime:
+            time.sleep(entry["latency_ms"] / 1000)
+        return entry
+
+    async def areplay(self, key: str) -> dict:
+        """`replay` for async callers: waits out the recorded latency without blocking the event loop."""
+        entry = self._take(key)
+        if self.realtime:
+            await asyncio.sleep(entry["latency_ms"] / 1000)
+        return entry
+
+
+# ---------------------------------------------------------------------------
+# Process-wide handles — at most one of them is active
+# ---------------------------------------------------------------------------
+
+recorder: Optional[CassetteRecorder] = (
+    CassetteRecorder(settings.CASSETTE_RECORD_PATH) if settings.CASSETTE_RECORD_PATH else None
+)
+player: Optional[CassettePlayer] = None
+
+
+def start_replay(path: str, realtime: bool = True) -> CassettePlayer:
+    """Switches this process to replay mode and returns the loaded player."""
+    global player, recorder
+    recorder = None
+    player = CassettePlayer(path, realtime=realtime)
+    return player
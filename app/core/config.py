@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import Optional
+from typing import Dict, List, Optional
 
 
 class Settings(BaseSettings):
@@ -10,6 +10,84 @@ class Settings(BaseSettings):
     GEMINI_API_KEY: Optional[str] = None
     # SLA threshold in hours: messages older than this are considered a breach
     SLA_THRESHOLD_HOURS: float = 2.0
+    # Draft the client response of SLA-breached runs before the supervisor decides (one
+    # extra Executor LLM call per breach, wasted on rejection)
+    SLA_PREDRAFT_ENABLED: bool = False
+    # Executor semantic cache (opt-in): reuse approved drafts for paraphrased messages
+    EXECUTOR_CACHE_ENABLED: bool = False
+    EXECUTOR_CACHE_THRESHOLD: float = 0.92       # minimum cosine similarity for a hit (same client only)
+    EXECUTOR_CACHE_MAX_ENTRIES: int = 512        # per (proposed_action, language) partition
+    EXECUTOR_CACHE_DIM: int = 2048               # hashed n-gram embedding size
+    # Record incoming webhooks and LLM calls to this JSONL cassette (replay: python -m app.replay)
+    CASSETTE_RECORD_PATH: Optional[str] = None
+    # Structured logging: level and share of routine (INFO) records kept; warnings/errors are never sampled
+    LOG_LEVEL: str = "INFO"
+    LOG_SUCCESS_SAMPLE_RATE: float = 1.0
+    # Per-run trace timelines: number of runs kept in memory, optional OTLP/JSON export file
+    TRACE_BUFFER_SIZE: int = 1000
+    TRACE_EXPORT_PATH: Optional[str] = None
+    # Fair queuing in front of graph execution (CLIENT_WEIGHTS as JSON, e.g. {"CRM-001": 3})
+    GRAPH_MAX_CONCURRENCY: int = 16
+    CLIENT_MAX_CONCURRENCY: int = 4
+    CLIENT_WEIGHTS: Dict[str, float] = {}
+    # Where graph runs execute: "thread" (API process threadpool) or "process" (worker pool;
+    # GRAPH_PROCESS_WORKERS = 0 starts one worker per CPU core) — see app/agents/runner.py
+    GRAPH_EXECUTION_MODE: str = "thread"
+    GRAPH_PROCESS_WORKERS: int = 0
+    # Recent LLM latency window used for percentiles (last N calls within the last S seconds)
+    LLM_LATENCY_WINDOW_SIZE: int = 500
+    LLM_LATENCY_WINDOW_SECONDS: float = 60.0
+    # Hedged LLM requests (opt-in, idempotent calls only): duplicate a call still running after
+    # the agent's recent unhedged percentile latency; extra calls capped at LLM_HEDGE_BUDGET of all calls
+    LLM_HEDGING_ENABLED: bool = False
+    LLM_HEDGE_PERCENTILE: float = 0.95
+    LLM_HEDGE_BUDGET: float = 0.05
+    LLM_HEDGE_MIN_SAMPLES: int = 20
+    # Overload control: one load threshold per degradation level 1–4, one p95 threshold per level 1–3;
+    # latency only counts with OVERLOAD_LATENCY_MIN_LOAD runs and OVERLOAD_MIN_SAMPLES calls (see app/core/overload.py)
+    OVERLOAD_CONTROL_ENABLED: bool = True
+    OVERLOAD_LOAD_THRESHOLDS: List[int] = [32, 64, 128, 256]            # runs in flight + queued
+    OVERLOAD_P95_THRESHOLDS_MS: List[float] = [6000, 10000, 20000]
+    OVERLOAD_LATENCY_MIN_LOAD: int = 8
+    OVERLOAD_MIN_SAMPLES: int = 50
+    OVERLOAD_RETRY_AFTER_SECONDS: int = 10
+    # Analyst cascade (opt-in): local probabilistic classifier first, stronger LLM only when
+    # the top-label margin is below ANALYST_CASCADE_MARGIN or the message looks complex
+    ANALYST_CASCADE_ENABLED: bool = False
+    ANALYST_CASCADE_MARGIN: float = 0.5
+    ANALYST_CASCADE_MAX_CHARS: int = 280
+    ANALYST_CASCADE_MODEL: str = "gemini-2.5-flash"
+    # Analyst micro-batching (opt-in): pack up to N classifications arriving within the wait
+    ANALYST_BATCH_ENABLED: bool = False
+    ANALYST_BATCH_MAX_SIZE: int = 16
+    ANALYST_BATCH_MAX_WAIT_MS: float = 10.0
+    # Outbound delivery of executed responses to the CRM (disabled while CRM_CALLBACK_URL is unset)
+    CRM_CALLBACK_URL: Optional[str] = None
+    CRM_CALLBACK_TOKEN: Optional[str] = None     # sent as "Authorization: Bearer <token>"
+    OUTBOX_DB_PATH: str = "outbox.sqlite3"
+    OUTBOX_WORKERS: int = 2
+    OUTBOX_BATCH_SIZE: int = 20
+    OUTBOX_MAX_ATTEMPTS: int = 8
+    OUTBOX_BACKOFF_SECONDS: float = 1.0
+    OUTBOX_TIMEOUT_SECONDS: float = 10.0
+    # Pending approvals: capacity and TTL; evicted items move to this gzip archive (None: dropped)
+    PENDING_MAX_ITEMS: int = 10000
+    PENDING_TTL_SECONDS: float = 72 * 3600
+    PENDING_ARCHIVE_PATH: Optional[str] = "pending_archive.jsonl.gz"
+    # Per-client risk profile consulted by Triage: decayed counters (half-life) and the
+    # levels at which a client's history alone escalates refund and support requests
+    CLIENT_RISK_HALF_LIFE_HOURS: float = 72.0
+    CLIENT_RISK_NEGATIVE_THRESHOLD: float = 1.5
+    CLIENT_RISK_REFUND_THRESHOLD: float = 1.5
+    CLIENT_RISK_REJECTION_THRESHOLD: float = 1.5
+    CLIENT_RISK_MAX_CLIENTS: int = 100_000
+    # /debug/profile endpoints (sampling profiler, per-request phase breakdown): mounted only
+    # when a token is set; callers send it in the X-Debug-Token header
+    DEBUG_PROFILING_TOKEN: Optional[str] = None
+    # Append-only log of supervisor decisions (None disables it); single-process only —
+    # run one API worker per directory
+    DECISION_HISTORY_DIR: Optional[str] = "decision_history"
+    DECISION_HISTORY_SEGMENT_BYTES: int = 64 * 1024 * 1024
 
     model_config = {
         "env_file": ".env",
@@ -0,0 +1,184 @@
+"""
+Per-client weighted fair queuing in front of graph execution.
+
+Every run needs LLM capacity, so a single misbehaving integration flooding the
+webhook would otherwise starve every other client. Runs are admitted through
+`FairScheduler.slot(client_id)`:
+
+  - At most GRAPH_MAX_CONCURRENCY runs execute at once, and at most
+    CLIENT_MAX_CONCURRENCY of them belong to the same client.
+  - Waiting runs are dispatched in weighted fair queuing order: each request
+    gets a virtual finish tag `max(virtual_time, client_last_tag) + 1/weight`
+    and the smallest tag among eligible clients goes next. A client with
+    weight 3 (CLIENT_WEIGHTS, e.g. premium accounts) therefore gets three
+    times the share of a default client while both are backlogged, and a
+    flooding client only ever competes for its own share.
+  - Queue depth, in-flight runs and wait times are tracked per client while
+    it is active. A client's state is dropped as soon as it has nothing
+    queued or in flight, so memory follows the active clients, not every
+    client ever seen.
+  - Backlogged clients below their cap sit in a heap keyed by the tag of
+    their oldest waiter, so a dispatch is O(log active clients). Entries are
+    invalidated lazily: a popped entry whose tag no longer matches the
+    client's head waiter (or whose client is at its cap) is skipped.
+
+The scheduler lives on the event loop; it needs no locks because all state
+changes happen in coroutines.
+"""
+
+import asyncio
+import heapq
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Deque, Dict, List, Optional
+
+from app.core.config import settings
+from app.core.tracing import span
+
+
+@dataclass(slots=True)
+class _Waiter:
+    tag: float
+    enqueued_at: float
+    future: asyncio.Future
+
+
+@dataclass(slots=True)
+class _ClientState:
+    weight: float
+    last_tag: float = 0.0
+    in_flight: int = 0
+    waiters: Deque[_Waiter] = field(default_factory=deque)
+    dispatched: int = 0
+    wait_total: float = 0.0
+    wait_max: float = 0.0
+
+
+class FairScheduler:
+    """Weighted fair queue with global and per-client concurrency caps."""
+
+    def __init__(self, max_concurrency: int, per_client_limit: int,
+                 weights: Optional[Dict[str, float]] = None) -> None:
+        self.max_concurrency = max_concurrency
+        self.per_client_limit = per_client_limit
+        self.weights = weights or {}
+        self._clients: Dict[str, _ClientState] = {}     # active clients only
+        self._ready: List[tuple] = []                   # heap of (head tag, client_id)
+        self._virtual_time = 0.0
+        self.in_flight = 0
+        self.queued = 0
+
+    def _client(self, client_id: str) -> _ClientState:
+        state = self._clients.get(client_id)
+        if state is None:
+            state = self._clients[client_id] = _ClientState(weight=max(self.weights.get(client_id, 1.0), 1e-6))
+        return state
+
+    def _push_ready(self, client_id: str, client: _ClientState) -> None:
+        if client.waiters and client.in_flight < self.per_client_limit:
+            heapq.heappush(self._ready, (client.waiters[0].tag, client_id))
+
+    def _forget_if_idle(self, client_id: str, client: _ClientState) -> None:
+        if not client.in_flight and not client.waiters:
+            del self._clients[client_id]
+
+    def _grant(self, client_id: str, client: _ClientState, waited: float) -> None:
+        client.in_flight += 1
+        client.dispatched += 1
+        client.wait_total += waited
+        client.wait_max = max(client.wait_max, waited)
+        self.in_flight += 1
+
+    def _dispatch(self) -> None:
+        """Hands free slots to the eligible waiters with the smallest finish tags."""
+        now = time.monotonic()
+        while self.in_flight < self.max_concurrency and self._ready:
+            tag, client_id = heapq.heappop(self._ready)
+            client = self._clients.get(client_id)
+            if (client is None or not client.waiters or client.waiters[0].tag != tag
+                    or client.in_flight >= self.per_client_limit):
+                continue    # stale entry; the client is re-pushed when it becomes eligible
+
+            waiter = client.waiters.popleft()
+            self.queued -= 1
+            self._virtual_time = max(self._virtual_time, waiter.tag)
+            self._grant(client_id, client, now - waiter.enqueued_at)
+            waiter.future.set_result(None)
+            self._push_ready(client_id, client)
+
+    async def acquire(self, client_id: str) -> None:
+        client = self._client(client_id)
+        tag = max(self._virtual_time, client.last_tag) + 1.0 / client.weight
+        client.last_tag = tag
+
+        # Fast path: nobody waiting and capacity available
+        if not self.queued and self.in_flight < self.max_concurrency and client.in_flight < self.per_client_limit:
+            self._virtual_time = max(self._virtual_time, tag)
+            self._grant(client_id, client, 0.0)
+            return
+
+        waiter = _Waiter(tag, time.monotonic(), asyncio.get_running_loop().create_future())
+        client.waiters.append(waiter)
+        self.queued += 1
+        if len(client.waiters) == 1:
+            self._push_ready(client_id, client)
+        self._dispatch()        # capacity may be free for this client while others are capped
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            if waiter.future.done() and not waiter.future.cancelled():
+                self.release(client_id)         # slot granted just before cancellation
+            else:
+                was_head = client.waiters[0] is waiter
+                client.waiters.remove(waiter)
+                self.queued -= 1
+                if was_head:
+                    self._push_ready(client_id, client)
+                self._forget_if_idle(client_id, client)
+            raise
+
+    def release(self, client_id: str) -> None:
+        client = self._clients[client_id]
+        client.in_flight -= 1
+        self.in_flight -= 1
+        if client.in_flight == self.per_client_limit - 1:
+            self._push_ready(client_id, client)     # back under its cap
+        self._forget_if_idle(client_id, client)
+        self._dispatch()
+
+    @asynccontextmanager
+    async def slot(self, client_id: str) -> AsyncIterator[None]:
+        """Waits for a fair share of execution capacity, then holds it for the block."""
+        with span("queue_wait", client_id=client_id):
+            await self.acquire(client_id)
+        try:
+            yield
+        finally:
+            self.release(client_id)
+
+    def stats(self) -> List[dict]:
+        """Per-client figures for the clients currently queued or in flight."""
+        now = time.monotonic()
+        return [
+            {
+                "client_id": client_id,
+                "weight": client.weight,
+                "queued": len(client.waiters),
+                "in_flight": client.in_flight,
+                "dispatched": client.dispatched,
+                "avg_wait_ms": client.wait_total / client.dispatched * 1000 if client.dispatched else 0.0,
+                "max_wait_ms": client.wait_max * 1000,
+                "oldest_wait_ms": (now - client.waiters[0].enqueued_at) * 1000 if client.waiters else 0.0,
+            }
+            for client_id, client in self._clients.items()
+        ]
+
+
+# Singleton — shared by every endpoint that runs agents.
+scheduler = FairScheduler(
+    max_concurrency=settings.GRAPH_MAX_CONCURRENCY,
+    per_client_limit=settings.CLIENT_MAX_CONCURRENCY,
+    weights=settings.CLIENT_WEIGHTS,
+)
@@ -0,0 +1,216 @@
+"""
+Append-only decision history.
+
+Every supervisor decision is appended as one JSON line to the current segment
+file (`segment-000001.log`, …; a new segment starts after
+DECISION_HISTORY_SEGMENT_BYTES). A decision costs one buffered sequential
+write plus a fixed-width entry copied into a memory-mapped index:
+
+    index.bin — one 48-byte entry per decision, in decision order
+        run_id (16 B, UUID bytes) | client key (8 B) | segment (4 B)
+        | offset (8 B) | length (4 B) | decided_at (8 B, epoch seconds)
+
+On start, the in-memory run_id map and per-client posting lists are rebuilt
+from the index alone; segment files are only read when a record is served.
+The client key is a 64-bit hash, so posting-list hits are checked against
+the stored client_id.
+
+The index is single-process only: the in-memory maps and the append position
+live in the process that opened the directory, so two uvicorn workers (or any
+second process) sharing DECISION_HISTORY_DIR would interleave writes and
+corrupt index.bin. Run the API with one worker when the history is enabled.
+Appends and reads block on file I/O and are called through run_in_threadpool.
+"""
+
+import bisect
+import hashlib
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+import uuid
+from array import array
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+from app.core.config import settings
+
+_ENTRY = struct.Struct("<16sQIQId")
+_EMPTY = bytes(16)
+
+
+def _run_key(run_id: str) -> bytes:
+    try:
+        return uuid.UUID(run_id).bytes
+    except ValueError:
+        return hashlib.blake2b(run_id.encode("utf-8"), digest_size=16).digest()
+
+
+def _client_key(client_id: str) -> int:
+    return int.from_bytes(hashlib.blake2b(client_id.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+class DecisionHistory:
+    """Segmented append-only log of decided runs with an mmap offset index."""
+
+    def __init__(self, directory: str, segment_bytes: int) -> None:
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._by_run: Dict[bytes, int] = {}
+        self._by_client: Dict[int, array] = defaultdict(lambda: array("I"))
+        self._readers: Dict[int, int] = {}     # segment number → read-only fd
+        self._open_index()
+        self._open_segment()
+
+    # -- Index ------------------------------------------------------------
+
+    def _open_index(self) -> None:
+        path = os.path.join(self.directory, "index.bin")
+        self._index_fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        if os.fstat(self._index_fd).st_size < _ENTRY.size * 1024:
+            os.ftruncate(self._index_fd, _ENTRY.size * 1024)
+        self._index = mmap.mmap(self._index_fd, 0)
+
+        self.count = 0
+        while (self.count + 1) * _ENTRY.size <= len(self._index):
+            run_key, client_key, *_ = _ENTRY.unpack_from(self._index, self.count * _ENTRY.size)
+            if run_key == _EMPTY:
+                break
+            self._by_run[run_key] = self.count
+            self._by_client[client_key].append(self.count)
+            self.count += 1
+
+    def _grow_index(self) -> None:
+        size = len(self._index) * 2
+        self._index.close()
+        os.ftruncate(self._index_fd, size)
+        self._index = mmap.mmap(self._index_fd, 0)
+
+    def _entry(self, n: int) -> Tuple[int, int, int]:
+        _, _, segment, offset, length, _ = _ENTRY.unpack_from(self._index, n * _ENTRY.size)
+        return segment, offset, length
+
+    # -- Segments ---------------------------------------------------------
+
+    def _segment_path(self, segment: int) -> str:
+        return os.path.join(self.directory, f"segment-{segment:06d}.log")
+
+    def _open_segment(self) -> None:
+        segments = [int(name[8:14]) for name in os.listdir(self.directory) if name.startswith("segment-")]
+        self._segment = max(segments, default=1)
+        self._writer = open(self._segment_path(self._segment), "ab")
+
+    def _roll_segment(self) -> None:
+        self._writer.close()
+        self._segment += 1
+        self._writer = open(self._segment_path(self._segment), "ab")
+
+    def _read(self, n: int) -> dict:
+        segment, offset, length = self._entry(n)
+        fd = self._readers.get(segment)
+        if fd is None:
+            fd = self._readers[segment] = os.open(self._segment_path(segment), os.O_RDONLY)
+        return json.loads(os.pread(fd, length, offset))
+
+    # -- Public API -------------------------------------------------------
+
+    def append(self, record: dict) -> None:
+        """Appends one decided run (must carry run_id, client_id and decided_at)."""
+        line = json.dumps(record, ensure_ascii=False, separators=(",", ":")).encode("utf-8") + b"\n"
+        run_key = _run_key(record["run_id"])
+        client_key = _client_key(record["client_id"])
+        with self._lock:
+            if self._writer.tell() + len(line) > self.segment_bytes and self._writer.tell():
+                self._roll_segment()
+            offset = self._writer.tell()
+            self._writer.write(line)
+            self._writer.flush()
+
+            if (self.count + 1) * _ENTRY.size > len(self._index):
+                self._grow_index()
+            _ENTRY.pack_into(
+                self._index, self.count * _ENTRY.size,
+                run_key, client_key, self._segment, offset, len(line), record["decided_at"],
+            )
+            self._by_run[run_key] = self.count
+            self._by_client[client_key].append(self.count)
+            self.count += 1
+
+    def get(self, run_id: str) -> Optional[dict]:
+        with self._lock:
+            n = self._by_run.get(_run_key(run_id))
+            if n is None:
+                return None
+            record = self._read(n)
+        record["position"] = n
+        return record
+
+    def page(self, client_id: Optional[str] = None, before: Optional[int] = None,
+             limit: int = 50) -> Tuple[List[dict], Optional[int], int]:
+        """
+        Newest-first page of decisions, optionally for one client.
+
+        `before` is an exclusive cursor (a position from a previous page's
+        `next_cursor`). Returns (records, next_cursor, total).
+        """
+        with self._lock:
+            if client_id is None:
+                positions = range(self.count)
+            else:
+                positions = self._by_client.get(_client_key(client_id), array("I"))
+            total = len(positions)
+
+            # Positions are ascending: walk backwards from the cursor
+            end = total if before is None else bisect.bisect_left(positions, before)
+            records: List[dict] = []
+            i = end - 1
+            while i >= 0 and len(records) < limit:
+                record = self._read(positions[i])
+                if client_id is None or record["client_id"] == client_id:
+                    record["position"] = positions[i]
+                    records.append(record)
+                i -= 1
+        next_cursor = records[-1]["position"] if records and i >= 0 else None
+        return records, next_cursor, total
+
+    def close(self) -> None:
+        with self._lock:
+            self._writer.close()
+            self._index.flush()
+            for fd in self._readers.values():
+                os.close(fd)
+
+
+def decision_record(run_id: str, state: dict, approved: bool, reason: Optional[str],
+                    escalated_at: float) -> dict:
+    """Builds the history record of a decided run from its final state."""
+    decided_at = time.time()
+    return {
+        "run_id": run_id,
+        "client_id": state["client_id"],
+        "decision": "approved" if approved else "rejected",
+        "reason": reason,
+        "escalated_at": escalated_at,
+        "decided_at": decided_at,
+        "decision_latency_seconds": round(decided_at - escalated_at, 3),
+        "message": state["messages"][-1]["content"],
+        "timestamp": state["timestamp"],
+        "sentiment": state["sentiment"],
+        "intent": state["intent"],
+        "sla_breached": state["sla_breached"],
+        "proposed_action": state["proposed_action"],
+        "supervisor_note": state.get("supervisor_note"),
+        "execution_result": state.get("execution_result"),
+    }
+
+
+# Singleton — None when DECISION_HISTORY_DIR is unset.
+history = (
+    DecisionHistory(settings.DECISION_HISTORY_DIR, settings.DECISION_HISTORY_SEGMENT_BYTES)
+    if settings.DECISION_HISTORY_DIR
+    else None
+)
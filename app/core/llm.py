@@ -0,0 +1,317 @@
+"""
+LLM call layer shared by every agent.
+
+Agents call `invoke()` / `astream()` instead of the LangChain methods
+directly so that cross-cutting concerns live in one place:
+
+  - Recording: when a cassette recorder is active, every request/response
+    pair is appended to the cassette together with its latency.
+  - Replay: when a cassette player is active, the response is served from the
+    cassette and Gemini is never contacted.
+  - Tracing: inside an active run trace, each call is recorded as an `llm`
+    span with the model name and prompt/response token counts.
+  - Latency tracking: every call's duration feeds a time-bounded window per
+    agent (and overall), from which recent percentiles are read — e.g. by the
+    overload controller.
+  - Hedging (opt-in, LLM_HEDGING_ENABLED): a call made with `hedge=True` that
+    has not returned after the agent's recent LLM_HEDGE_PERCENTILE latency is
+    sent a second time and the first response wins. Extra calls are capped by
+    a token bucket refilled by LLM_HEDGE_BUDGET per call. Only for idempotent
+    requests (temperature 0), since either response may be used.
+
+Errors are re-raised unchanged so each agent keeps its own fallback logic.
+"""
+
+import contextvars
+import threading
+import time
+from collections import defaultdict, deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, AsyncIterator, Callable, Deque, Dict, List, Optional, Type
+
+from langchain_core.messages import AIMessage
+from pydantic import BaseModel
+
+from app.core import cassette
+from app.core.config import settings
+from app.core.tracing import LLMUsageCallback, span
+
+
+# ---------------------------------------------------------------------------
+# Recent latency windows
+# ---------------------------------------------------------------------------
+
+class LatencyWindow:
+    """Last N call durations, of which only those newer than `horizon` seconds count."""
+
+    def __init__(self, size: int, horizon: float) -> None:
+        self.horizon = horizon
+        self._samples: Deque[tuple] = deque(maxlen=size)     # (monotonic time, seconds)
+        self._lock = threading.Lock()
+
+    def add(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append((time.monotonic(), seconds))
+
+    def __len__(self) -> int:
+        cutoff = time.monotonic() - self.horizon
+        with self._lock:
+            return sum(1 for t, _ in self._samples if t >= cutoff)
+
+    def percentile(self, q: float) -> Optional[float]:
+        """q-quantile in seconds over the recent samples; None when there are none."""
+        cutoff = time.monotonic() - self.horizon
+        with self._lock:
+            recent = sorted(d for t, d in self._samples if t >= cutoff)
+        if not recent:
+            return None
+        return recent[min(len(recent) - 1, int(q * len(recent)))]
+
+
+# key: agent name, or "all" for every call
+latency: Dict[str, LatencyWindow] = defaultdict(
+    lambda: LatencyWindow(settings.LLM_LATENCY_WINDOW_SIZE, settings.LLM_LATENCY_WINDOW_SECONDS)
+)
+
+
+def observe(agent: str, seconds: float) -> None:
+    """Adds one call duration to the agent's latency window and the overall one."""
+    latency[agent].add(seconds)
+    latency["all"].add(seconds)
+
+
+# ---------------------------------------------------------------------------
+# Request hedging
+# ---------------------------------------------------------------------------
+
+class Hedger:
+    """
+    Sends a duplicate of a slow idempotent call and returns whichever finishes first.
+
+    Both attempts run on a dedicated pool (the caller waits), each in a copy of
+    the caller's context so they record into the same `llm` span. A losing
+    attempt is left to finish in the background; its duration still feeds
+    the per-agent `primary` window, the unhedged latency the hedge is measured
+    against. The hedge delay is a percentile of that window too: the served
+    latency in `latency` is cut short by hedging itself, so a delay derived
+    from it would keep shrinking. Only calls made with `hedge=True` feed it
+    (the Analyst's single classifications; batch calls record under
+    "analyst_batch" and are never hedged).
+    """
+
+    _BURST = 10.0        # most hedges that can be saved up while latency is normal
+
+    def __init__(self, percentile: float, budget: float, min_samples: int, workers: int) -> None:
+        self.percentile = percentile
+        self.budget = budget
+        self.min_samples = min_samples
+        self.primary: Dict[str, LatencyWindow] = defaultdict(
+            lambda: LatencyWindow(settings.LLM_LATENCY_WINDOW_SIZE, settings.LLM_LATENCY_WINDOW_SECONDS)
+        )
+        self.stats: Dict[str, Dict[str, int]] = defaultdict(
+            lambda: {"calls": 0, "hedged": 0, "hedge_wins": 0, "budget_denied": 0}
+        )
+        self._tokens = 1.0
+        self._delays: Dict[str, tuple] = {}      # agent → (computed at, delay or None)
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="llm-hedge")
+        self._lock = threading.Lock()
+
+    def delay(self, agent: str) -> Optional[float]:
+        """Seconds to wait before hedging `agent`'s calls (None: not enough samples yet); refreshed every second."""
+        now = time.monotonic()
+        cached = self._delays.get(agent)
+        if cached is not None and now - cached[0] < 1.0:
+            return cached[1]
+        window = self.primary[agent]
+        value = window.percentile(self.percentile) if len(window) >= self.min_samples else None
+        self._delays[agent] = (now, value)
+        return value
+
+    def _attempt(self, agent: str, fn: Callable[[], Any], primary: bool) -> Future:
+        def timed():
+            started = time.perf_counter()
+            try:
+                return fn()
+            finally:
+                if primary:
+                    self.primary[agent].add(time.perf_counter() - started)
+        return self._pool.submit(contextvars.copy_context().run, timed)
+
+    def call(self, agent: str, fn: Callable[[], Any]) -> Any:
+        delay = self.delay(agent)
+        with self._lock:
+            stats = self.stats[agent]
+            stats["calls"] += 1
+            self._tokens = min(self._tokens + self.budget, self._BURST)
+        if delay is None:
+            started = time.perf_counter()
+            try:
+                return fn()
+            finally:
+                self.primary[agent].add(time.perf_counter() - started)
+
+        first = self._attempt(agent, fn, primary=True)
+        if wait([first], timeout=delay).done:
+            return first.result()
+
+        with self._lock:
+            allowed = self._tokens >= 1.0
+            if allowed:
+                self._tokens -= 1.0
+                stats["hedged"] += 1
+            else:
+                stats["budget_denied"] += 1
+        if not allowed:
+            return first.result()
+
+        second = self._attempt(agent, fn, primary=False)
+        pending = {first, second}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    if future is second:
+                        with self._lock:
+                            stats["hedge_wins"] += 1
+                    return future.result()
+        return first.result()       # both failed: raise the original attempt's error
+
+    def snapshot(self) -> List[dict]:
+        """Per-agent hedge counters and served vs. unhedged tail latency."""
+        def ms(window: LatencyWindow, q: float) -> Optional[float]:
+            value = window.percentile(q)
+            return None if value is None else round(value * 1000, 2)
+
+        with self._lock:
+            stats = {agent: dict(counts) for agent, counts in self.stats.items()}
+        rows = []
+        for agent, counts in sorted(stats.items()):
+            delay = self.delay(agent)
+            served_p99, primary_p99 = ms(latency[agent], 0.99), ms(self.primary[agent], 0.99)
+            rows.append({
+                "agent": agent,
+                **counts,
+                "hedge_rate": counts["hedged"] / counts["calls"] if counts["calls"] else 0.0,
+                "hedge_delay_ms": None if delay is None else round(delay * 1000, 2),
+                "served_p95_ms": ms(latency[agent], 0.95),
+                "served_p99_ms": served_p99,
+                "unhedged_p95_ms": ms(self.primary[agent], 0.95),
+                "unhedged_p99_ms": primary_p99,
+                "p99_saved_ms": (
+                    round(primary_p99 - served_p99, 2)
+                    if served_p99 is not None and primary_p99 is not None else None
+                ),
+            })
+        return rows
+
+
+# Singleton — None unless LLM_HEDGING_ENABLED.
+hedger = (
+    Hedger(
+        percentile=settings.LLM_HEDGE_PERCENTILE,
+        budget=settings.LLM_HEDGE_BUDGET,
+        min_samples=settings.LLM_HEDGE_MIN_SAMPLES,
+        workers=settings.GRAPH_MAX_CONCURRENCY * 2,
+    )
+    if settings.LLM_HEDGING_ENABLED
+    else None
+)
+
+
+def _model_name(llm: Any) -> Optional[str]:
+    """Finds the model name through structured-output wrappers (bindings / sequences)."""
+    for _ in range(4):
+        name = getattr(llm, "model", None)
+        if isinstance(name, str):
+            return name.removeprefix("models/")
+        llm = getattr(llm, "bound", None) or getattr(llm, "first", None)
+        if llm is None:
+            return None
+    return None
+
+
+def _config(current: Any) -> Optional[dict]:
+    return {"callbacks": [LLMUsageCallback(current)]} if current is not None else None
+
+
+def invoke(agent: str, llm: Any, messages: List[dict], *,
+           schema: Optional[Type[BaseModel]] = None, hedge: bool = False) -> Any:
+    """
+    Runs one LLM request on behalf of `agent`.
+
+    `schema` must be given for structured-output runnables so that the
+    response can be serialised to and rebuilt from a cassette.
+    `hedge=True` marks the request as idempotent, allowing the hedger (when
+    enabled) to duplicate it if it is slow.
+    Returns whatever `llm.invoke` returns: a `schema` instance or an AIMessage.
+    """
+    key = cassette.prompt_key(agent, messages)
+
+    with span("llm", agent=agent, model=_model_name(llm)) as current:
+        if cassette.player is not None:
+            if current is not None:
+                current.attributes["replayed"] = True
+            entry = cassette.player.replay(key)
+            if "error" in entry:
+                raise RuntimeError(entry["error"])
+            if schema is not None:
+                return schema.model_validate(entry["response"])
+            return AIMessage(content=entry["response"])
+
+        started = time.perf_counter()
+        try:
+            if hedge and hedger is not None:
+                response = hedger.call(agent, lambda: llm.invoke(messages, config=_config(current)))
+            else:
+                response = llm.invoke(messages, config=_config(current))
+        except Exception as exc:
+            observe(agent, time.perf_counter() - started)
+            if cassette.recorder is not None:
+                cassette.recorder.record_llm(agent, key, time.perf_counter() - started, error=str(exc))
+            raise
+
+        observe(agent, time.perf_counter() - started)
+        if cassette.recorder is not None:
+            serialised = response.model_dump() if schema is not None else response.content
+            cassette.recorder.record_llm(agent, key, time.perf_counter() - started, response=serialised)
+        return response
+
+
+async def astream(agent: str, llm: Any, messages: List[dict]) -> AsyncIterator[str]:
+    """
+    Streams the text of one LLM response on behalf of `agent`, chunk by chunk.
+
+    Recorded exactly like `invoke()` once the stream completes, so streamed
+    and non-streamed calls share cassette entries. On replay the recorded
+    response is yielded as a single chunk.
+    """
+    key = cassette.prompt_key(agent, messages)
+
+    with span("llm", agent=agent, model=_model_name(llm), streamed=True) as current:
+        if cassette.player is not None:
+            if current is not None:
+                current.attributes["replayed"] = True
+            entry = await cassette.player.areplay(key)
+            if "error" in entry:
+                raise RuntimeError(entry["error"])
+            yield entry["response"]
+            return
+
+        started = time.perf_counter()
+        chunks: List[str] = []
+        try:
+            async for chunk in llm.astream(messages, config=_config(current)):
+                if chunk.content:
+                    if not chunks and current is not None:
+                        current.attributes["first_token_ms"] = round((time.perf_counter() - started) * 1000, 2)
+                    chunks.append(chunk.content)
+                    yield chunk.content
+        except Exception as exc:
+            observe(agent, time.perf_counter() - started)
+            if cassette.recorder is not None:
+                cassette.recorder.record_llm(agent, key, time.perf_counter() - started, error=str(exc))
+            raise
+
+        observe(agent, time.perf_counter() - started)
+        if cassette.recorder is not None:
+            cassette.recorder.record_llm(agent, key, time.perf_counter() - started, response="".join(chunks))
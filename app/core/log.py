@@ -0,0 +1,150 @@
+"""
+Structured, non-blocking logging for the agent pipeline.
+
+Replaces the synchronous `print()` calls on the request path:
+
+  - Records are JSON objects carrying `run_id` / `client_id` (bound once per
+    request through context variables), the `node` that emitted them and any
+    structured fields such as `duration_ms`.
+  - Request threads only put records on an in-memory queue (`QueueHandler`);
+    a background `QueueListener` thread does the formatting and the stdout
+    I/O, so a slow log collector never blocks request handling.
+  - Routine success records (INFO and below) are sampled at
+    LOG_SUCCESS_SAMPLE_RATE. Warnings and errors — every fallback path logs
+    at WARNING — are never sampled, and the queue is unbounded so they are
+    never dropped; the listener is drained at interpreter exit.
+
+Usage:
+    logger = get_logger("analyst")
+    logger.info("classified", sentiment="negative", duration_ms=412.0)
+"""
+
+import atexit
+import contextvars
+import copy
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import sys
+from datetime import datetime, timezone
+from typing import Any, Optional
+
+from app.core.config import settings
+
+_run_id: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("run_id", default=None)
+_client_id: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("client_id", default=None)
+
+
+def bind_run(run_id: Optional[str] = None, client_id: Optional[str] = None) -> None:
+    """Binds run_id / client_id for the rest of the current context (e.g. a request task)."""
+    _run_id.set(run_id)
+    _client_id.set(client_id)
+
+
+def bound_run_id() -> Optional[str]:
+    """The run_id bound in the current context, if any."""
+    return _run_id.get()
+
+
+# ---------------------------------------------------------------------------
+# Formatting and filtering
+# ---------------------------------------------------------------------------
+
+class _ContextFilter(logging.Filter):
+    """Captures the context variables on the request thread, before queueing."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.run_id = _run_id.get()
+        record.client_id = getattr(record, "client_id", None) or _client_id.get()
+        return True
+
+
+class _SamplingFilter(logging.Filter):
+    """Drops a share of INFO/DEBUG records; WARNING and above always pass."""
+
+    def __init__(self, rate: float) -> None:
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return record.levelno >= logging.WARNING or self.rate >= 1.0 or random.random() < self.rate
+
+
+class _JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+            "level": record.levelname,
+            "node": getattr(record, "node", record.name),
+            "event": record.getMessage(),
+            "run_id": getattr(record, "run_id", None),
+            "client_id": getattr(record, "client_id", None),
+        }
+        entry.update(getattr(record, "fields", {}))
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class StructuredLogger(logging.LoggerAdapter):
+    """Logger adapter that turns keyword arguments into structured JSON fields."""
+
+    def process(self, msg: Any, kwargs: dict) -> tuple:
+        fields = {k: kwargs.pop(k) for k in list(kwargs) if k not in ("exc_info", "stack_info", "stacklevel", "extra")}
+        extra = {"node": self.extra["node"], "fields": fields}
+        if "client_id" in fields:
+            extra["client_id"] = fields.pop("client_id")
+        kwargs["extra"] = extra
+        return msg, kwargs
+
+
+class _StructuredQueueHandler(logging.handlers.QueueHandler):
+    """
+    Queues records with the message rendered and the traceback kept as
+    `exc_text`. The stock `prepare()` appends the traceback to the message,
+    which would put it in `event` instead of the `exception` field.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = _exception_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+_exception_formatter = logging.Formatter()
+
+
+# ---------------------------------------------------------------------------
+# Pipeline: request thread → queue → listener thread → stdout
+# ---------------------------------------------------------------------------
+
+_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+
+_stdout_handler = logging.StreamHandler(sys.stdout)
+_stdout_handler.setFormatter(_JsonFormatter())
+
+_queue_handler = _StructuredQueueHandler(_queue)
+_queue_handler.addFilter(_SamplingFilter(settings.LOG_SUCCESS_SAMPLE_RATE))
+_queue_handler.addFilter(_ContextFilter())
+
+_root = logging.getLogger("crm")
+_root.setLevel(settings.LOG_LEVEL)
+_root.addHandler(_queue_handler)
+_root.propagate = False
+
+_listener = logging.handlers.QueueListener(_queue, _stdout_handler, respect_handler_level=True)
+_listener.start()
+atexit.register(_listener.stop)     # drains the queue so no record is lost at shutdown
+
+
+def get_logger(node: str) -> StructuredLogger:
+    """Returns the structured logger for a pipeline component (e.g. 'analyst')."""
+    return StructuredLogger(logging.getLogger(f"crm.{node}"), {"node": node})
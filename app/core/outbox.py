@@ -0,0 +1,290 @@
+"""
+Durable outbound delivery of executed responses to the CRM.
+
+Completed runs (auto-executed by the webhook or approved by a supervisor) are
+written to a SQLite outbox by the endpoint, through `run_in_threadpool` so the
+insert never blocks the event loop; that is the only cost the request pays.
+Background workers then deliver them to CRM_CALLBACK_URL:
+
+  - Each worker keeps one persistent HTTP(S) connection (keep-alive) and
+    POSTs up to OUTBOX_BATCH_SIZE deliveries per request as
+    `{"deliveries": [...]}`.
+  - A failed batch is retried with exponential backoff and jitter
+    (OUTBOX_BACKOFF_SECONDS × 2^attempt); after OUTBOX_MAX_ATTEMPTS the rows
+    are dead-lettered and kept for inspection and manual retry.
+  - A batch is never failed as a whole for one bad delivery: when the CRM
+    rejects it (4xx other than 408 / 429), it is split in halves and each
+    half sent on its own, so only the rows that are rejected by themselves
+    are dead-lettered. Other failures (5xx, timeouts) say nothing about a
+    single row, so the batch is retried whole.
+  - Rows claimed by a worker that died are put back on start, so a crash
+    can deliver a batch twice but never loses it — receivers should
+    deduplicate by `run_id`.
+
+Disabled (the `outbox` singleton is None) when CRM_CALLBACK_URL is unset.
+"""
+
+import http.client
+import json
+import random
+import sqlite3
+import threading
+import time
+from typing import List, Optional
+from urllib.parse import urlsplit
+
+from app.agents.state import AgentState
+from app.core.config import settings
+from app.core.log import get_logger
+
+logger = get_logger("outbox")
+
+
+class _Rejected(RuntimeError):
+    """The CRM refused the request (4xx): retrying the same body will not help."""
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id              INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_id          TEXT    NOT NULL,
+    payload         TEXT    NOT NULL,
+    status          TEXT    NOT NULL DEFAULT 'pending',   -- pending | delivering | dead
+    attempts        INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL    NOT NULL,
+    last_error      TEXT,
+    created_at      REAL    NOT NULL
+);
+CREATE INDEX IF NOT EXISTS outbox_due ON outbox (status, next_attempt_at);
+"""
+
+
+class Outbox:
+    """SQLite-backed outbox with a pool of HTTP delivery workers."""
+
+    def __init__(self, db_path: str, callback_url: str, *, token: Optional[str] = None,
+                 batch_size: int = 20, workers: int = 2, max_attempts: int = 8,
+                 backoff: float = 1.0, timeout: float = 10.0) -> None:
+        self.db_path = db_path
+        self.url = urlsplit(callback_url)
+        self.token = token
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.timeout = timeout
+        self.delivered = 0
+        self._local = threading.local()
+        self._wakeup = threading.Condition()
+
+        with self._db() as db:
+            db.executescript(_SCHEMA)
+            db.execute("UPDATE outbox SET status = 'pending' WHERE status = 'delivering'")
+
+        self._workers = [
+            threading.Thread(target=self._work, name=f"outbox-{i}", daemon=True) for i in range(workers)
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    def _db(self) -> sqlite3.Connection:
+        """One connection per thread; WAL keeps enqueue from waiting on deliveries."""
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = self._local.db = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+        return db
+
+    # -- Producer side ------------------------------------------------------
+
+    def enqueue(self, run_id: str, payload: dict) -> None:
+        now = time.time()
+        self._db().execute(
+            "INSERT INTO outbox (run_id, payload, next_attempt_at, created_at) VALUES (?, ?, ?, ?)",
+            (run_id, json.dumps(payload, ensure_ascii=False), now, now),
+        )
+        with self._wakeup:
+            self._wakeup.notify()
+
+    # -- Workers -----------------------------------------------------------
+
+    def _claim(self) -> List[tuple]:
+        db = self._db()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            rows = db.execute(
+                "SELECT id, run_id, payload, attempts FROM outbox "
+                "WHERE status = 'pending' AND next_attempt_at <= ? ORDER BY id LIMIT ?",
+                (time.time(), self.batch_size),
+            ).fetchall()
+            if rows:
+                db.executemany("UPDATE outbox SET status = 'delivering' WHERE id = ?", [(r[0],) for r in rows])
+            db.execute("COMMIT")
+        except Exception:
+            db.execute("ROLLBACK")
+            raise
+        return rows
+
+    def _next_due_in(self) -> float:
+        row = self._db().execute(
+            "SELECT MIN(next_attempt_at) FROM outbox WHERE status = 'pending'"
+        ).fetchone()
+        return 1.0 if row[0] is None else min(max(row[0] - time.time(), 0.0), 1.0)
+
+    def _connection(self) -> http.client.HTTPConnection:
+        conn = getattr(self._local, "http", None)
+        if conn is None:
+            cls = http.client.HTTPSConnection if self.url.scheme == "https" else http.client.HTTPConnection
+            conn = self._local.http = cls(self.url.hostname, self.url.port, timeout=self.timeout)
+        return conn
+
+    def _post(self, body: bytes) -> None:
+        """POSTs over the worker's keep-alive connection, reconnecting once if it went stale."""
+        headers = {"Content-Type": "application/json"}
+        if self.token:
+            headers["Authorization"] = f"Bearer {self.token}"
+        path = self.url.path or "/"
+        if self.url.query:
+            path += "?" + self.url.query
+
+        for attempt in range(2):
+            conn = self._connection()
+            try:
+                conn.request("POST", path, body=body, headers=headers)
+                response = conn.getresponse()
+                response.read()
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                conn.close()
+                self._local.http = None
+                if attempt:
+                    raise
+                continue
+            except Exception:
+                conn.close()
+                self._local.http = None
+                raise
+            if 400 <= response.status < 500 and response.status not in (408, 429):
+                raise _Rejected(f"HTTP {response.status} {response.reason}")
+            if not 200 <= response.status < 300:
+                raise RuntimeError(f"HTTP {response.status} {response.reason}")
+            return
+
+    def _deliver(self, rows: List[tuple]) -> None:
+        body = json.dumps({"deliveries": [json.loads(r[2]) for r in rows]}, ensure_ascii=False).encode("utf-8")
+        db = self._db()
+        try:
+            self._post(body)
+        except Exception as exc:
+            if len(rows) > 1 and isinstance(exc, _Rejected):
+                logger.warning("batch_split", batch=len(rows), error=str(exc))
+                half = len(rows) // 2
+                self._deliver(rows[:half])
+                self._deliver(rows[half:])
+            else:
+                self._fail(rows, str(exc))
+            return
+        db.executemany("DELETE FROM outbox WHERE id = ?", [(r[0],) for r in rows])
+        self.delivered += len(rows)
+        logger.info("delivered", batch=len(rows))
+
+    def _fail(self, rows: List[tuple], error: str) -> None:
+        db = self._db()
+        now = time.time()
+        for row_id, run_id, _, attempts in rows:
+            attempts += 1
+            if attempts >= self.max_attempts:
+                db.execute(
+                    "UPDATE outbox SET status = 'dead', attempts = ?, last_error = ? WHERE id = ?",
+                    (attempts, error, row_id),
+                )
+                logger.error("dead_lettered", delivery_run_id=run_id, attempts=attempts, error=error)
+            else:
+                delay = self.backoff * 2 ** (attempts - 1) * random.uniform(0.5, 1.5)
+                db.execute(
+                    "UPDATE outbox SET status = 'pending', attempts = ?, next_attempt_at = ?, last_error = ? "
+                    "WHERE id = ?",
+                    (attempts, now + delay, error, row_id),
+                )
+        logger.warning("delivery_failed", batch=len(rows), error=error)
+
+    def _work(self) -> None:
+        while True:
+            try:
+                rows = self._claim()
+                if rows:
+                    self._deliver(rows)
+                    continue
+                with self._wakeup:
+                    self._wakeup.wait(timeout=self._next_due_in())
+            except Exception as exc:        # keep the worker alive (e.g. database locked)
+                logger.error("worker_error", error=str(exc))
+                time.sleep(1.0)
+
+    # -- Inspection ----------------------------------------------------------
+
+    def stats(self) -> dict:
+        counts = dict(self._db().execute("SELECT status, COUNT(*) FROM outbox GROUP BY status").fetchall())
+        return {
+            "pending": counts.get("pending", 0) + counts.get("delivering", 0),
+            "dead": counts.get("dead", 0),
+            "delivered": self.delivered,
+        }
+
+    def dead_letters(self, limit: int = 100) -> List[dict]:
+        rows = self._db().execute(
+            "SELECT id, run_id, attempts, last_error, created_at FROM outbox "
+            "WHERE status = 'dead' ORDER BY id LIMIT ?",
+            (limit,),
+        ).fetchall()
+        return [
+            {"id": r[0], "run_id": r[1], "attempts": r[2], "last_error": r[3], "created_at": r[4]}
+            for r in rows
+        ]
+
+    def retry_dead(self, delivery_id: int) -> bool:
+        """Puts a dead-lettered delivery back in the queue with a fresh attempt budget."""
+        cursor = self._db().execute(
+            "UPDATE outbox SET status = 'pending', attempts = 0, next_attempt_at = ? "
+            "WHERE id = ? AND status = 'dead'",
+            (time.time(), delivery_id),
+        )
+        with self._wakeup:
+            self._wakeup.notify()
+        return cursor.rowcount == 1
+
+
+def delivery_payload(run_id: str, status: str, state: AgentState) -> dict:
+    """The document POSTed to the CRM for one completed run."""
+    return {
+        "run_id": run_id,
+        "client_id": state["client_id"],
+        "status": status,
+        "proposed_action": state["proposed_action"],
+        "execution_result": state.get("execution_result"),
+        "completed_at": time.time(),
+    }
+
+
+def deliver(run_id: str, status: str, state: AgentState) -> None:
+    """
+    Queues a completed run for delivery to the CRM (no-op when delivery is
+    disabled). Blocks on a SQLite write: call it through `run_in_threadpool`.
+    """
+    if outbox is not None:
+        outbox.enqueue(run_id, delivery_payload(run_id, status, state))
+
+
+# Singleton — None when CRM_CALLBACK_URL is unset.
+outbox = (
+    Outbox(
+        settings.OUTBOX_DB_PATH,
+        settings.CRM_CALLBACK_URL,
+        token=settings.CRM_CALLBACK_TOKEN,
+        batch_size=settings.OUTBOX_BATCH_SIZE,
+        workers=settings.OUTBOX_WORKERS,
+        max_attempts=settings.OUTBOX_MAX_ATTEMPTS,
+        backoff=settings.OUTBOX_BACKOFF_SECONDS,
+        timeout=settings.OUTBOX_TIMEOUT_SECONDS,
+    )
+    if settings.CRM_CALLBACK_URL
+    else None
+)
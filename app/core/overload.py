@@ -0,0 +1,127 @@
+"""
+Load-adaptive degradation and admission control.
+
+When LLM latency or queue depth rises, the pipeline degrades step by step
+instead of falling over. The current level is the highest one triggered by
+either signal:
+
+    load  = runs in flight + runs queued in the fair scheduler
+    p95   = recent LLM call latency (all agents, last LLM_LATENCY_WINDOW_SECONDS)
+
+    | Level | Name               | Effect                                                   |
+    |-------|--------------------|----------------------------------------------------------|
+    | 0     | normal             | full pipeline                                            |
+    | 1     | no_supervisor_note | Triage sends a structured reason instead of an LLM note  |
+    | 2     | static_responses   | Executor uses the static fallback responses              |
+    | 3     | rule_based_analyst | Analyst classifies with keyword rules, no LLM            |
+    | 4     | reject             | webhook returns 429 with Retry-After                     |
+
+Each level includes the effects of the levels below it. Thresholds are the
+OVERLOAD_LOAD_THRESHOLDS (one value per level 1–4) and
+OVERLOAD_P95_THRESHOLDS_MS (levels 1–3) lists. Latency is a signal of
+overload only under load: it is ignored below OVERLOAD_LATENCY_MIN_LOAD runs
+or OVERLOAD_MIN_SAMPLES recent calls (a few slow calls on an idle service
+must not degrade it), and it never raises the level to reject — only load
+does. Because latency samples expire, a degraded pipeline that stops
+calling the LLM recovers on its own once load falls.
+"""
+
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, List, Optional
+
+from app.core.config import settings
+from app.core.fair_queue import scheduler
+from app.core.llm import latency
+from app.core.log import get_logger
+
+NORMAL             = 0
+NO_SUPERVISOR_NOTE = 1
+STATIC_RESPONSES   = 2
+RULE_BASED_ANALYST = 3
+REJECT             = 4
+
+LEVEL_NAMES = ("normal", "no_supervisor_note", "static_responses", "rule_based_analyst", "reject")
+
+logger = get_logger("overload")
+
+# Level fixed by the caller for the current context (graph worker processes)
+_pinned: ContextVar[Optional[int]] = ContextVar("pinned_degradation_level", default=None)
+
+
+class OverloadController:
+    """Maps live load signals to a degradation level, re-evaluated at most every `refresh` seconds."""
+
+    def __init__(self, load_thresholds: List[int], p95_thresholds_ms: List[float],
+                 latency_min_load: int, min_samples: int, refresh: float = 0.5, enabled: bool = True) -> None:
+        self.load_thresholds = sorted(load_thresholds)
+        self.p95_thresholds_ms = sorted(p95_thresholds_ms)
+        self.latency_min_load = latency_min_load
+        self.min_samples = min_samples
+        self.refresh = refresh
+        self.enabled = enabled
+        self._level = NORMAL
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def _evaluate(self) -> int:
+        load = scheduler.in_flight + scheduler.queued
+        by_load = bisect.bisect_right(self.load_thresholds, load)
+        by_latency = NORMAL
+        window = latency["all"]
+        if load >= self.latency_min_load and len(window) >= self.min_samples:
+            p95 = window.percentile(0.95)
+            if p95 is not None:
+                by_latency = min(bisect.bisect_right(self.p95_thresholds_ms, p95 * 1000), RULE_BASED_ANALYST)
+        return min(max(by_load, by_latency), REJECT)
+
+    def level(self) -> int:
+        pinned = _pinned.get()
+        if pinned is not None:
+            return pinned
+        if not self.enabled:
+            return NORMAL
+        now = time.monotonic()
+        if now - self._checked_at < self.refresh:
+            return self._level
+        with self._lock:
+            if now - self._checked_at >= self.refresh:
+                previous, self._level = self._level, self._evaluate()
+                self._checked_at = now
+                if self._level != previous:
+                    logger.warning(
+                        "degradation_level_changed",
+                        previous=LEVEL_NAMES[previous],
+                        current=LEVEL_NAMES[self._level],
+                        load=scheduler.in_flight + scheduler.queued,
+                    )
+        return self._level
+
+    def at_least(self, level: int) -> bool:
+        return self.level() >= level
+
+    @contextmanager
+    def pinned(self, level: int) -> Iterator[None]:
+        """
+        Uses `level` for the current context. A graph worker process sees
+        neither the API's queue nor its LLM latency, so it runs at the level
+        the API process computed when it dispatched the run.
+        """
+        token = _pinned.set(level)
+        try:
+            yield
+        finally:
+            _pinned.reset(token)
+
+
+# Singleton — consulted by the agent nodes and the endpoints.
+controller = OverloadController(
+    load_thresholds=settings.OVERLOAD_LOAD_THRESHOLDS,
+    p95_thresholds_ms=settings.OVERLOAD_P95_THRESHOLDS_MS,
+    latency_min_load=settings.OVERLOAD_LATENCY_MIN_LOAD,
+    min_samples=settings.OVERLOAD_MIN_SAMPLES,
+    enabled=settings.OVERLOAD_CONTROL_ENABLED,
+)
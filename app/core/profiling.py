@@ -0,0 +1,196 @@
+"""
+On-demand profiling of the live API process.
+
+Two tools, both behind the /debug/profile endpoints, which are only mounted
+when DEBUG_PROFILING_TOKEN is set (otherwise nothing here is installed and
+the request path is unchanged):
+
+  - `sample_stacks(seconds, interval)`: a sampling profiler. Run on a
+    threadpool thread, it reads every other thread's stack through
+    `sys._current_frames()` each `interval` seconds and counts identical
+    stacks. The result is in
+    collapsed-stack format (`thread;outer;…;inner count` per line), ready for
+    flamegraph.pl, speedscope or inferno.
+
+  - `ProfilingMiddleware`: an ASGI middleware that, once armed with `arm(k)`,
+    profiles the next k POST /api/v1/webhook/messages requests. The run's
+    trace (see `app.core.tracing`) supplies the inner timestamps, so the
+    webhook itself is not instrumented. Wall time is split into:
+
+        request_validation      body parsing + WebhookPayload validation
+        queue_wait              fair-scheduler wait
+        event_loop_wait         graph dispatched but not executing: thread or
+                                process hand-off and the wait for the event
+                                loop to resume the handler
+        graph_orchestration     graph execution outside LLM calls (LangGraph,
+                                agent code, prompt building, local classifiers)
+        llm_io                  wall time with at least one LLM call in flight
+        bookkeeping             post-graph writes: pending store, outbox
+                                enqueue, risk profile update
+        response_serialization  response building and ProcessingResponse
+                                validation / JSON encoding, until the first
+                                response byte
+"""
+
+import os
+import sys
+import threading
+import time
+from collections import Counter, deque
+from typing import Deque, List, Optional
+
+from app.core.config import settings
+from app.core.log import bound_run_id
+from app.core.tracing import tracer
+
+_PROFILED_PATH = "/api/v1/webhook/messages"
+
+
+# ---------------------------------------------------------------------------
+# Sampling profiler
+# ---------------------------------------------------------------------------
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    path = code.co_filename
+    short = os.path.join(os.path.basename(os.path.dirname(path)), os.path.basename(path))
+    return f"{code.co_name} ({short}:{code.co_firstlineno})".replace(";", ":")
+
+
+def sample_stacks(seconds: float, interval: float) -> str:
+    """Samples all other threads' stacks for `seconds`; returns collapsed stacks, hottest first."""
+    counts: Counter = Counter()
+    me = threading.get_ident()
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        names = {t.ident: t.name for t in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == me:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(_frame_label(frame))
+                frame = frame.f_back
+            stack.append(names.get(ident, f"thread-{ident}"))
+            counts[";".join(reversed(stack))] += 1
+        time.sleep(interval)
+    return "".join(f"{stack} {count}\n" for stack, count in counts.most_common())
+
+
+# ---------------------------------------------------------------------------
+# Per-request phase breakdown
+# ---------------------------------------------------------------------------
+
+def _union_ns(intervals: List[tuple]) -> int:
+    """Total length covered by possibly overlapping (start, end) intervals."""
+    total, reach = 0, None
+    for start, end in sorted(intervals):
+        if reach is None or start > reach:
+            total += end - start
+            reach = end
+        elif end > reach:
+            total += end - reach
+            reach = end
+    return total
+
+
+def _breakdown(run_id: str, started_ns: int, response_ns: int, finished_ns: int) -> dict:
+    """Splits one request's wall time into phases using its run trace."""
+    profile = {
+        "run_id": run_id,
+        "profiled_at": started_ns / 1e9,
+        "total_ms": (finished_ns - started_ns) / 1e6,
+    }
+    trace = tracer.get(run_id) if run_id else None
+    root = next((s for s in trace.spans if s.parent_id is None), None) if trace is not None else None
+    if root is None or root.end_ns is None:
+        return profile
+
+    spans = [s for s in trace.spans if s.end_ns is not None]
+    queue = next((s for s in spans if s.name == "queue_wait"), None)
+    dispatched = queue.end_ns if queue is not None else root.start_ns
+
+    # Execution window: the worker's root span in process mode, else first to last graph node
+    worker = next((s for s in spans if s.name == "worker"), None)
+    nodes = [s for s in spans if s.parent_id == root.span_id and s.name not in ("queue_wait", "bookkeeping")]
+    if worker is not None:
+        run_start, run_end = worker.start_ns, worker.end_ns
+    elif nodes:
+        run_start, run_end = min(s.start_ns for s in nodes), max(s.end_ns for s in nodes)
+    else:
+        run_start = run_end = dispatched
+
+    bookkeeping = next((s for s in spans if s.name == "bookkeeping" and s.parent_id == root.span_id), None)
+    post_start = bookkeeping.start_ns if bookkeeping is not None else root.end_ns
+    post_end = bookkeeping.end_ns if bookkeeping is not None else root.end_ns
+
+    llm = _union_ns([
+        (max(s.start_ns, run_start), min(s.end_ns, run_end))
+        for s in spans if s.name == "llm" and s.end_ns > run_start and s.start_ns < run_end
+    ])
+    profile.update({
+        "request_validation_ms": (root.start_ns - started_ns) / 1e6,
+        "queue_wait_ms": (dispatched - root.start_ns) / 1e6,
+        "event_loop_wait_ms": ((run_start - dispatched) + (post_start - run_end)) / 1e6,
+        "graph_orchestration_ms": (run_end - run_start - llm) / 1e6,
+        "llm_io_ms": llm / 1e6,
+        "bookkeeping_ms": (post_end - post_start) / 1e6,
+        "response_serialization_ms": (response_ns - post_end) / 1e6,
+    })
+    return profile
+
+
+class RequestProfiles:
+    """Arming counter and recent results of per-request profiling."""
+
+    def __init__(self, capacity: int = 100) -> None:
+        self.armed = 0
+        self.profiles: Deque[dict] = deque(maxlen=capacity)
+        self._lock = threading.Lock()
+
+    def arm(self, count: int) -> None:
+        with self._lock:
+            self.armed = count
+
+    def claim(self) -> bool:
+        with self._lock:
+            if self.armed <= 0:
+                return False
+            self.armed -= 1
+            return True
+
+
+class ProfilingMiddleware:
+    """ASGI middleware profiling the next armed webhook requests into `profiles`."""
+
+    def __init__(self, app, profiles: RequestProfiles) -> None:
+        self.app = app
+        self.profiles = profiles
+
+    async def __call__(self, scope, receive, send) -> None:
+        if (self.profiles.armed <= 0 or scope["type"] != "http" or scope["method"] != "POST"
+                or scope["path"] != _PROFILED_PATH or not self.profiles.claim()):
+            await self.app(scope, receive, send)
+            return
+
+        started_ns = time.time_ns()
+        response_ns: Optional[int] = None
+
+        async def timed_send(message) -> None:
+            nonlocal response_ns
+            if message["type"] == "http.response.start":
+                response_ns = time.time_ns()
+            await send(message)
+
+        try:
+            await self.app(scope, receive, timed_send)
+        finally:
+            # The endpoint ran in this request's task, so the run_id it bound is visible here
+            finished_ns = time.time_ns()
+            self.profiles.profiles.append(
+                _breakdown(bound_run_id(), started_ns, response_ns or finished_ns, finished_ns)
+            )
+
+
+# Singleton — None (and no middleware installed) unless DEBUG_PROFILING_TOKEN is set.
+request_profiles = RequestProfiles() if settings.DEBUG_PROFILING_TOKEN else None
@@ -0,0 +1,131 @@
+"""
+Per-client risk profiles for Triage routing.
+
+Each client_id has one slotted `RiskProfile` of exponentially decayed
+counters (half-life CLIENT_RISK_HALF_LIFE_HOURS):
+
+    negative    negative-sentiment messages
+    refunds     refund requests
+    escalations runs escalated to a supervisor
+    rejections  supervisor rejections (`decide_action` with approved=False)
+
+A decayed counter is stored as its value at `updated_at`; decaying it to
+`now` is one multiplication by 0.5 ** (elapsed / half_life), so both an
+update and a lookup are O(1) and never read past messages or decisions.
+
+The API process updates a profile when a run finishes and when a supervisor
+decides, and puts `snapshot(client_id)` in the initial state of each new run
+(`client_risk`). Runs whose sentiment and intent were not actually measured
+(keyword rules under overload, the Analyst's placeholder defaults) are not
+counted, so degrading the pipeline never inflates a client's history. Triage only reads that precomputed snapshot, which also
+works when graphs run in worker processes.
+
+Profiles are kept in memory, least recently updated evicted first beyond
+CLIENT_RISK_MAX_CLIENTS; they are rebuilt from live traffic after a restart.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+
+from app.core.config import settings
+
+
+@dataclass(slots=True)
+class RiskProfile:
+    negative: float = 0.0
+    refunds: float = 0.0
+    escalations: float = 0.0
+    rejections: float = 0.0
+    updated_at: float = 0.0
+
+    def decay(self, now: float, half_life: float) -> None:
+        factor = 0.5 ** (max(now - self.updated_at, 0.0) / half_life)
+        self.negative *= factor
+        self.refunds *= factor
+        self.escalations *= factor
+        self.rejections *= factor
+        self.updated_at = now
+
+
+class RiskProfiles:
+    """Bounded map of client_id → RiskProfile with O(1) updates and lookups."""
+
+    def __init__(self, half_life_hours: float, negative_threshold: float, refund_threshold: float,
+                 rejection_threshold: float, max_clients: int) -> None:
+        self.half_life = half_life_hours * 3600
+        self.negative_threshold = negative_threshold
+        self.refund_threshold = refund_threshold
+        self.rejection_threshold = rejection_threshold
+        self.max_clients = max_clients
+        self._profiles: "OrderedDict[str, RiskProfile]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _touch(self, client_id: str, now: float) -> RiskProfile:
+        """Returns the client's profile decayed to `now`, creating it if needed (lock held)."""
+        profile = self._profiles.get(client_id)
+        if profile is None:
+            profile = self._profiles[client_id] = RiskProfile(updated_at=now)
+            while len(self._profiles) > self.max_clients:
+                self._profiles.popitem(last=False)
+        else:
+            self._profiles.move_to_end(client_id)
+            profile.decay(now, self.half_life)
+        return profile
+
+    def record_run(self, client_id: str, sentiment: str, intent: str, escalated: bool) -> None:
+        now = time.time()
+        with self._lock:
+            profile = self._touch(client_id, now)
+            profile.negative += sentiment == "negative"
+            profile.refunds += intent == "refund_request"
+            profile.escalations += escalated
+
+    def record_decision(self, client_id: str, approved: bool) -> None:
+        if approved:
+            return
+        with self._lock:
+            self._touch(client_id, time.time()).rejections += 1
+
+    def snapshot(self, client_id: str) -> Optional[dict]:
+        """
+        The client's counters decayed to now, plus the routing flags Triage
+        consults; None for a client without history.
+        """
+        with self._lock:
+            profile = self._profiles.get(client_id)
+            if profile is None:
+                return None
+            factor = 0.5 ** (max(time.time() - profile.updated_at, 0.0) / self.half_life)
+            negative    = profile.negative * factor
+            refunds     = profile.refunds * factor
+            escalations = profile.escalations * factor
+            rejections  = profile.rejections * factor
+
+        reasons = []
+        if negative >= self.negative_threshold:
+            reasons.append("repeated negative messages")
+        if refunds >= self.refund_threshold:
+            reasons.append("repeated refund requests")
+        if rejections >= self.rejection_threshold:
+            reasons.append("recent supervisor rejections")
+        return {
+            "negative": round(negative, 3),
+            "refunds": round(refunds, 3),
+            "escalations": round(escalations, 3),
+            "rejections": round(rejections, 3),
+            "elevated": bool(reasons),
+            "reasons": reasons,
+        }
+
+
+# Singleton — updated and read by the API process only.
+risk_profiles = RiskProfiles(
+    half_life_hours=settings.CLIENT_RISK_HALF_LIFE_HOURS,
+    negative_threshold=settings.CLIENT_RISK_NEGATIVE_THRESHOLD,
+    refund_threshold=settings.CLIENT_RISK_REFUND_THRESHOLD,
+    rejection_threshold=settings.CLIENT_RISK_REJECTION_THRESHOLD,
+    max_clients=settings.CLIENT_RISK_MAX_CLIENTS,
+)
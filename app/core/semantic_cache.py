@@ -0,0 +1,199 @@
+"""
+Semantic response cache for Executor drafts.
+
+Paraphrased client messages ("my package never arrived" / "order not delivered
+yet") produce near-identical responses. This cache embeds each message locally
+on the CPU — hashed character n-grams projected into a fixed-size, L2-normalised
+NumPy vector — and reuses a previously approved draft when a new message is
+similar enough.
+
+Design:
+  - The index is partitioned by (proposed_action, language): a refund
+    confirmation is never served for a standard acknowledgement, and an
+    English draft is never served to a Spanish-speaking client.
+  - Drafts quote the client's specifics (name, order number, amount), so a
+    draft is only reused for the same client_id and for a message with the
+    same numbers in it. Rows of other clients are masked out of the dot
+    product rather than given their own partitions, so memory stays bounded
+    by the number of (action, language) pairs.
+  - Each partition is a preallocated (capacity × dim) float32 matrix, so a
+    lookup is a single vectorised dot product — cosine similarity, since all
+    rows are unit length — followed by an O(capacity) top-k selection.
+  - Capacity is bounded per partition; when full, the least recently used
+    row is overwritten in place.
+"""
+
+import re
+import threading
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+
+
+# ---------------------------------------------------------------------------
+# Local embedding — no model download, no network, deterministic across runs
+# ---------------------------------------------------------------------------
+
+_NGRAM_SIZES = (3, 4)
+_NON_WORD = re.compile(r"[^\w]+")
+_NUMBERS = re.compile(r"\d+")
+
+_SPANISH_HINTS = frozenset({
+    "el", "la", "los", "las", "de", "que", "y", "en", "un", "una", "mi", "por",
+    "para", "con", "no", "es", "pedido", "reembolso", "gracias", "hola", "necesito",
+})
+_SPANISH_CHARS = re.compile(r"[ñáéíóú¿¡]")
+
+
+def detect_language(text: str) -> str:
+    """Cheap EN/ES heuristic used only to partition the cache."""
+    lowered = text.lower()
+    if _SPANISH_CHARS.search(lowered):
+        return "es"
+    words = _NON_WORD.split(lowered)
+    hits = sum(1 for w in words if w in _SPANISH_HINTS)
+    return "es" if hits >= 2 else "en"
+
+
+def specifics(text: str) -> Tuple[str, ...]:
+    """The numbers in a message (order ids, amounts, dates); a reused draft must match them."""
+    return tuple(sorted(_NUMBERS.findall(text)))
+
+
+def _owner(client_id: str) -> int:
+    return zlib.crc32(client_id.encode())
+
+
+def embed(text: str, dim: int) -> np.ndarray:
+    """Signed feature hashing of character n-grams, L2-normalised."""
+    normalised = " " + _NON_WORD.sub(" ", text.lower()).strip() + " "
+    grams = [
+        normalised[i:i + n]
+        for n in _NGRAM_SIZES
+        for i in range(len(normalised) - n + 1)
+    ]
+    vector = np.zeros(dim, dtype=np.float32)
+    if not grams:
+        return vector
+
+    hashes = np.fromiter((zlib.crc32(g.encode()) for g in grams), dtype=np.uint32, count=len(grams))
+    signs = np.where(hashes & 0x80000000, -1.0, 1.0).astype(np.float32)
+    np.add.at(vector, hashes % dim, signs)
+
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+# ---------------------------------------------------------------------------
+# Index partition
+# ---------------------------------------------------------------------------
+
+class _Partition:
+    """Fixed-capacity cosine index with LRU replacement."""
+
+    def __init__(self, capacity: int, dim: int) -> None:
+        self.vectors = np.zeros((capacity, dim), dtype=np.float32)
+        self.last_used = np.zeros(capacity, dtype=np.int64)
+        self.owners = np.zeros(capacity, dtype=np.uint32)     # crc32 of the client_id
+        self.drafts: List[Optional[str]] = [None] * capacity
+        self.keys: List[Optional[tuple]] = [None] * capacity  # (client_id, specifics)
+        self.size = 0
+
+    def search(self, query: np.ndarray, k: int, owner: int) -> List[Tuple[float, int]]:
+        """Top-k rows of `owner` by cosine similarity."""
+        if self.size == 0:
+            return []
+        scores = np.where(self.owners[:self.size] == owner, self.vectors[:self.size] @ query, -1.0)
+        k = min(k, self.size)
+        top = np.argpartition(scores, -k)[-k:]
+        top = top[np.argsort(scores[top])[::-1]]
+        return [(float(scores[i]), int(i)) for i in top]
+
+    def insert(self, vector: np.ndarray, key: tuple, draft: str, tick: int) -> None:
+        if self.size < len(self.drafts):
+            slot = self.size
+            self.size += 1
+        else:
+            slot = int(np.argmin(self.last_used))   # least recently used
+        self.vectors[slot] = vector
+        self.owners[slot] = _owner(key[0])
+        self.keys[slot] = key
+        self.drafts[slot] = draft
+        self.last_used[slot] = tick
+
+
+# ---------------------------------------------------------------------------
+# Cache
+# ---------------------------------------------------------------------------
+
+class SemanticCache:
+    """Thread-safe semantic cache keyed by (proposed_action, language), reused per client."""
+
+    def __init__(self, threshold: float, capacity: int, dim: int) -> None:
+        self.threshold = threshold
+        self.capacity = capacity
+        self.dim = dim
+        self._partitions: Dict[Tuple[str, str], _Partition] = {}
+        self._lock = threading.Lock()
+        self._tick = 0
+        self.hits = 0
+        self.misses = 0
+
+    def _match(self, client_id: str, action: str, message: str) -> Tuple[Optional[_Partition], Optional[int]]:
+        """The partition and slot of a reusable draft, if any (lock held)."""
+        partition = self._partitions.get((action, detect_language(message)))
+        if partition is None:
+            return None, None
+        key = (client_id, specifics(message))
+        for score, slot in partition.search(embed(message, self.dim), 3, _owner(client_id)):
+            if score < self.threshold:
+                break
+            if partition.keys[slot] == key:
+                return partition, slot
+        return partition, None
+
+    def contains(self, client_id: str, action: str, message: str) -> bool:
+        """True if `get` would return a draft; leaves hit/miss counts and LRU order untouched."""
+        with self._lock:
+            return self._match(client_id, action, message)[1] is not None
+
+    def get(self, client_id: str, action: str, message: str) -> Optional[str]:
+        """Returns a draft stored for this client if one is at least `threshold` similar, else None."""
+        with self._lock:
+            partition, slot = self._match(client_id, action, message)
+            if slot is not None:
+                self._tick += 1
+                partition.last_used[slot] = self._tick
+                self.hits += 1
+                return partition.drafts[slot]
+            self.misses += 1
+            return None
+
+    def put(self, client_id: str, action: str, message: str, draft: str) -> None:
+        vector = embed(message, self.dim)
+        key = (action, detect_language(message))
+        with self._lock:
+            partition = self._partitions.get(key)
+            if partition is None:
+                partition = self._partitions[key] = _Partition(self.capacity, self.dim)
+            self._tick += 1
+            partition.insert(vector, (client_id, specifics(message)), draft, self._tick)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return sum(p.size for p in self._partitions.values())
+
+
+# Singleton — None when the cache is disabled (opt-in via settings).
+executor_cache: Optional[SemanticCache] = (
+    SemanticCache(
+        threshold=settings.EXECUTOR_CACHE_THRESHOLD,
+        capacity=settings.EXECUTOR_CACHE_MAX_ENTRIES,
+        dim=settings.EXECUTOR_CACHE_DIM,
+    )
+    if settings.EXECUTOR_CACHE_ENABLED
+    else None
+)
@@ -1,11 +1,327 @@
 """
 In-memory store for pending human-approval requests.
 
+Each escalated run is kept as a compact, slotted `PendingApproval` record
+instead of the full `AgentState` dict: enum-like fields are interned so that
+100k pending items share a handful of string objects, the timestamp is held
+as epoch seconds plus its UTC offset (so it is returned exactly as it was
+submitted), and the client message body is stored once (not wrapped in
+a messages list of dicts).
+
+The store is bounded (PENDING_MAX_ITEMS, PENDING_TTL_SECONDS). Records are
+kept in insertion order, so the oldest one is always at the head: every
+write and listing pops expired or overflowing records from the head
+(amortized O(1) per record) into a cold-tier archive. The archive is an
+append-only file of gzip members (one per block of evicted records) with a
+plain-text run_id → offset sidecar index, so an archived run can still be
+looked up or restored by run_id.
+
 NOTE: This is an MVP/demo store. In production, replace with Redis or a
 persistent database so that state survives server restarts and scales
 across multiple workers.
 """
-from typing import Dict, Any
+import atexit
+import gzip
+import json
+import os
+import sys
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from app.agents.state import AgentState
+from app.core.config import settings
+from app.core.log import get_logger
+
+logger = get_logger("store")
+
+
+def _epoch(timestamp_iso: str) -> Tuple[float, Optional[int]]:
+    """ISO 8601 → (epoch seconds, UTC offset in seconds or None if naive; naive is read as UTC)."""
+    parsed = datetime.fromisoformat(timestamp_iso)
+    if parsed.tzinfo is None:
+        return parsed.replace(tzinfo=timezone.utc).timestamp(), None
+    return parsed.timestamp(), int(parsed.utcoffset().total_seconds())
+
+
+def _iso(epoch_seconds: float, utc_offset: Optional[int] = 0) -> str:
+    """Epoch seconds → ISO 8601 string at `utc_offset` seconds from UTC (None: naive UTC)."""
+    if utc_offset is None:
+        return datetime.fromtimestamp(epoch_seconds, tz=timezone.utc).replace(tzinfo=None).isoformat()
+    return datetime.fromtimestamp(epoch_seconds, tz=timezone(timedelta(seconds=utc_offset))).isoformat()
+
+
+# ---------------------------------------------------------------------------
+# Pending record
+# ---------------------------------------------------------------------------
+
+@dataclass(slots=True)
+class PendingApproval:
+    """
+    Compact representation of an escalated run waiting for a supervisor.
+
+    Only the fields a supervisor decision needs are kept; `human_approved`
+    and `execution_result` are always None while pending and are rebuilt by
+    `to_state()`.
+    """
+
+    client_id: str
+    message: str
+    timestamp: float                # epoch seconds of the original message
+    sentiment: str                  # interned
+    intent: str                     # interned
+    sla_breached: bool
+    proposed_action: str            # interned
+    supervisor_note: Optional[str]
+    draft_response: Optional[str] = None    # pre-drafted Executor response (SLA breaches)
+    enqueued_at: float = field(default_factory=time.time)   # epoch seconds it entered the store (reset on restore)
+    escalated_at: float = field(default_factory=time.time)  # epoch seconds it was first escalated (kept on restore)
+    utc_offset: Optional[int] = 0   # offset of the submitted timestamp, in seconds (None: it was naive)
+
+    @classmethod
+    def from_state(cls, state: AgentState) -> "PendingApproval":
+        timestamp, utc_offset = _epoch(state["timestamp"])
+        return cls(
+            client_id=state["client_id"],
+            message=state["messages"][-1]["content"],
+            timestamp=timestamp,
+            utc_offset=utc_offset,
+            sentiment=sys.intern(state["sentiment"]),
+            intent=sys.intern(state["intent"]),
+            sla_breached=state["sla_breached"],
+            proposed_action=sys.intern(state["proposed_action"]),
+            supervisor_note=state.get("supervisor_note"),
+            draft_response=state.get("draft_response"),
+        )
+
+    @property
+    def timestamp_iso(self) -> str:
+        return _iso(self.timestamp, self.utc_offset)
+
+    def to_state(self) -> AgentState:
+        """Rebuild the full `AgentState` expected by the agent nodes."""
+        return {
+            "client_id": self.client_id,
+            "messages": [{"role": "user", "content": self.message}],
+            "timestamp": self.timestamp_iso,
+            "sentiment": self.sentiment,
+            "intent": self.intent,
+            "sla_breached": self.sla_breached,
+            "proposed_action": self.proposed_action,
+            "supervisor_note": self.supervisor_note,
+            "draft_response": self.draft_response,
+            "human_approved": None,
+            "execution_result": None,
+        }
+
+
+# ---------------------------------------------------------------------------
+# Cold-tier archive
+# ---------------------------------------------------------------------------
+
+class PendingArchive:
+    """
+    Append-only gzip archive of evicted pending records.
+
+    Evicted records are buffered and written as one gzip member per
+    `block_size` records, or at most `flush_interval` seconds after the first
+    buffered one (so a crash loses at most that much); the sidecar
+    `<path>.idx` maps each run_id to the byte offset of its member. A restored
+    run gets a tombstone line in the index, so it is not served from the
+    archive again.
+    """
+
+    def __init__(self, path: str, block_size: int = 64, flush_interval: float = 1.0) -> None:
+        self.path = path
+        self.block_size = block_size
+        self.flush_interval = flush_interval
+        self._index: Dict[str, int] = {}
+        self._buffer: List[dict] = []
+        self._timer: Optional[threading.Timer] = None
+        self._lock = threading.Lock()
+        self._load_index()
+
+    def _load_index(self) -> None:
+        if not os.path.exists(self.path + ".idx"):
+            return
+        with open(self.path + ".idx", encoding="utf-8") as fh:
+            for line in fh:
+                run_id, _, offset = line.rstrip("\n").partition("\t")
+                if offset == "-1":
+                    self._index.pop(run_id, None)
+                elif offset:
+                    self._index[run_id] = int(offset)
+
+    def __len__(self) -> int:
+        return len(self._index) + len(self._buffer)
+
+    def add(self, run_id: str, record: PendingApproval, reason: str) -> None:
+        entry = {"run_id": run_id, "reason": reason, "archived_at": time.time(), **asdict(record)}
+        with self._lock:
+            self._buffer.append(entry)
+            if len(self._buffer) >= self.block_size:
+                self._write_block()
+            elif self._timer is None:
+                self._timer = threading.Timer(self.flush_interval, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def flush(self) -> None:
+        with self._lock:
+            if self._buffer:
+                self._write_block()
+
+    def _write_block(self) -> None:
+        payload = "".join(json.dumps(e, ensure_ascii=False) + "\n" for e in self._buffer)
+        with open(self.path, "ab") as fh:
+            offset = fh.tell()
+            fh.write(gzip.compress(payload.encode("utf-8")))
+        with open(self.path + ".idx", "a", encoding="utf-8") as fh:
+            fh.writelines(f"{e['run_id']}\t{offset}\n" for e in self._buffer)
+        for e in self._buffer:
+            self._index[e["run_id"]] = offset
+        self._buffer.clear()
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+    def _read_entry(self, run_id: str) -> Optional[dict]:
+        for e in self._buffer:
+            if e["run_id"] == run_id:
+                return e
+        offset = self._index.get(run_id)
+        if offset is None:
+            return None
+        with open(self.path, "rb") as fh:
+            fh.seek(offset)
+            # Decompress just this member; anything after it belongs to later blocks
+            decoder = zlib.decompressobj(wbits=31)
+            data = b""
+            while not decoder.eof and (chunk := fh.read(65536)):
+                data += decoder.decompress(chunk)
+        for line in data.decode("utf-8").splitlines():
+            e = json.loads(line)
+            if e["run_id"] == run_id:
+                return e
+        return None
+
+    def get(self, run_id: str) -> Optional[Tuple[PendingApproval, dict]]:
+        """Returns (record, {reason, archived_at (ISO 8601)}) for an archived run, or None."""
+        with self._lock:
+            entry = self._read_entry(run_id)
+        if entry is None:
+            return None
+        meta = {"reason": entry.pop("reason"), "archived_at": _iso(entry.pop("archived_at"))}
+        entry.pop("run_id")
+        entry.setdefault("escalated_at", entry["enqueued_at"])     # archived before the field existed
+        for key in ("sentiment", "intent", "proposed_action"):
+            entry[key] = sys.intern(entry[key])
+        return PendingApproval(**entry), meta
+
+    def remove(self, run_id: str) -> None:
+        with self._lock:
+            self._buffer = [e for e in self._buffer if e["run_id"] != run_id]
+            if self._index.pop(run_id, None) is not None:
+                with open(self.path + ".idx", "a", encoding="utf-8") as fh:
+                    fh.write(f"{run_id}\t-1\n")
+
+
+# ---------------------------------------------------------------------------
+# Bounded pending store
+# ---------------------------------------------------------------------------
+
+class PendingStore:
+    """
+    run_id → PendingApproval, bounded by capacity and TTL.
+
+    Insertion order equals `enqueued_at` order, so eviction only ever looks
+    at the head of the OrderedDict. Evicted records are handed to the archive
+    after the store lock is released, so its disk writes never block readers.
+    """
+
+    def __init__(self, max_items: int, ttl_seconds: float, archive: Optional[PendingArchive]) -> None:
+        self.max_items = max_items
+        self.ttl_seconds = ttl_seconds
+        self.archive = archive
+        self._items: "OrderedDict[str, PendingApproval]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _evict(self) -> List[Tuple[str, PendingApproval, str]]:
+        """Removes expired and overflowing records from the head (lock held); returns them."""
+        evicted = []
+        deadline = time.time() - self.ttl_seconds
+        while self._items:
+            run_id, record = next(iter(self._items.items()))
+            if record.enqueued_at < deadline:
+                reason = "ttl"
+            elif len(self._items) > self.max_items:
+                reason = "capacity"
+            else:
+                break
+            del self._items[run_id]
+            evicted.append((run_id, record, reason))
+        return evicted
+
+    def _archive(self, evicted: List[Tuple[str, PendingApproval, str]]) -> None:
+        """Moves records returned by `_evict` to the archive (lock not held)."""
+        for run_id, record, reason in evicted:
+            if self.archive is not None:
+                self.archive.add(run_id, record, reason)
+            logger.info("pending_archived", reason=reason, archived_run_id=run_id)
+
+    def __setitem__(self, run_id: str, record: PendingApproval) -> None:
+        with self._lock:
+            self._items.pop(run_id, None)
+            self._items[run_id] = record
+            evicted = self._evict()
+        self._archive(evicted)
+
+    def get(self, run_id: str) -> Optional[PendingApproval]:
+        with self._lock:
+            evicted = self._evict()
+            record = self._items.get(run_id)
+        self._archive(evicted)
+        return record
+
+    def pop(self, run_id: str) -> Optional[PendingApproval]:
+        """Removes and returns a live record; an expired one is archived instead and None returned."""
+        with self._lock:
+            evicted = self._evict()
+            record = self._items.pop(run_id, None)
+        self._archive(evicted)
+        return record
+
+    def items(self) -> Iterator[Tuple[str, PendingApproval]]:
+        with self._lock:
+            evicted = self._evict()
+            items = list(self._items.items())
+        self._archive(evicted)
+        return iter(items)
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def restore(self, run_id: str) -> Optional[PendingApproval]:
+        """Moves an archived run back into the pending queue with a fresh TTL."""
+        found = self.archive.get(run_id) if self.archive is not None else None
+        if found is None:
+            return None
+        record, _ = found
+        record.enqueued_at = time.time()
+        self.archive.remove(run_id)
+        self[run_id] = record
+        return record
+
 
-# key: run_id (str)  →  value: AgentState dict
-pending_approvals: Dict[str, Dict[str, Any]] = {}
+# Singleton — key: run_id (str)  →  value: PendingApproval record
+pending_approvals = PendingStore(
+    max_items=settings.PENDING_MAX_ITEMS,
+    ttl_seconds=settings.PENDING_TTL_SECONDS,
+    archive=PendingArchive(settings.PENDING_ARCHIVE_PATH) if settings.PENDING_ARCHIVE_PATH else None,
+)
+if pending_approvals.archive is not None:
+    atexit.register(pending_approvals.archive.flush)
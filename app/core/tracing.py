@@ -0,0 +1,265 @@
+"""
+Per-run trace timelines.
+
+Every run records a span tree:
+
+    graph | decide                 (root: one per webhook call / supervisor decision)
+      ├─ analyst / sla_check / triage / executor    (one per graph node)
+      │    ├─ llm                       (model, prompt/response tokens)
+      │    └─ analyst-batch             (a micro-batched call shared with other runs)
+      │         └─ llm
+      └─ bookkeeping                    (pending store, outbox and risk profile updates)
+
+Traces are kept in a bounded in-memory ring keyed by `run_id` (oldest evicted
+first, TRACE_BUFFER_SIZE entries) and served by GET /api/v1/runs/{run_id}/trace.
+When TRACE_EXPORT_PATH is set, each finished root span also appends the
+spans its run recorded since the previous export to that file, as one
+OTLP/JSON `resourceSpans` document per line; a run that is escalated and
+later decided therefore writes two lines that share a trace id, with no span
+written twice.
+
+Span nesting follows context variables, so it survives the thread hops made
+by `run_in_threadpool` and LangGraph's node executor. Outside of an active
+trace, `span()` is a no-op.
+"""
+
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from app.core.config import settings
+
+
+@dataclass(slots=True)
+class Span:
+    span_id: str
+    parent_id: Optional[str]
+    name: str
+    start_ns: int
+    end_ns: Optional[int] = None
+    attributes: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def duration_ms(self) -> Optional[float]:
+        return None if self.end_ns is None else (self.end_ns - self.start_ns) / 1e6
+
+
+@dataclass(slots=True)
+class Trace:
+    run_id: str
+    client_id: Optional[str]
+    spans: List[Span] = field(default_factory=list)
+    exported: int = 0       # spans already written to TRACE_EXPORT_PATH
+
+
+# (trace, id of the innermost open span) for the current context
+_active: ContextVar[Optional[tuple]] = ContextVar("active_trace", default=None)
+
+
+# ---------------------------------------------------------------------------
+# Tracer
+# ---------------------------------------------------------------------------
+
+class Tracer:
+    """Bounded store of recent traces, keyed by run_id."""
+
+    def __init__(self, capacity: int, export_path: Optional[str] = None) -> None:
+        self.capacity = capacity
+        self.export_path = export_path
+        self._traces: "OrderedDict[str, Trace]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, run_id: str) -> Optional[Trace]:
+        with self._lock:
+            return self._traces.get(run_id)
+
+    def pop(self, run_id: str) -> Optional[Trace]:
+        with self._lock:
+            return self._traces.pop(run_id, None)
+
+    def _get_or_create(self, run_id: str, client_id: Optional[str]) -> Trace:
+        with self._lock:
+            trace = self._traces.get(run_id)
+            if trace is None:
+                trace = self._traces[run_id] = Trace(run_id, client_id)
+                while len(self._traces) > self.capacity:
+                    self._traces.popitem(last=False)
+            return trace
+
+    @contextmanager
+    def trace(self, run_id: str, client_id: Optional[str] = None, name: str = "graph") -> Iterator[Span]:
+        """
+        Opens a root span for `run_id`. A run that already has a trace (e.g. a
+        supervisor decision on an escalated run) gets an additional root span.
+        """
+        trace = self._get_or_create(run_id, client_id)
+        root = Span(os.urandom(8).hex(), None, name, time.time_ns())
+        trace.spans.append(root)
+        token = _active.set((trace, root.span_id))
+        try:
+            yield root
+        finally:
+            root.end_ns = time.time_ns()
+            _active.reset(token)
+            if self.export_path:
+                self._export(trace)
+
+    def _export(self, trace: Trace) -> None:
+        with self._lock:
+            spans = trace.spans[trace.exported:]
+            trace.exported += len(spans)
+            if not spans:
+                return
+            line = json.dumps(to_otlp(trace, spans), separators=(",", ":"))
+            with open(self.export_path, "a", encoding="utf-8") as fh:
+                fh.write(line + "\n")
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Optional[Span]]:
+    """Records a child span of the innermost open span; yields None when no trace is active."""
+    active = _active.get()
+    if active is None:
+        yield None
+        return
+
+    trace, parent_id = active
+    current = Span(os.urandom(8).hex(), parent_id, name, time.time_ns(), attributes=dict(attributes))
+    trace.spans.append(current)
+    token = _active.set((trace, current.span_id))
+    try:
+        yield current
+    except Exception as exc:
+        current.attributes["error"] = str(exc)
+        raise
+    finally:
+        current.end_ns = time.time_ns()
+        _active.reset(token)
+
+
+@contextmanager
+def detached(name: str, **attributes: Any) -> Iterator[List[tuple]]:
+    """
+    Records a span tree that belongs to no stored trace (e.g. one LLM call
+    shared by several runs). On exit the yielded list holds its spans as
+    `adopt()` tuples, to be copied into each run's trace.
+    """
+    trace = Trace("", None)
+    root = Span(os.urandom(8).hex(), None, name, time.time_ns(), attributes=dict(attributes))
+    trace.spans.append(root)
+    recorded: List[tuple] = []
+    token = _active.set((trace, root.span_id))
+    try:
+        yield recorded
+    finally:
+        root.end_ns = time.time_ns()
+        _active.reset(token)
+        recorded.extend(
+            (s.span_id, s.parent_id, s.name, s.start_ns, s.end_ns, s.attributes) for s in trace.spans
+        )
+
+
+def adopt(spans: List[tuple]) -> None:
+    """
+    Appends spans recorded elsewhere (a graph worker process) to the active
+    trace, as `(span_id, parent_id, name, start_ns, end_ns, attributes)`
+    tuples; their root is re-parented under the innermost open span.
+    """
+    active = _active.get()
+    if active is None:
+        return
+    trace, parent_id = active
+    for span_id, span_parent, name, start_ns, end_ns, attributes in spans:
+        trace.spans.append(Span(span_id, span_parent or parent_id, name, start_ns, end_ns, attributes))
+
+
+def traced(name: str, fn):
+    """Wraps a LangGraph node function so each execution is recorded as a span."""
+    def node(state):
+        with span(name):
+            return fn(state)
+    node.__name__ = getattr(fn, "__name__", name)
+    return node
+
+
+# ---------------------------------------------------------------------------
+# LLM usage capture
+# ---------------------------------------------------------------------------
+
+class LLMUsageCallback(BaseCallbackHandler):
+    """
+    Copies token usage and model name of an LLM call onto a span. (Retries
+    happen inside the google-genai HTTP client, out of LangChain's sight, so
+    they are not counted.)
+    """
+
+    def __init__(self, target: Span) -> None:
+        self.target = target
+
+    def on_llm_end(self, response: Any, **kwargs: Any) -> None:
+        for generations in response.generations:
+            for generation in generations:
+                message = getattr(generation, "message", None)
+                usage = getattr(message, "usage_metadata", None)
+                if usage:
+                    self.target.attributes["prompt_tokens"] = usage.get("input_tokens")
+                    self.target.attributes["response_tokens"] = usage.get("output_tokens")
+                metadata = getattr(message, "response_metadata", None) or {}
+                if metadata.get("model_name"):
+                    self.target.attributes["model"] = metadata["model_name"]
+
+
+# ---------------------------------------------------------------------------
+# Serialisation
+# ---------------------------------------------------------------------------
+
+def _otlp_value(value: Any) -> dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def to_otlp(trace: Trace, spans: Optional[List[Span]] = None) -> dict:
+    """Converts a trace (or some of its spans) to an OTLP/JSON ExportTraceServiceRequest document."""
+    trace_id = trace.run_id.replace("-", "")[:32].rjust(32, "0")
+    documents = []
+    for s in (trace.spans if spans is None else spans):
+        attributes = {"run_id": trace.run_id, **s.attributes}
+        if trace.client_id:
+            attributes["client_id"] = trace.client_id
+        documents.append({
+            "traceId": trace_id,
+            "spanId": s.span_id,
+            "parentSpanId": s.parent_id or "",
+            "name": s.name,
+            "kind": 1,
+            "startTimeUnixNano": str(s.start_ns),
+            "endTimeUnixNano": str(s.end_ns or s.start_ns),
+            "attributes": [
+                {"key": k, "value": _otlp_value(v)} for k, v in attributes.items() if v is not None
+            ],
+        })
+    return {
+        "resourceSpans": [{
+            "resource": {"attributes": [
+                {"key": "service.name", "value": {"stringValue": settings.APP_NAME}},
+            ]},
+            "scopeSpans": [{"scope": {"name": "crm.tracing"}, "spans": documents}],
+        }]
+    }
+
+
+# Singleton — shared across all requests in this process.
+tracer = Tracer(settings.TRACE_BUFFER_SIZE, settings.TRACE_EXPORT_PATH)
@@ -5,15 +5,28 @@ Run with:
     uvicorn app.main:app --reload --port 8000
 """
 
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 
+from app.agents import runner
 from app.core.config import settings
-from app.api.endpoints import webhooks, supervisor
+from app.core.overload import LEVEL_NAMES, controller
+from app.core.profiling import ProfilingMiddleware, request_profiles
+from app.api.endpoints import analytics, outbox, runs, webhooks, supervisor
 
 # ---------------------------------------------------------------------------
 # Application instance
 # ---------------------------------------------------------------------------
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Process execution mode: start and warm the graph workers before serving
+    runner.start()
+    yield
+    runner.shutdown()
+
+
 app = FastAPI(
     title=settings.APP_NAME,
     version=settings.APP_VERSION,
@@ -25,6 +38,7 @@ app = FastAPI(
     ),
     docs_url="/docs",
     redoc_url="/redoc",
+    lifespan=lifespan,
 )
 
 # ---------------------------------------------------------------------------
@@ -43,6 +57,35 @@ app.include_router(
     tags=["Supervisor — Human-in-the-Loop"],
 )
 
+app.include_router(
+    analytics.router,
+    prefix="/api/v1/analytics",
+    tags=["Analytics — Operational Metrics"],
+)
+
+app.include_router(
+    runs.router,
+    prefix="/api/v1/runs",
+    tags=["Runs — Trace Timelines"],
+)
+
+app.include_router(
+    outbox.router,
+    prefix="/api/v1/outbox",
+    tags=["Outbox — CRM Delivery"],
+)
+
+# Profiling surface: neither the routes nor the middleware exist without a token
+if request_profiles is not None:
+    from app.api.endpoints import debug
+
+    app.include_router(
+        debug.router,
+        prefix="/debug",
+        tags=["Debug — Profiling"],
+    )
+    app.add_middleware(ProfilingMiddleware, profiles=request_profiles)
+
 # ---------------------------------------------------------------------------
 # Health / root endpoints
 # ---------------------------------------------------------------------------
@@ -58,4 +101,9 @@ async def root() -> dict:
 
 @app.get("/health", tags=["Health"], summary="Health check")
 async def health_check() -> dict:
-    return {"status": "healthy"}
+    level = controller.level()
+    return {
+        "status": "healthy",
+        "degradation_level": level,
+        "degradation": LEVEL_NAMES[level],
+    }
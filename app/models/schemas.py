@@ -1,6 +1,6 @@
 from pydantic import BaseModel, Field
 from datetime import datetime
-from typing import Optional
+from typing import Any, Dict, List, Optional
 
 
 # ---------------------------------------------------------------------------
@@ -54,6 +54,13 @@ class ProcessingResponse(BaseModel):
         None, description="Personalised response drafted by the Executor agent (if executed)."
     )
     message: str = Field(..., description="Human-readable summary of the outcome.")
+    degradation_level: int = Field(
+        0,
+        description=(
+            "Overload degradation level while processing: 0 normal | 1 no supervisor note | "
+            "2 static responses | 3 rule-based analyst."
+        ),
+    )
 
 
 # ---------------------------------------------------------------------------
@@ -75,6 +82,13 @@ class PendingApprovalItem(BaseModel):
     timestamp: str
 
 
+class ArchivedApprovalItem(PendingApprovalItem):
+    """A pending item that was moved to the cold-tier archive."""
+
+    archive_reason: str = Field(..., description="Why it left the pending queue: ttl | capacity.")
+    archived_at: str = Field(..., description="ISO 8601 time it was archived.")
+
+
 class SupervisorDecision(BaseModel):
     """Decision payload submitted by the human supervisor."""
 
@@ -83,3 +97,213 @@ class SupervisorDecision(BaseModel):
     reason: Optional[str] = Field(
         None, description="Optional free-text reason for the decision."
     )
+
+
+class DecisionRecord(BaseModel):
+    """A decided run as stored in the decision history."""
+
+    position: int = Field(..., description="Sequence number in the history; use as a pagination cursor.")
+    run_id: str
+    client_id: str
+    decision: str = Field(..., description="approved | rejected")
+    reason: Optional[str] = None
+    escalated_at: float = Field(..., description="Epoch seconds the run entered the pending queue.")
+    decided_at: float = Field(..., description="Epoch seconds of the supervisor decision.")
+    decision_latency_seconds: float = Field(..., description="Time from escalation to decision.")
+    message: str
+    timestamp: str
+    sentiment: str
+    intent: str
+    sla_breached: bool
+    proposed_action: str
+    supervisor_note: Optional[str] = None
+    execution_result: Optional[str] = None
+
+
+class DecisionHistoryPage(BaseModel):
+    """Newest-first page of decisions."""
+
+    items: List[DecisionRecord]
+    total: int = Field(..., description="Decisions matching the filter (before client_id verification).")
+    next_cursor: Optional[int] = Field(
+        None, description="Pass as `cursor` to fetch the next (older) page; None on the last page."
+    )
+
+
+# ---------------------------------------------------------------------------
+# Analytics
+# ---------------------------------------------------------------------------
+
+class LatencySummary(BaseModel):
+    """Pipeline latency over a window (p95 is a histogram upper bound)."""
+
+    runs: int
+    avg_ms: float
+    p95_ms: float
+    max_ms: float
+
+
+class AnalystTierSummary(BaseModel):
+    """Traffic handled by one Analyst source (cascade tier) over a window."""
+
+    messages: int
+    share: float = Field(..., description="Share of classified messages resolved by this source.")
+    avg_ms: float = Field(
+        ..., description="Mean Analyst node time for these messages, including earlier tiers."
+    )
+
+
+class AnalyticsWindow(BaseModel):
+    """Operational metrics aggregated over one rolling window."""
+
+    window: str = Field(..., description="Window size: 1m | 5m | 1h | 24h.")
+    messages: int = Field(..., description="Messages classified by the Analyst agent.")
+    sentiment: Dict[str, int]
+    intent: Dict[str, int]
+    escalation_rate: float = Field(..., description="Share of triaged messages escalated to a human.")
+    sla_breach_rate: float = Field(..., description="Share of triaged messages that breached the SLA.")
+    analyst_tiers: Dict[str, AnalystTierSummary] = Field(
+        ..., description="Per-source Analyst traffic: local | llm | rules | local_fallback | fallback."
+    )
+    decisions: Dict[str, int] = Field(..., description="Supervisor decisions: approved | rejected.")
+    latency: LatencySummary
+
+
+class AnalyticsResponse(BaseModel):
+    """Rolling analytics snapshot."""
+
+    generated_at: datetime
+    windows: List[AnalyticsWindow]
+
+
+class ClientQueueStats(BaseModel):
+    """Fair-queue state of a single client."""
+
+    client_id: str
+    weight: float
+    queued: int = Field(..., description="Runs waiting for an execution slot.")
+    in_flight: int = Field(..., description="Runs currently executing.")
+    dispatched: int = Field(..., description="Runs admitted since the client last became active.")
+    avg_wait_ms: float
+    max_wait_ms: float
+    oldest_wait_ms: float = Field(..., description="Age of the oldest waiting run (0 if none).")
+
+
+class QueueStatsResponse(BaseModel):
+    """Weighted fair queue in front of the agent pipeline."""
+
+    max_concurrency: int
+    per_client_limit: int
+    in_flight: int
+    queued: int
+    clients: List[ClientQueueStats]
+
+
+class HedgingAgentStats(BaseModel):
+    """Hedged LLM calls of one agent, and their effect on its tail latency."""
+
+    agent: str
+    calls: int = Field(..., description="Hedge-eligible calls.")
+    hedged: int = Field(..., description="Calls for which a duplicate request was sent.")
+    hedge_wins: int = Field(..., description="Hedged calls answered by the duplicate first.")
+    budget_denied: int = Field(..., description="Slow calls not hedged because the budget was spent.")
+    hedge_rate: float = Field(..., description="Extra requests sent, as a share of calls.")
+    hedge_delay_ms: Optional[float] = Field(
+        None, description="Current wait before hedging: a percentile of the unhedged latency (None: warming up)."
+    )
+    served_p95_ms: Optional[float] = Field(None, description="Recent p95 latency seen by callers.")
+    served_p99_ms: Optional[float] = None
+    unhedged_p95_ms: Optional[float] = Field(None, description="Recent p95 latency of first attempts alone.")
+    unhedged_p99_ms: Optional[float] = None
+    p99_saved_ms: Optional[float] = Field(None, description="unhedged_p99_ms − served_p99_ms.")
+
+
+class HedgingResponse(BaseModel):
+    """Request hedging configuration and live per-agent statistics."""
+
+    enabled: bool
+    percentile: float = Field(..., description="Latency percentile after which a call is hedged.")
+    budget: float = Field(..., description="Maximum extra requests, as a share of calls.")
+    agents: List[HedgingAgentStats]
+
+
+# ---------------------------------------------------------------------------
+# Run traces
+# ---------------------------------------------------------------------------
+
+class TraceSpan(BaseModel):
+    """One timed step of a run: the graph, a node or an LLM call."""
+
+    span_id: str
+    parent_id: Optional[str]
+    name: str = Field(..., description="graph | decide | analyst | sla_check | triage | executor | llm")
+    start: datetime
+    offset_ms: float = Field(..., description="Start time relative to the first span of the run.")
+    duration_ms: Optional[float] = Field(None, description="None while the span is still open.")
+    attributes: Dict[str, Any] = Field(
+        default_factory=dict,
+        description="E.g. model, prompt_tokens, response_tokens for LLM spans.",
+    )
+
+
+class RunTrace(BaseModel):
+    """Span timeline of a single run."""
+
+    run_id: str
+    client_id: Optional[str]
+    duration_ms: float = Field(..., description="From the first span start to the last span end.")
+    spans: List[TraceSpan]
+
+
+# ---------------------------------------------------------------------------
+# Outbound delivery
+# ---------------------------------------------------------------------------
+
+class OutboxStats(BaseModel):
+    """State of the CRM delivery outbox."""
+
+    pending: int = Field(..., description="Deliveries waiting for (or in) a delivery attempt.")
+    dead: int = Field(..., description="Deliveries that exhausted their attempts.")
+    delivered: int = Field(..., description="Deliveries confirmed by the CRM since startup.")
+
+
+class DeadLetter(BaseModel):
+    """A delivery that exhausted OUTBOX_MAX_ATTEMPTS."""
+
+    id: int
+    run_id: str
+    attempts: int
+    last_error: Optional[str] = None
+    created_at: float = Field(..., description="Epoch seconds the delivery was queued.")
+
+
+# ---------------------------------------------------------------------------
+# Debug profiling
+# ---------------------------------------------------------------------------
+
+class RequestProfile(BaseModel):
+    """Wall-time breakdown of one profiled webhook request (phases are absent if its trace was not found)."""
+
+    run_id: Optional[str]
+    profiled_at: float = Field(..., description="Epoch seconds the request arrived.")
+    total_ms: float
+    request_validation_ms: Optional[float] = Field(None, description="Body parsing and payload validation.")
+    queue_wait_ms: Optional[float] = Field(None, description="Fair-scheduler wait.")
+    event_loop_wait_ms: Optional[float] = Field(
+        None, description="Graph dispatched but not executing: thread/process hand-off and event-loop resume."
+    )
+    graph_orchestration_ms: Optional[float] = Field(None, description="Graph execution outside LLM calls.")
+    llm_io_ms: Optional[float] = Field(None, description="Wall time with at least one LLM call in flight.")
+    bookkeeping_ms: Optional[float] = Field(
+        None, description="Post-graph writes: pending store, outbox enqueue, risk profile update."
+    )
+    response_serialization_ms: Optional[float] = Field(
+        None, description="Response building and serialization, until the first response byte."
+    )
+
+
+class RequestProfiles(BaseModel):
+    """Per-request profiling state and the most recent results, oldest first."""
+
+    armed: int = Field(..., description="Upcoming webhook requests that will still be profiled.")
+    profiles: List[RequestProfile]
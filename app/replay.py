@@ -0,0 +1,105 @@
+"""
+Replay recorded production traffic through the LangGraph pipeline.
+
+Every webhook captured in a cassette (see `app.core.cassette`) is driven
+through `crm_graph` while LLM calls are served from the same cassette, so a
+run is deterministic and independent of Gemini availability. Reports
+throughput and per-node time, which makes orchestration overhead comparable
+across releases.
+
+Usage:
+    python -m app.replay traffic.jsonl                  # recorded LLM latency
+    python -m app.replay traffic.jsonl --latency zero   # orchestration overhead only
+    python -m app.replay traffic.jsonl --concurrency 8
+"""
+
+import argparse
+import statistics
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Dict, List
+
+from app.core import cassette
+
+
+def _shifted_timestamp(entry: dict) -> str:
+    """Keeps the recorded message age, so SLA evaluation behaves as it did live."""
+    original = datetime.fromisoformat(entry["payload"]["timestamp"].replace("Z", "+00:00"))
+    if original.tzinfo is None:
+        original = original.replace(tzinfo=timezone.utc)
+    age = datetime.fromtimestamp(entry["recorded_at"], tz=timezone.utc) - original
+    return (datetime.now(timezone.utc) - age).isoformat()
+
+
+def _run_one(graph, entry: dict) -> Dict[str, float]:
+    """Runs one payload and returns seconds spent per node (plus 'total')."""
+    from app.agents.state import initial_state
+
+    payload = entry["payload"]
+    state = initial_state(payload["client_id"], payload["message"], _shifted_timestamp(entry))
+
+    timings: Dict[str, float] = defaultdict(float)
+    started = last = time.perf_counter()
+    for update in graph.stream(state, stream_mode="updates"):
+        now = time.perf_counter()
+        for node in update:
+            timings[node] += now - last
+        last = now
+    timings["total"] = time.perf_counter() - started
+    return timings
+
+
+def _percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m app.replay",
+        description="Replay a recorded cassette through crm_graph.",
+    )
+    parser.add_argument("cassette", help="Path to a JSONL cassette recorded with CASSETTE_RECORD_PATH.")
+    parser.add_argument("--latency", choices=["recorded", "zero"], default="recorded",
+                        help="Serve LLM responses at their recorded latency or instantly.")
+    parser.add_argument("--concurrency", type=int, default=1, help="Number of runs in flight.")
+    parser.add_argument("--repeat", type=int, default=1, help="Replay the traffic this many times.")
+    args = parser.parse_args()
+
+    player = cassette.start_replay(args.cassette, realtime=args.latency == "recorded")
+    entries = player.webhooks * args.repeat
+    if not entries:
+        parser.error(f"no webhook payloads found in {args.cassette}")
+
+    # Imported after the player is installed: compiling the graph builds the LLM clients.
+    from app.agents.orchestrator import crm_graph
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        results = list(pool.map(lambda e: _run_one(crm_graph, e), entries))
+    elapsed = time.perf_counter() - started
+
+    per_node: Dict[str, List[float]] = defaultdict(list)
+    for timings in results:
+        for node, seconds in timings.items():
+            per_node[node].append(seconds)
+
+    print(f"\nReplayed {len(results)} runs in {elapsed:.2f}s "
+          f"({len(results) / elapsed:.1f} runs/s, concurrency={args.concurrency}, "
+          f"latency={args.latency})")
+    print(f"LLM cassette: {player.hits} hits, {player.misses} misses\n")
+    print(f"{'node':<12} {'runs':>6} {'mean ms':>10} {'p50 ms':>10} {'p95 ms':>10} {'total s':>10}")
+    print("-" * 62)
+    for node in sorted(per_node, key=lambda n: (n == "total", n)):
+        values = per_node[node]
+        print(f"{node:<12} {len(values):>6} "
+              f"{statistics.fmean(values) * 1000:>10.2f} "
+              f"{_percentile(values, 0.50) * 1000:>10.2f} "
+              f"{_percentile(values, 0.95) * 1000:>10.2f} "
+              f"{sum(values):>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Pending Store — Memory Benchmark
+================================
+Mide los bytes por elemento pendiente con `tracemalloc`, comparando el
+`AgentState` completo (representación anterior) con el registro compacto
+`PendingApproval`.
+
+Uso:
+    python benchmarks/pending_store_memory.py
+    python benchmarks/pending_store_memory.py --sizes 10000 100000
+"""
+
+import argparse
+import gc
+import os
+import sys
+import tracemalloc
+import uuid
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.store import PendingApproval  # noqa: E402
+
+_BASE_TIME = datetime(2026, 1, 15, 10, 0, tzinfo=timezone.utc)
+_NOTE = (
+    "The client expressed negative sentiment and the SLA threshold was exceeded. "
+    "Contact the client directly and confirm a resolution path."
+)
+
+
+def _make_state(i: int) -> dict:
+    # Every message body is unique so the benchmark does not flatter interning.
+    return {
+        "client_id": f"CRM-{i:07d}",
+        "messages": [{"role": "user", "content": f"My order #{i} arrived damaged and I want a refund!"}],
+        "timestamp": (_BASE_TIME + timedelta(seconds=i)).isoformat(),
+        "sentiment": "negative",
+        "intent": "refund_request",
+        "sla_breached": bool(i % 2),
+        "proposed_action": "escalate_to_human",
+        "supervisor_note": _NOTE,
+        "human_approved": None,
+        "execution_result": None,
+    }
+
+
+def _measure(n: int, compact: bool) -> float:
+    gc.collect()
+    tracemalloc.start()
+    store = {}
+    for i in range(n):
+        state = _make_state(i)
+        store[str(uuid.UUID(int=i))] = PendingApproval.from_state(state) if compact else state
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del store
+    gc.collect()
+    return current / n
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    args = parser.parse_args()
+
+    print(f"{'items':>10} | {'AgentState B/item':>18} | {'PendingApproval B/item':>22} | {'ratio':>6}")
+    print("-" * 66)
+    for n in args.sizes:
+        full    = _measure(n, compact=False)
+        compact = _measure(n, compact=True)
+        print(f"{n:>10,} | {full:>18,.0f} | {compact:>22,.0f} | {full / compact:>5.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,253 @@
+"""
+CRM Multi-Agent API — Outbox Test Runner
+=========================================
+Ejecuta los escenarios de entrega al CRM (app/core/outbox.py) contra un
+receptor HTTP local que reemplaza al CRM: entrega, batching, backoff tras un
+5xx, aislamiento de una entrega rechazada, dead-letter y retry_dead.
+
+Uso:
+    python run_outbox_tests.py
+
+No necesita el servidor de la API: cada escenario crea su propio Outbox con
+una base SQLite temporal y su propio receptor en un puerto libre.
+"""
+
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from app.core.outbox import Outbox
+
+# ---------------------------------------------------------------------------
+# Helpers de presentación
+# ---------------------------------------------------------------------------
+
+GREEN  = "\033[92m"
+RED    = "\033[91m"
+YELLOW = "\033[93m"
+CYAN   = "\033[96m"
+BOLD   = "\033[1m"
+RESET  = "\033[0m"
+
+def _header(title: str) -> None:
+    print(f"\n{BOLD}{CYAN}{'═' * 60}{RESET}")
+    print(f"{BOLD}{CYAN}  {title}{RESET}")
+    print(f"{BOLD}{CYAN}{'═' * 60}{RESET}")
+
+def _ok(label: str, value: str = "") -> None:
+    print(f"  {GREEN}✔{RESET}  {label}: {BOLD}{value}{RESET}")
+
+def _fail(label: str, value: str = "") -> None:
+    print(f"  {RED}✘{RESET}  {label}: {BOLD}{value}{RESET}")
+
+def _info(label: str, value: str = "") -> None:
+    print(f"  {YELLOW}→{RESET}  {label}: {value}")
+
+def _assert(condition: bool, msg: str) -> bool:
+    if condition:
+        _ok(msg)
+    else:
+        _fail(msg)
+    return condition
+
+passed = 0
+failed = 0
+
+def run_scenario(title: str, fn) -> None:
+    global passed, failed
+    _header(title)
+    try:
+        fn()
+        passed += 1
+    except AssertionError as e:
+        _fail("ASSERTION FAILED", str(e))
+        failed += 1
+    except Exception as e:
+        _fail("UNEXPECTED ERROR", str(e))
+        failed += 1
+
+
+# ---------------------------------------------------------------------------
+# Receptor CRM de prueba
+# ---------------------------------------------------------------------------
+
+class FakeCRM:
+    """
+    Servidor HTTP que registra cada POST recibido. `respond(run_ids)` decide
+    el código de estado a partir de los run_id del batch (por defecto 200);
+    `gate` permite retener las peticiones hasta que el escenario lo libere.
+    """
+
+    def __init__(self) -> None:
+        self.requests = []          # (time, [run_id, ...], status)
+        self.respond = lambda run_ids: 200
+        self.gate = threading.Event()
+        self.gate.set()
+        crm = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"       # keep-alive, como un CRM real
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers["Content-Length"]))
+                run_ids = [d["run_id"] for d in json.loads(body)["deliveries"]]
+                crm.gate.wait()
+                status = crm.respond(run_ids)
+                crm.requests.append((time.time(), run_ids, status))
+                self.send_response(status)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/crm/deliveries"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def delivered(self) -> list:
+        return [run_id for _, run_ids, status in self.requests if status == 200 for run_id in run_ids]
+
+
+def _outbox(crm: FakeCRM, **kwargs) -> Outbox:
+    db_path = os.path.join(tempfile.mkdtemp(prefix="outbox-test-"), "outbox.sqlite3")
+    options = {"batch_size": 20, "workers": 1, "max_attempts": 3, "backoff": 0.2, "timeout": 5.0}
+    options.update(kwargs)
+    return Outbox(db_path, crm.url, **options)
+
+def _wait_for(condition, timeout: float = 10.0) -> bool:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if condition():
+            return True
+        time.sleep(0.02)
+    return False
+
+def _payload(run_id: str) -> dict:
+    return {"run_id": run_id, "client_id": "CRM-TEST-OUTBOX", "status": "processed"}
+
+
+# ---------------------------------------------------------------------------
+# Escenario 1 — Entrega simple
+# ---------------------------------------------------------------------------
+
+def test_delivery():
+    crm = FakeCRM()
+    outbox = _outbox(crm)
+    outbox.enqueue("run-1", _payload("run-1"))
+
+    assert _wait_for(lambda: outbox.stats()["delivered"] == 1), "delivery not received"
+    _assert(crm.delivered() == ["run-1"], "CRM received run-1")
+    _assert(outbox.stats() == {"pending": 0, "dead": 0, "delivered": 1}, f"stats={outbox.stats()}")
+
+
+# ---------------------------------------------------------------------------
+# Escenario 2 — Batching: las entregas acumuladas viajan en un solo POST
+# ---------------------------------------------------------------------------
+
+def test_batching():
+    crm = FakeCRM()
+    outbox = _outbox(crm, batch_size=4)
+    crm.gate.clear()                                # retiene el primer POST
+    outbox.enqueue("first", _payload("first"))
+    assert _wait_for(lambda: outbox.stats()["pending"] == 1 and _claimed(outbox)), "first row not claimed"
+    for i in range(6):
+        outbox.enqueue(f"run-{i}", _payload(f"run-{i}"))
+    crm.gate.set()
+
+    assert _wait_for(lambda: outbox.stats()["delivered"] == 7), "deliveries not received"
+    sizes = [len(run_ids) for _, run_ids, _ in crm.requests]
+    _info("Batch sizes", str(sizes))
+    _assert(sizes == [1, 4, 2], "6 queued deliveries sent as batches of 4 + 2")
+    _assert(sorted(crm.delivered()) == sorted(["first"] + [f"run-{i}" for i in range(6)]), "all delivered once")
+
+def _claimed(outbox: Outbox) -> bool:
+    return outbox._db().execute("SELECT COUNT(*) FROM outbox WHERE status = 'delivering'").fetchone()[0] == 1
+
+
+# ---------------------------------------------------------------------------
+# Escenario 3 — Backoff tras un 5xx
+# ---------------------------------------------------------------------------
+
+def test_backoff_after_5xx():
+    crm = FakeCRM()
+    outbox = _outbox(crm, backoff=0.5)
+    crm.respond = lambda run_ids: 503 if len(crm.requests) == 0 else 200
+    outbox.enqueue("run-1", _payload("run-1"))
+
+    assert _wait_for(lambda: outbox.stats()["delivered"] == 1), "delivery not retried"
+    (t_fail, _, s_fail), (t_ok, _, s_ok) = crm.requests
+    _assert((s_fail, s_ok) == (503, 200), "503 first, then delivered")
+    # Jitter: el primer reintento espera entre 0.5× y 1.5× el backoff
+    _assert(t_ok - t_fail >= 0.25, f"retried after {t_ok - t_fail:.2f}s of backoff")
+
+
+# ---------------------------------------------------------------------------
+# Escenario 4 — Una entrega rechazada (4xx) no arrastra a su batch
+# ---------------------------------------------------------------------------
+
+def test_rejected_delivery_is_isolated():
+    crm = FakeCRM()
+    outbox = _outbox(crm, batch_size=8, backoff=0.05)
+    crm.respond = lambda run_ids: 400 if "poison" in run_ids else 200
+    crm.gate.clear()
+    outbox.enqueue("first", _payload("first"))
+    assert _wait_for(lambda: _claimed(outbox)), "first row not claimed"
+    for run_id in ("ok-1", "ok-2", "poison", "ok-3", "ok-4"):
+        outbox.enqueue(run_id, _payload(run_id))
+    crm.gate.set()
+
+    assert _wait_for(lambda: outbox.stats()["dead"] == 1), "poison delivery not dead-lettered"
+    _assert(sorted(crm.delivered()) == ["first", "ok-1", "ok-2", "ok-3", "ok-4"], "healthy rows delivered")
+    dead = outbox.dead_letters()
+    _assert([d["run_id"] for d in dead] == ["poison"], "only the rejected row was dead-lettered")
+    _assert(dead[0]["attempts"] == 3, f"attempts={dead[0]['attempts']}")
+    _info("last_error", dead[0]["last_error"])
+
+
+# ---------------------------------------------------------------------------
+# Escenario 5 — Dead-letter tras OUTBOX_MAX_ATTEMPTS y retry_dead
+# ---------------------------------------------------------------------------
+
+def test_dead_letter_and_retry():
+    crm = FakeCRM()
+    outbox = _outbox(crm, backoff=0.05)
+    crm.respond = lambda run_ids: 500
+    outbox.enqueue("run-1", _payload("run-1"))
+
+    assert _wait_for(lambda: outbox.stats()["dead"] == 1), "delivery not dead-lettered"
+    _assert(len(crm.requests) == 3, f"{len(crm.requests)} attempts before dead-lettering")
+    dead = outbox.dead_letters()
+    _assert(dead[0]["last_error"].startswith("HTTP 500"), f"last_error='{dead[0]['last_error']}'")
+
+    crm.respond = lambda run_ids: 200
+    _assert(outbox.retry_dead(dead[0]["id"]), "retry_dead accepted the row")
+    _assert(not outbox.retry_dead(dead[0]["id"]), "a row no longer dead is not retried twice")
+    assert _wait_for(lambda: outbox.stats()["delivered"] == 1), "retried delivery not received"
+    _assert(outbox.stats() == {"pending": 0, "dead": 0, "delivered": 1}, f"stats={outbox.stats()}")
+
+
+# ---------------------------------------------------------------------------
+# Main
+# ---------------------------------------------------------------------------
+
+if __name__ == "__main__":
+    print(f"\n{BOLD}CRM Multi-Agent API — Outbox Test Suite{RESET}")
+
+    run_scenario("1 · Single delivery",                   test_delivery)
+    run_scenario("2 · Queued deliveries are batched",     test_batching)
+    run_scenario("3 · 5xx → backoff → delivered",         test_backoff_after_5xx)
+    run_scenario("4 · 4xx in a batch → isolated",         test_rejected_delivery_is_isolated)
+    run_scenario("5 · Dead-letter → retry_dead",          test_dead_letter_and_retry)
+
+    # Resumen final
+    total = passed + failed
+    print(f"\n{BOLD}{'═' * 60}{RESET}")
+    print(f"{BOLD}  Results: {GREEN}{passed} passed{RESET}{BOLD} / {RED}{failed} failed{RESET}{BOLD} / {total} total{RESET}")
+    print(f"{BOLD}{'═' * 60}{RESET}\n")
+
+    sys.exit(0 if failed == 0 else 1)